@@ -1,12 +1,19 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import math
+from concurrent.futures import wait
 
 # --- IMPORT MODULE BACKEND ---
 from data.data_generator import generate_dummy_data
-from src.ai_model import train_risk_model, infer_risk
-from src.optimizer import schedule_multi_term, Section
+from src.model_store import load_or_train, DEFAULT_PATH
+from src.ai_model import train_in_background
+from src.data_source import ArraySource
+from src.np_runtime import HeuristicRiskPredictor
+from src.scoring import RiskScorer
+from src.optimizer import IncrementalPlanner
+from src.catalog import CatalogIndex
+from src.plan_cache import PlanCache, plan_key, DEFAULT_CACHE_PATH
+from src.forecast import forecast_graduation
 from ortools.sat.python import cp_model 
 
 # --- CẤU HÌNH TRANG WEB ---
@@ -37,23 +44,64 @@ def get_university_schedule():
         {"id": "CHHNV_01","course_id": "CHHNV","name": "Cơ học hệ nhiều vật",             "day": "Thu", "start": 1, "credits": 2},
         {"id": "MKD_01",  "course_id": "MKD",  "name": "Mạng không dây",                  "day": "Thu", "start": 7, "credits": 3},
     ]
-    
-    sections = []
-    for s in schedule_db:
-        sections.append(Section(
-            id=s["id"], course_id=s["course_id"], term=1, 
-            day=s["day"], start=s["start"], end=s["start"] + s["credits"] - 1, credits=s["credits"]
-        ))
-    return sections
+    return schedule_db
+
+@st.cache_resource
+def get_catalog_index():
+    # Dựng MỘT lần cho mọi phiên: môn -> lớp / tên môn, mặt nạ tiết của từng lớp (kỳ 1, kết thúc = bắt đầu + tín chỉ - 1)
+    return CatalogIndex.from_records(get_university_schedule())
+
+# Buổi bận: (thứ, tiết đầu, tiết cuối)
+DAY_NAMES = {'Mon': 'Thứ 2', 'Tue': 'Thứ 3', 'Wed': 'Thứ 4', 'Thu': 'Thứ 5', 'Fri': 'Thứ 6', 'Sat': 'Thứ 7'}
+BUSY_OPTIONS = {f"{name} {part}": (day, lo, hi) for day, name in DAY_NAMES.items()
+                for part, lo, hi in (("sáng", 1, 6), ("chiều", 7, 12))}
+
+def get_session_planner(school_schedule):
+    """
+    Planner giữ model CP-SAT trong phiên làm việc: lần bấm sau chỉ sửa các
+    ràng buộc thay đổi và gợi ý lời giải trước thay vì dựng lại từ đầu.
+    """
+    if 'planner' not in st.session_state:
+        st.session_state['planner'] = IncrementalPlanner(school_schedule, {}, [1], {})
+    return st.session_state['planner']
+
+def _load_or_train(X, y, in_dim):
+    # Chạy ở thread nền: chỉ train lại (train_risk_model_fast) khi hash dữ liệu thay đổi, còn lại nạp artifact
+    report = {}
+    model = load_or_train(X, y, path=DEFAULT_PATH, report=report)
+    return model, report['version']
 
 @st.cache_resource
 def init_ai_model():
-    data = generate_dummy_data()
+    """Future (mô hình, phiên bản) dùng chung mọi phiên - nạp / train không chặn giao diện."""
+    data = generate_dummy_data(seed=42)
     if len(data) == 5: _, _, _, history_df, _ = data
     else: _, _, history_df, _ = data
-    X = history_df[['student_gpa_avg', 'course_difficulty', 'course_credits']].values.astype('float32')
-    y = history_df[['passed']].values.astype('float32')
-    return train_risk_model(X, y, in_dim=3)
+    source = ArraySource.from_frame(history_df)
+    return train_in_background(source.X, source.y, source.X.shape[1], trainer=_load_or_train)
+
+def current_ai_model(timeout=2.0):
+    """
+    (mô hình, phiên bản, đã sẵn sàng): chờ tối đa timeout giây (đủ để nạp
+    artifact), mô hình còn đang train thì tạm dùng HeuristicRiskPredictor.
+    """
+    future = init_ai_model()
+    wait([future], timeout=timeout)
+    if not future.done():
+        return HeuristicRiskPredictor(), HeuristicRiskPredictor.version, False
+    model, version = future.result()
+    return model, version, True
+
+@st.cache_resource
+def get_plan_cache():
+    # Dùng chung cho mọi phiên: LRU trong bộ nhớ + SQLite trên đĩa
+    return PlanCache(DEFAULT_CACHE_PATH)
+
+@st.cache_data(max_entries=1024)
+def score_course_risks(_model, model_version, gpa, course_ids, difficulty, credits):
+    """Rủi ro theo môn, nhớ theo (phiên bản mô hình, GPA đã làm tròn, bảng môn) - _model không vào khóa."""
+    risk_input = pd.DataFrame({'id': course_ids, 'difficulty': difficulty, 'credits': credits})
+    return RiskScorer(_model).risk_dict(gpa, risk_input)
 
 # ==============================================================================
 # PHẦN 2: GIAO DIỆN CHÍNH
@@ -61,7 +109,9 @@ def init_ai_model():
 
 def main():
     st.title("🎓 Hệ Thống Cố Vấn Học Tập Thông Minh")
-    model = init_ai_model()
+    model, model_version, model_ready = current_ai_model()
+    if not model_ready:
+        st.info("⏳ Mô hình rủi ro đang được huấn luyện nền - tạm dùng ước lượng theo GPA và độ khó.")
 
     tab1, tab2 = st.tabs(["📅 CHỨC NĂNG 1: Xếp Lịch Kỳ Tới", "🚀 CHỨC NĂNG 2: Dự Báo Tốt Nghiệp"])
 
@@ -90,38 +140,61 @@ def main():
             # Tăng giới hạn Min/Max lên vì danh sách bạn gửi tổng cộng khoảng 21 tín
             min_cre = st.number_input("Tín chỉ Min:", 0, 30, 10)
             max_cre = st.number_input("Tín chỉ Max:", 0, 40, 25)
+            busy_slots = st.multiselect("Buổi bận (không xếp lớp):", list(BUSY_OPTIONS))
 
         if st.button("🚀 Xếp Lịch Học Tối Ưu", type="primary"):
-            school_schedule = get_university_schedule()
+            index = get_catalog_index()
+            # Bỏ dòng trống (bảng cho thêm dòng động => mã môn None / NaN / rỗng)
+            codes = wants_df['Mã môn']
+            wants_df = wants_df[codes.notna() & (codes.astype(str).str.strip() != '')]
             wanted_ids = wants_df['Mã môn'].unique()
             
-            # Lọc các lớp có trong danh sách muốn học
-            candidate_sections = [s for s in school_schedule if s.course_id in wanted_ids]
+            # Lọc các lớp có trong danh sách muốn học + tiết bận (AND mặt nạ tiết)
+            busy = 0
+            for slot in busy_slots:
+                busy |= index.slot_mask(*BUSY_OPTIONS[slot])
+            candidate_rows = index.rows_of_courses(wanted_ids)
             
-            if not candidate_sections:
+            if not len(candidate_rows):
                 st.error("⚠️ Không tìm thấy lớp học phần phù hợp (Kiểm tra mã môn).")
+            elif not index.available(busy, candidate_rows).any():
+                st.error("⚠️ Mọi lớp của các môn đã chọn đều trùng buổi bận.")
             else:
-                course_risks = {}
-                for _, row in wants_df.iterrows():
-                    cid = row['Mã môn']
-                    # Dự báo rủi ro dựa trên độ khó bạn cung cấp
-                    risk = 1.0 - infer_risk(model, np.array([[gpa_input, row.get('Độ khó',0.5), row.get('Tín chỉ',3)]], dtype='float32'))[0]
-                    course_risks[cid] = risk
+                # Dự báo rủi ro dựa trên độ khó bạn cung cấp - một lần forward cho cả bảng
+                difficulty = wants_df['Độ khó'].fillna(0.5) if 'Độ khó' in wants_df else pd.Series(0.5, wants_df.index)
+                credits = wants_df['Tín chỉ'].fillna(3) if 'Tín chỉ' in wants_df else pd.Series(3, wants_df.index)
+                course_risks = score_course_risks(model, model_version, round(float(gpa_input), 2),
+                                                  tuple(wants_df['Mã môn']), tuple(difficulty.astype(float)),
+                                                  tuple(credits.astype(float)))
 
-                # Chạy thuật toán xếp lịch
-                chosen, status = schedule_multi_term(candidate_sections, {}, [1], {1: (min_cre, max_cre)}, course_risks)
+                # Chạy thuật toán xếp lịch - đầu vào trùng với lần trước (của bất kỳ ai) thì lấy từ cache
+                planner = get_session_planner(index)
+                credit_bounds = {1: (min_cre, max_cre)}
+                cache = get_plan_cache()
+                catalog_fp = planner.catalog.table.fingerprint()
+                cache.bind(catalog_fp, model_version)
+                key = plan_key(catalog_fp, {}, [1], credit_bounds, course_risks, planner.risk_weight,
+                               model_version=model_version, wanted=wanted_ids, course_ids=planner.catalog.code_of,
+                               busy=busy)
+                hit = cache.get(key)
+                if hit is not None:
+                    chosen, status = [planner.catalog.section_by_id(i) for i in hit[0]], hit[1]
+                else:
+                    planner.update(wanted=wanted_ids, credit_bounds=credit_bounds, risk_dict=course_risks, busy=busy)
+                    chosen, status = planner.solve()
+                    cache.put(key, [s.id for s in chosen], status)
 
                 if chosen:
                     st.success(f"✅ Đã xếp xong! Tổng tín chỉ: {sum(s.credits for s in chosen)}")
                     results = []
-                    # Mapping thứ sang tiếng Việt
-                    day_map = {'Mon': 'Thứ 2', 'Tue': 'Thứ 3', 'Wed': 'Thứ 4', 'Thu': 'Thứ 5', 'Fri': 'Thứ 6'}
+                    # Tên môn: bảng người dùng nhập trước, không có thì lấy từ catalog
+                    names = dict(zip(wants_df['Mã môn'], wants_df['Tên môn'])) if 'Tên môn' in wants_df else {}
                     for s in chosen:
                         results.append({
-                            "Thứ": day_map.get(s.day, s.day), 
+                            "Thứ": DAY_NAMES.get(s.day, s.day), 
                             "Ca": f"Tiết {s.start}-{s.end}", 
                             "Mã Môn": s.course_id, 
-                            "Tên Môn": next((r['Tên môn'] for _, r in wants_df.iterrows() if r['Mã môn'] == s.course_id), s.course_id),
+                            "Tên Môn": names.get(s.course_id) or index.meta(s.course_id, 'name', s.course_id),
                             "Tín chỉ": s.credits, 
                             "Rủi ro trượt": f"{course_risks[s.course_id]:.1%}"
                         })
@@ -156,35 +229,36 @@ def main():
             with c_param:
                 req_credits = st.number_input("Tổng tín chỉ cần tốt nghiệp:", value=150)
                 limit_credits = st.number_input("Giới hạn tín chỉ/kỳ:", value=20)
+                difficulty = st.slider("Độ khó TB các môn còn lại:", 0.0, 1.0, 0.6)
 
         # --- XỬ LÝ DỰ BÁO ---
         if not history_df.empty:
             valid_df = history_df.dropna(subset=["Học kỳ", "Tín chỉ", "Điểm GPA"])
             
             if len(valid_df) > 0:
-                total_cre_learned = 0
-                total_points = 0
-                total_cre_attempted = 0
-                failed_cre = 0
+                # Tổng hợp theo cột (không duyệt từng dòng)
+                c = valid_df['Tín chỉ'].astype(float).to_numpy()
+                g = valid_df['Điểm GPA'].astype(float).to_numpy()
+                failed = g < 1.0
+                total_cre_attempted = c.sum()
+                total_cre_learned = c[~failed].sum()
+                failed_cre = c[failed].sum()
                 current_max_sem = int(valid_df["Học kỳ"].max())
 
-                for _, row in valid_df.iterrows():
-                    c = float(row['Tín chỉ'])
-                    g = float(row['Điểm GPA'])
-                    total_points += c * g
-                    total_cre_attempted += c
-                    if g < 1.0: 
-                        failed_cre += c
-                    else:
-                        total_cre_learned += c
-                
-                gpa_avg = total_points / total_cre_attempted if total_cre_attempted > 0 else 0.0
+                gpa_avg = float((c * g).sum() / total_cre_attempted) if total_cre_attempted > 0 else 0.0
                 missing_cre = max(0, req_credits - total_cre_learned)
                 
                 total_needed = missing_cre + failed_cre
                 semesters_needed = math.ceil(total_needed / limit_credits) if limit_credits > 0 else 99
                 grad_sem = current_max_sem + semesters_needed
 
+                # Monte Carlo: xác suất qua môn theo mô hình rủi ro, môn trượt phải học lại
+                forecast = None
+                if limit_credits > 0:
+                    forecast = forecast_graduation(RiskScorer(model), gpa_avg, total_cre_learned, req_credits,
+                                                   failed_credits=failed_cre, limit_credits=limit_credits,
+                                                   difficulty=difficulty, n_sims=20000, seed=0)
+
                 st.divider()
                 
                 # Metrics
@@ -198,8 +272,20 @@ def main():
                 st.markdown("---")
 
                 # Text Dự báo
-                st.markdown(f"## 🔮 Dự báo: Bạn cần thêm khoảng {semesters_needed} kỳ nữa.")
-                st.caption(f"Dự kiến tốt nghiệp vào: **Học kỳ thứ {grad_sem}**")
+                if forecast is not None and forecast.graduated > 0:
+                    pct = forecast.percentiles()
+                    st.markdown(f"## 🔮 Dự báo: Bạn cần thêm khoảng {pct[50]} kỳ nữa (trung vị).")
+                    st.caption(f"Khoảng 80%: {pct[10]}–{pct[90]} kỳ | Nếu không trượt môn nào: {semesters_needed} kỳ "
+                               f"(Học kỳ thứ {grad_sem}) | Xác suất kịp trong {semesters_needed} kỳ: "
+                               f"{forecast.prob_within(semesters_needed):.0%} | "
+                               f"Xác suất qua mỗi môn: {forecast.pass_prob:.0%}")
+                    dist = forecast.distribution()
+                    dist = dist[dist > 0.001]
+                    dist.index = [f"Kỳ {current_max_sem + k}" for k in dist.index]
+                    st.bar_chart(dist.rename("Xác suất tốt nghiệp"))
+                else:
+                    st.markdown(f"## 🔮 Dự báo: Bạn cần thêm khoảng {semesters_needed} kỳ nữa.")
+                    st.caption(f"Dự kiến tốt nghiệp vào: **Học kỳ thứ {grad_sem}**")
 
                 # Chiến lược Box
                 st.markdown("### 💡 AI Đề Xuất Chiến Lược:")
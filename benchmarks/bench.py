@@ -0,0 +1,337 @@
+"""
+Đo hiệu năng offline ở nhiều quy mô dữ liệu giả lập:
+dựng model / giải CP-SAT (schedule_multi_term), cửa sổ trượt so với giải
+nguyên khối (src.rolling), tốc độ train (DataLoader, train_risk_model_fast, theo khối),
+độ trễ infer_risk theo lô và toàn bộ main.py.
+
+Mỗi case chạy trong một process riêng để peak RSS không lẫn giữa các case.
+Kết quả ghi ra JSON; nếu có baseline thì so sánh và báo case nào chậm / tốn
+bộ nhớ hơn quá ngưỡng (exit code 1). benchmarks/baseline.json đi kèm repo
+đo trên một máy tham chiếu (xem 'machine'); máy khác nên --save-baseline lại.
+
+    python -m benchmarks.bench --scales small medium
+    python -m benchmarks.bench --save-baseline
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUT = os.path.join('benchmarks', 'results.json')
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+
+SCALES = {
+    'small':  {'sections': 10,     'courses': 5,    'history': 1_000,   'epochs': 5, 'batches': [1, 100]},
+    'medium': {'sections': 1_000,  'courses': 100,  'history': 20_000,  'epochs': 2, 'batches': [1_000, 10_000]},
+    'large':  {'sections': 10_000, 'courses': 1_000, 'history': 100_000, 'epochs': 1, 'batches': [100_000]},
+}
+SEED = 0
+
+# Chỉ số so với baseline (đều là càng nhỏ càng tốt)
+COMPARED = ['wall_time', 'build_time', 'solve_time', 'peak_rss_mb', 'model_bytes', 'p50_ms']
+
+def _peak_rss_mb():
+    # Linux: ru_maxrss tính bằng KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _model_bytes(catalog, prereqs, target_terms, credit_bounds, risk):
+    # Kích thước model CP-SAT đã serialize: dựng lại model giống schedule_multi_term rồi ghi ra file tạm
+    from src.optimizer import _build_model, _set_objective
+    from src.presolve import PresolveContext, run_presolve
+
+    kept = run_presolve(np.arange(len(catalog)), PresolveContext(catalog, target_terms, (), prereqs))
+    pm = _build_model(catalog, kept, target_terms, credit_bounds, (), prereqs)
+    _set_objective(pm, catalog.table, risk, 5.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.pb')
+        pm.model.export_to_file(path)
+        return os.path.getsize(path)
+
+def bench_solve(scale, max_time=30.0):
+    from data.data_generator import generate_synthetic_data
+    from src.optimizer import SectionCatalog, SolverProfile, schedule_multi_term
+    from src.section_table import SectionTable
+
+    cfg = SCALES[scale]
+    courses, prereq_df, _, sections_df, _ = generate_synthetic_data(
+        n_courses=cfg['courses'], n_sections=cfg['sections'], n_history=0, n_students=0,
+        prereq_density=0.5, seed=SEED)
+    prereqs = prereq_df.groupby('course')['prereq'].apply(list).to_dict()
+    risk = dict(zip(courses['id'], courses['difficulty']))
+
+    t0 = time.perf_counter()
+    catalog = SectionCatalog(SectionTable.from_dataframe(sections_df))
+    catalog_time = time.perf_counter() - t0
+    stats = {}
+    target_terms, credit_bounds = [1, 2, 3], {t: (0, 20) for t in (1, 2, 3)}
+    t0 = time.perf_counter()
+    chosen, status = schedule_multi_term(
+        catalog, prereqs, target_terms, credit_bounds, risk, stats=stats,
+        profile=SolverProfile(max_time=max_time, num_workers=1, seed=SEED))
+    wall_time = catalog_time + time.perf_counter() - t0
+    return {
+        'wall_time': wall_time,
+        'catalog_time': catalog_time,
+        'presolve_time': stats['presolve_time'],
+        'build_time': stats['build_time'],
+        'solve_time': stats['solve_time'],
+        'num_variables': stats['num_variables'],
+        'num_constraints': stats['num_constraints'],
+        'model_bytes': _model_bytes(catalog, prereqs, target_terms, credit_bounds, risk),
+        'status': status,
+        'chosen': len(chosen),
+    }
+
+def bench_rolling(scale, n_terms=8, time_budget=30.0):
+    """Cửa sổ trượt (+ LNS) so với giải nguyên khối cho lộ trình n_terms kỳ."""
+    from data.data_generator import generate_synthetic_data
+    from src.optimizer import SectionCatalog
+    from src.rolling import compare_with_monolithic
+    from src.section_table import SectionTable
+
+    cfg = SCALES[scale]
+    courses, prereq_df, _, sections_df, _ = generate_synthetic_data(
+        n_courses=cfg['courses'], n_sections=cfg['sections'], n_terms=n_terms, n_history=0, n_students=0,
+        prereq_density=0.5, seed=SEED)
+    prereqs = prereq_df.groupby('course')['prereq'].apply(list).to_dict()
+    # Rủi ro nhỏ để hàm mục tiêu không âm hết (không thì lời giải tối ưu là rỗng)
+    risk = dict(zip(courses['id'], courses['difficulty'] * 0.3))
+    catalog = SectionCatalog(SectionTable.from_dataframe(sections_df))
+    target_terms = list(range(1, n_terms + 1))
+    credit_bounds = {t: (0, 20) for t in target_terms}
+    t0 = time.perf_counter()
+    report = compare_with_monolithic(catalog, prereqs, target_terms, credit_bounds, risk, time_budget=time_budget,
+                                     num_workers=1, seed=SEED, window=3, lns_rounds=4)
+    report['wall_time'] = time.perf_counter() - t0
+    report['solve_time'] = report.pop('rolling_time')
+    report['status'] = report['rolling_status']
+    return report
+
+def _history_xy(n):
+    from data.data_generator import generate_synthetic_data
+    history = generate_synthetic_data(n_courses=100, n_sections=0, n_students=0, n_history=n, seed=SEED)[2]
+    X = history[['student_gpa_avg', 'course_difficulty', 'course_credits']].to_numpy(np.float32, copy=True)
+    y = history[['passed']].to_numpy(np.float32, copy=True)
+    return X, y
+
+def bench_train(scale):
+    import torch
+    from src.ai_model import train_risk_model
+
+    cfg = SCALES[scale]
+    X, y = _history_xy(cfg['history'])
+    torch.manual_seed(SEED)
+    t0 = time.perf_counter()
+    train_risk_model(X, y, X.shape[1], epochs=cfg['epochs'])
+    elapsed = time.perf_counter() - t0
+    return {
+        'wall_time': elapsed,
+        'rows': len(X),
+        'epochs': cfg['epochs'],
+        'rows_per_s': len(X) * cfg['epochs'] / elapsed,
+    }
+
+def bench_train_fast(scale):
+    """train_risk_model_fast (mặc định của load_or_train): batch lớn, dừng sớm theo tập validation."""
+    from src.ai_model import train_risk_model_fast
+
+    cfg = SCALES[scale]
+    X, y = _history_xy(cfg['history'])
+    report = {}
+    t0 = time.perf_counter()
+    train_risk_model_fast(X, y, X.shape[1], seed=SEED, report=report)
+    elapsed = time.perf_counter() - t0
+    return {
+        'wall_time': elapsed,
+        'rows': len(X),
+        'epochs': report['epochs_run'],
+        'rows_per_s': report['samples_per_sec'],
+        'best_val_loss': report['best_val_loss'],
+    }
+
+def bench_train_stream(scale):
+    """Train theo khối từ thư mục part-*.npy (data_source) - peak RSS không tăng theo số dòng lịch sử."""
+    from data.data_generator import write_synthetic_data
+    from src.ai_model import train_risk_model_stream
+    from src.data_source import FileSource
+
+    cfg = SCALES[scale]
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_data(tmp, 'npy', n_courses=100, n_sections=0, n_students=0, n_history=cfg['history'],
+                             chunk_rows=max(cfg['history'] // 4, 1), seed=SEED)
+        report = {}
+        t0 = time.perf_counter()
+        train_risk_model_stream(FileSource(os.path.join(tmp, 'history')), 3, epochs=cfg['epochs'], seed=SEED,
+                                report=report)
+        elapsed = time.perf_counter() - t0
+    return {
+        'wall_time': elapsed,
+        'rows': report['rows'],
+        'epochs': report['epochs_run'],
+        'rows_per_s': report['samples_per_sec'],
+    }
+
+def bench_infer(scale, repeats=20):
+    import torch
+    from src.ai_model import RiskPredictor, infer_risk
+
+    torch.manual_seed(SEED)
+    model = RiskPredictor(3)
+    rng = np.random.default_rng(SEED)
+    result = {'wall_time': 0.0}
+    for batch in SCALES[scale]['batches']:
+        X = np.column_stack([rng.uniform(0, 4, batch), rng.uniform(0, 1, batch),
+                             rng.integers(1, 6, batch)]).astype(np.float32)
+        infer_risk(model, X)  # khởi động
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            infer_risk(model, X)
+            times.append(time.perf_counter() - t0)
+        times.sort()
+        result[f'batch_{batch}'] = {
+            'p50_ms': statistics.median(times) * 1000,
+            'p95_ms': times[int(0.95 * (len(times) - 1))] * 1000,
+            'rows_per_s': batch / statistics.median(times),
+        }
+        result['wall_time'] += sum(times)
+    return result
+
+def bench_main():
+    """
+    Toàn bộ main.py trong process con (gồm nạp/train mô hình và giải).
+    Peak RSS lấy từ os.wait4 của đúng process đó: RUSAGE_CHILDREN là max của
+    mọi process con đã kết thúc (kể cả worker của các case trước).
+    """
+    with tempfile.TemporaryFile() as output:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, 'main.py'], cwd=ROOT, stdout=output, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - t0
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            output.seek(0)
+            raise RuntimeError(f"main.py lỗi (exit {proc.returncode}):\n{output.read().decode(errors='replace')}")
+    return {
+        'wall_time': elapsed,
+        # Linux: ru_maxrss tính bằng KB
+        'peak_rss_mb': usage.ru_maxrss / 1024,
+    }
+
+BENCHMARKS = {'solve': bench_solve, 'rolling': bench_rolling, 'train': bench_train, 'train_fast': bench_train_fast,
+              'train_stream': bench_train_stream, 'infer': bench_infer}
+
+def _run_case(name, scale):
+    fn = BENCHMARKS[name]
+    rss_before = _peak_rss_mb()
+    result = fn(scale)
+    result['peak_rss_mb'] = _peak_rss_mb()
+    result['rss_delta_mb'] = result['peak_rss_mb'] - rss_before
+    return result
+
+def run_case(name, scale=None):
+    if name == 'main':
+        return bench_main()
+    # spawn: process mới hoàn toàn, không kế thừa bộ nhớ của process cha
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_run_case, name, scale).result()
+
+def _flatten(result, prefix=''):
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+def compare(results, baseline, tolerance=0.25, min_abs=0.05):
+    """
+    So kết quả với baseline: chỉ số (trong COMPARED) tăng quá tolerance (tỉ lệ)
+    => regression. Bỏ qua các giá trị quá nhỏ (< min_abs) vì chủ yếu là nhiễu
+    (vd. thời gian dưới 50 ms của case nhỏ).
+    Trả về list dict {case, metric, baseline, current, ratio}.
+    """
+    regressions = []
+    for case, result in results['cases'].items():
+        if case not in baseline.get('cases', {}):
+            continue
+        current, base = _flatten(result), _flatten(baseline['cases'][case])
+        for key, value in current.items():
+            if key.rsplit('.', 1)[-1] not in COMPARED or key not in base:
+                continue
+            if not isinstance(value, (int, float)) or not base[key] or max(value, base[key]) < min_abs:
+                continue
+            ratio = value / base[key]
+            if ratio > 1 + tolerance:
+                regressions.append({'case': case, 'metric': key, 'baseline': base[key],
+                                    'current': value, 'ratio': ratio})
+    return regressions
+
+def run(scales, benchmarks, with_main=True):
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'cases': {},
+    }
+    cases = [(name, scale) for scale in scales for name in benchmarks]
+    if with_main:
+        cases.append(('main', None))
+    for name, scale in cases:
+        case = name if scale is None else f"{name}/{scale}"
+        result = run_case(name, scale)
+        results['cases'][case] = result
+        extra = f" | model {result['model_bytes'] / 1024:.0f} KB ({result['status']})" if 'model_bytes' in result else ''
+        if result.get('gap') is not None:
+            extra = f" | gap {result['gap']:.1%} vs nguyên khối, x{result['speedup']:.1f} ({result['status']})"
+        print(f"  {case:<20} {result['wall_time']:8.3f}s | peak RSS {result['peak_rss_mb']:7.1f} MB{extra}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dựng model / giải / train / infer theo quy mô")
+    parser.add_argument('--scales', nargs='+', default=list(SCALES), choices=list(SCALES))
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument('--no-main', action='store_true', help="Bỏ qua đo toàn bộ main.py")
+    parser.add_argument('--out', default=DEFAULT_OUT)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Ghi kết quả lần này làm baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Tăng quá tỉ lệ này so với baseline => regression")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    results = run(args.scales, args.benchmarks, with_main=not args.no_main)
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Kết quả -> {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Đã lưu baseline -> {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"Chưa có baseline ({args.baseline}) - chạy với --save-baseline để tạo.")
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for r in regressions:
+        print(f"  REGRESSION {r['case']:<20} {r['metric']:<24} {r['baseline']:.4g} -> {r['current']:.4g} (x{r['ratio']:.2f})")
+    if regressions:
+        sys.exit(1)
+    print("Không có regression so với baseline.")
+
+if __name__ == "__main__":
+    main()
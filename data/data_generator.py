@@ -1,8 +1,20 @@
+import argparse
+import os
+import random
+import time
+
 import pandas as pd
 import numpy as np
-import random
 
-def generate_dummy_data():
+from src.tracing import traced
+
+@traced('data.generate')
+def generate_dummy_data(seed=None):
+    # seed cố định => dữ liệu lặp lại được (để dùng lại mô hình đã lưu)
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
     # 1. Danh sách môn học
     courses = pd.DataFrame([
         {'id': 'MATH1', 'credits': 3, 'difficulty': 0.8},
@@ -67,4 +79,187 @@ def generate_dummy_data():
 
     sections_df = pd.DataFrame(sections_data)
     
-    return courses, prereqs, history_df, sections_df
\ No newline at end of file
+    return courses, prereqs, history_df, sections_df
+
+# ---------------------------------------------------------------------------
+# Dữ liệu giả lập quy mô lớn (load test): sinh theo vector NumPy, seed cố định
+# => lặp lại được; bảng lớn (sections, history) sinh và ghi theo từng khối.
+# ---------------------------------------------------------------------------
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+SLOT_STARTS = [1, 4, 7, 10]
+CHUNK_ROWS = 1_000_000
+
+# Khóa phụ của seed cho từng bảng: đổi kích thước bảng này không làm đổi bảng khác
+_COURSES, _PREREQS, _SECTIONS, _STUDENTS, _HISTORY = range(5)
+
+def _rng(seed, *key):
+    return np.random.default_rng(None if seed is None else [seed, *key])
+
+def _ids(prefix, start, stop, width):
+    if stop <= start:
+        return np.empty(0, dtype=str)
+    return np.char.add(prefix, np.char.zfill(np.arange(start, stop).astype(str), width))
+
+def _chunks(n, chunk_rows):
+    # n = 0 vẫn trả về một khối rỗng để bảng có đủ cột
+    for k, start in enumerate(range(0, max(n, 1), chunk_rows)):
+        yield k, start, min(start + chunk_rows, n)
+
+def synthetic_courses(n_courses, seed=None):
+    rng = _rng(seed, _COURSES)
+    return pd.DataFrame({
+        'id': _ids('C', 0, n_courses, len(str(n_courses - 1))),
+        'credits': rng.integers(2, 6, n_courses),
+        'difficulty': rng.uniform(0.3, 0.95, n_courses).round(2),
+    })
+
+def synthetic_prereqs(courses, density=1.0, seed=None):
+    """
+    DAG tiên quyết: môn thứ j có trung bình `density` môn tiên quyết, chọn
+    trong các môn đứng trước nó => không bao giờ có vòng.
+    """
+    rng = _rng(seed, _PREREQS)
+    n = len(courses)
+    j = np.arange(n)
+    k = np.minimum(rng.poisson(density, n), j)
+    course = np.repeat(j, k)
+    prereq = (rng.random(len(course)) * course).astype(np.int64)
+    pairs = np.unique(np.column_stack([course, prereq]), axis=0)
+    ids = courses['id'].to_numpy()
+    return pd.DataFrame({'course': ids[pairs[:, 0]], 'prereq': ids[pairs[:, 1]]})
+
+def iter_sections(courses, n_sections, n_terms=3, days=DAYS, slot_starts=SLOT_STARTS,
+                  chunk_rows=CHUNK_ROWS, seed=None):
+    """Lớp học phần theo từng khối chunk_rows dòng (DataFrame); tiết kết thúc = bắt đầu + tín chỉ - 1 như dữ liệu mẫu."""
+    ids, credits = courses['id'].to_numpy(), courses['credits'].to_numpy()
+    days, slot_starts = np.asarray(days), np.asarray(slot_starts)
+    width = len(str(max(n_sections, 1)))
+    for k, start, stop in _chunks(n_sections, chunk_rows):
+        rng = _rng(seed, _SECTIONS, k)
+        n = stop - start
+        c = rng.integers(0, len(ids), n)
+        slot = slot_starts[rng.integers(0, len(slot_starts), n)]
+        yield pd.DataFrame({
+            'id': _ids('SEC_', start + 1, stop + 1, width),
+            'course_id': ids[c],
+            'term': rng.integers(1, n_terms + 1, n),
+            'day': days[rng.integers(0, len(days), n)],
+            'start': slot,
+            'end': slot + credits[c] - 1,
+            'credits': credits[c],
+        })
+
+def synthetic_students(n_students, seed=None):
+    """Bảng sinh viên cho batch_main: student_id, gpa."""
+    rng = _rng(seed, _STUDENTS)
+    return pd.DataFrame({
+        'student_id': _ids('SV', 0, n_students, len(str(max(n_students - 1, 0)))),
+        'gpa': rng.uniform(1.5, 4.0, n_students).round(2),
+    })
+
+def iter_history(courses, n_history, chunk_rows=CHUNK_ROWS, seed=None):
+    """Lịch sử học tập theo từng khối, cùng quy luật với generate_dummy_data."""
+    difficulty, credits = courses['difficulty'].to_numpy(), courses['credits'].to_numpy()
+    for k, start, stop in _chunks(n_history, chunk_rows):
+        rng = _rng(seed, _HISTORY, k)
+        n = stop - start
+        c = rng.integers(0, len(courses), n)
+        gpa = rng.uniform(1.5, 4.0, n)
+        # GPA cao + Môn dễ = Tỉ lệ qua cao
+        pass_prob = (gpa / 4.0) * 0.7 + (1 - difficulty[c]) * 0.3
+        yield pd.DataFrame({
+            'student_gpa_avg': gpa,
+            'course_difficulty': difficulty[c],
+            'course_credits': credits[c],
+            'passed': (rng.random(n) < pass_prob).astype(np.int64),
+        })
+
+@traced('data.generate_synthetic')
+def generate_synthetic_data(n_courses=200, n_sections=2000, n_terms=3, n_students=100, n_history=10000,
+                            prereq_density=1.0, days=DAYS, slot_starts=SLOT_STARTS,
+                            chunk_rows=CHUNK_ROWS, seed=None):
+    """
+    Như generate_dummy_data nhưng kích thước tùy chỉnh, thêm bảng sinh viên.
+    Trả về (courses, prereqs, history_df, sections_df, students). Cùng seed và
+    chunk_rows => cùng dữ liệu với write_synthetic_data.
+    """
+    courses = synthetic_courses(n_courses, seed)
+    prereqs = synthetic_prereqs(courses, prereq_density, seed)
+    sections_df = pd.concat(list(iter_sections(courses, n_sections, n_terms, days, slot_starts, chunk_rows, seed)),
+                            ignore_index=True)
+    history_df = pd.concat(list(iter_history(courses, n_history, chunk_rows, seed)), ignore_index=True)
+    return courses, prereqs, history_df, sections_df, synthetic_students(n_students, seed)
+
+FORMATS = {'parquet': '.parquet', 'npy': '.npy'}
+
+def _write(df, path, fmt):
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+        return
+    # .npy: mảng có cấu trúc, cột chuỗi thành unicode độ dài cố định => đọc lại được bằng mmap, không cần pickle
+    str_cols = {c: f"U{max(int(df[c].str.len().max()) if len(df) else 0, 1)}"
+                for c in df.columns if df[c].dtype.kind not in 'biuf'}
+    np.save(path, df.to_records(index=False, column_dtypes=str_cols))
+
+def write_synthetic_data(out_dir, fmt='parquet', n_courses=200, n_sections=2000, n_terms=3, n_students=100,
+                         n_history=10000, prereq_density=1.0, days=DAYS, slot_starts=SLOT_STARTS,
+                         chunk_rows=CHUNK_ROWS, seed=None):
+    """
+    Ghi dữ liệu giả lập ra out_dir: courses/prereqs/students mỗi bảng một file,
+    sections/ và history/ là thư mục các khối part-00000, part-00001, ...
+    (mỗi khối chunk_rows dòng, chỉ một khối nằm trong bộ nhớ tại một thời điểm).
+    Trả về dict {tên bảng: số dòng}.
+    """
+    ext = FORMATS[fmt]
+    os.makedirs(out_dir, exist_ok=True)
+    courses = synthetic_courses(n_courses, seed)
+    small = {
+        'courses': courses,
+        'prereqs': synthetic_prereqs(courses, prereq_density, seed),
+        'students': synthetic_students(n_students, seed),
+    }
+    counts = {}
+    for name, df in small.items():
+        _write(df, os.path.join(out_dir, name + ext), fmt)
+        counts[name] = len(df)
+    chunked = {
+        'sections': iter_sections(courses, n_sections, n_terms, days, slot_starts, chunk_rows, seed),
+        'history': iter_history(courses, n_history, chunk_rows, seed),
+    }
+    for name, chunks in chunked.items():
+        os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+        counts[name] = 0
+        for k, df in enumerate(chunks):
+            _write(df, os.path.join(out_dir, name, f"part-{k:05d}{ext}"), fmt)
+            counts[name] += len(df)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu giả lập quy mô lớn cho load test")
+    parser.add_argument('--out', required=True, help="Thư mục kết quả")
+    parser.add_argument('--format', default='parquet', choices=list(FORMATS))
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--sections', type=int, default=2000)
+    parser.add_argument('--terms', type=int, default=3)
+    parser.add_argument('--students', type=int, default=100)
+    parser.add_argument('--history', type=int, default=10000)
+    parser.add_argument('--prereq-density', type=float, default=1.0, help="Số môn tiên quyết trung bình mỗi môn")
+    parser.add_argument('--days', nargs='+', default=DAYS)
+    parser.add_argument('--slot-starts', type=int, nargs='+', default=SLOT_STARTS)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    counts = write_synthetic_data(
+        args.out, args.format, n_courses=args.courses, n_sections=args.sections, n_terms=args.terms,
+        n_students=args.students, n_history=args.history, prereq_density=args.prereq_density,
+        days=args.days, slot_starts=args.slot_starts, chunk_rows=args.chunk_rows, seed=args.seed,
+    )
+    print(f"Đã ghi {sum(counts.values())} dòng trong {time.perf_counter() - t0:.2f}s -> {args.out}")
+    for name, n in counts.items():
+        print(f"  {name:<10} {n}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+async def _request(reader, writer, host, path, payload):
+    body = json.dumps(payload).encode()
+    writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length, close = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+        elif name.strip().lower() == 'connection' and value.strip().lower() == 'close':
+            close = True
+    data = await reader.readexactly(length)
+    return status, json.loads(data) if data else None, close
+
+async def _worker(host, port, jobs, results):
+    reader = writer = None
+    while True:
+        try:
+            payload = jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if writer is None:
+            reader, writer = await asyncio.open_connection(host, port)
+        t0 = time.perf_counter()
+        try:
+            status, body, close = await _request(reader, writer, host, '/plan', payload)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            status, body, close = 'conn_error', None, True
+        results.append((status, time.perf_counter() - t0, (body or {}).get('source')))
+        if close:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+async def run_load(host, port, requests, concurrency, distinct, deadline=None, seed=0):
+    """
+    Gửi `requests` request /plan qua `concurrency` kết nối song song.
+    distinct: số đầu vào khác nhau (GPA) - nhỏ => nhiều request trùng để thử gộp / cache.
+    """
+    rng = random.Random(seed)
+    gpas = [round(rng.uniform(1.5, 4.0), 2) for _ in range(distinct)]
+    jobs = asyncio.Queue()
+    for i in range(requests):
+        payload = {'student_id': f"SV{i}", 'gpa': rng.choice(gpas)}
+        if deadline is not None:
+            payload['deadline'] = deadline
+        jobs.put_nowait(payload)
+    results = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, jobs, results) for _ in range(concurrency)))
+    return results, time.perf_counter() - t0
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Client tải cục bộ cho src.service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--distinct', type=int, default=20, help="Số đầu vào khác nhau")
+    parser.add_argument('--deadline', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results, elapsed = asyncio.run(run_load(args.host, args.port, args.requests, args.concurrency,
+                                            args.distinct, args.deadline, args.seed))
+    latencies = sorted(t for _, t, _ in results)
+    codes, sources = {}, {}
+    for status, _, source in results:
+        codes[status] = codes.get(status, 0) + 1
+        if source:
+            sources[source] = sources.get(source, 0) + 1
+    print(f"{len(results)} request trong {elapsed:.2f}s => {len(results) / elapsed:.1f} req/s")
+    print(f"  Độ trễ: p50 {statistics.median(latencies) * 1000:.1f} ms | p95 {_percentile(latencies, 0.95) * 1000:.1f} ms"
+          f" | p99 {_percentile(latencies, 0.99) * 1000:.1f} ms | max {latencies[-1] * 1000:.1f} ms")
+    print(f"  Mã trả về: {codes}")
+    print(f"  Nguồn kết quả: {sources}")
+
+if __name__ == "__main__":
+    main()
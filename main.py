@@ -1,41 +1,49 @@
-import numpy as np
+import argparse
+import sys
+from contextlib import nullcontext
+
 from data.data_generator import generate_dummy_data
-from src.ai_model import train_risk_model, infer_risk
-from src.optimizer import schedule_multi_term, Section
+from src.model_store import load_or_train, DEFAULT_PATH
+from src.scoring import RiskScorer
+from src.optimizer import schedule_multi_term, SolverProfile
+from src.section_table import SectionTable
+from src.data_source import ArraySource, open_history
+from src import tracing
 
-def main():
+DATA_SEED = 42
+
+def plan(history=None):
     print("=== HỆ THỐNG TỐI ƯU HỌC TẬP & TỐT NGHIỆP SỚM ===")
     
     # 1. LOAD DATA
     print("[1/4] Đang khởi tạo dữ liệu giả lập...")
-    courses_df, prereq_df, history_df, sections_df = generate_dummy_data()
+    courses_df, prereq_df, history_df, sections_df = generate_dummy_data(seed=DATA_SEED)
     
-    # 2. TRAIN AI
-    print("[2/4] Đang huấn luyện mô hình dự đoán rủi ro (MLP)...")
-    X = history_df[['student_gpa_avg', 'course_difficulty', 'course_credits']].values.astype('float32')
-    y = history_df[['passed']].values.astype('float32')
-    model = train_risk_model(X, y, in_dim=3)
+    # 2. TRAIN AI (dùng lại mô hình đã lưu nếu dữ liệu không đổi)
+    print("[2/4] Đang nạp / huấn luyện mô hình dự đoán rủi ro (MLP)...")
+    # Lịch sử từ file (CSV/Parquet/NPY, thư mục khối) được đọc và train theo từng khối
+    source = open_history(history) if history else ArraySource.from_frame(history_df)
+    report = {}
+    model = load_or_train(source, path=DEFAULT_PATH, report=report)
+    if report['source'] == 'artifact':
+        print(f"      Nạp mô hình {report['version']} trong {report['load_time'] * 1000:.1f} ms "
+              f"(train lần đầu mất {report['train_time']:.2f}s)")
+    else:
+        print(f"      Đã train mô hình {report['version']} trong {report['train_time']:.2f}s -> {DEFAULT_PATH}")
     
     # 3. NHẬP THÔNG TIN SINH VIÊN HIỆN TẠI
     current_gpa = 2.8 # Sinh viên khá
     print(f"[3/4] Đang lập kế hoạch cho sinh viên có GPA: {current_gpa}")
     
-    # Dự đoán rủi ro cho từng môn
-    course_risks = {}
-    for _, c in courses_df.iterrows():
-        # Input: [GPA, Difficulty, Credits]
-        inp = np.array([[current_gpa, c['difficulty'], c['credits']]], dtype='float32')
-        fail_prob = 1.0 - infer_risk(model, inp)[0]
-        course_risks[c['id']] = fail_prob
+    # Dự đoán rủi ro cho mọi môn trong một lần forward - Input: [GPA, Difficulty, Credits]
+    scorer = RiskScorer(model)
+    course_risks = scorer.risk_dict(current_gpa, courses_df)
     
     # 4. CHẠY TỐI ƯU HÓA (CP-SAT)
     print("[4/4] Đang chạy thuật toán tối ưu xếp lịch...")
     
-    # Chuẩn bị dữ liệu cho Solver
-    sections = [
-        Section(r['id'], r['course_id'], r['term'], r['day'], r['start'], r['end'], r['credits'])
-        for _, r in sections_df.iterrows()
-    ]
+    # Chuẩn bị dữ liệu cho Solver: bảng cột, không tạo Section cho từng dòng
+    sections = SectionTable.from_dataframe(sections_df)
     
     prereqs = {}
     for _, r in prereq_df.iterrows():
@@ -46,16 +54,17 @@ def main():
     credit_bounds = {
         1: (8, 30),  # Giảm xuống 8 để dễ tìm lịch hơn
         2: (8, 30),
-        3: (5, 30)
+        3: (4, 30)   # Kỳ 3 chỉ còn DSA (4 tín) sau chuỗi tiên quyết MATH/PROG
     }
     
     chosen, status = schedule_multi_term(
-        sections, prereqs, target_terms, credit_bounds, course_risks, risk_weight=10.0
+        sections, prereqs, target_terms, credit_bounds, course_risks, risk_weight=10.0,
+        profile=SolverProfile(max_time=10.0, seed=0)
     )
     
     # 5. IN KẾT QUẢ
     if chosen:
-        print("\n✅ LỘ TRÌNH TỐI ƯU ĐƯỢC ĐỀ XUẤT:")
+        print(f"\n✅ LỘ TRÌNH TỐI ƯU ĐƯỢC ĐỀ XUẤT ({status}):")
         chosen.sort(key=lambda x: (x.term, x.day, x.start))
         
         current_t = 0
@@ -76,5 +85,37 @@ def main():
     else:
         print("❌ Không tìm thấy lịch. Hãy giảm bớt ràng buộc tín chỉ.")
 
+def main():
+    parser = argparse.ArgumentParser(description="Lập kế hoạch học tập cho một sinh viên")
+    parser.add_argument('--trace-log', help="Ghi mỗi stage (span) một dòng JSON ra file ('-' = stdout)")
+    parser.add_argument('--metrics', help="Ghi số liệu các stage dạng Prometheus text ra file")
+    parser.add_argument('--profile', help="Chạy cProfile cho lần lập kế hoạch, ghi file .prof")
+    parser.add_argument('--history', help="Lịch sử học tập để train (CSV/Parquet/NPY, thư mục khối hoặc "
+                                          "prefix file đặc trưng .X.npy/.y.npy) - đọc theo khối")
+    args = parser.parse_args()
+
+    tracer = None
+    if args.trace_log or args.metrics:
+        log = None
+        if args.trace_log:
+            log = sys.stdout if args.trace_log == '-' else open(args.trace_log, 'a')
+        tracer = tracing.enable(tracing.Tracer(log=log))
+
+    with tracing.profiled(args.profile) if args.profile else nullcontext():
+        plan(args.history)
+
+    if tracer is None:
+        return
+    tracing.disable()
+    print("\nThời gian theo stage:")
+    for name, s in tracer.summary().items():
+        print(f"  {name:<22} {s['count']:>3} lần | {s['total'] * 1000:9.1f} ms")
+    if args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(tracer.prometheus())
+        print(f"Số liệu Prometheus -> {args.metrics}")
+    if tracer.log is not None and tracer.log is not sys.stdout:
+        tracer.log.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
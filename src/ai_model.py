@@ -1,8 +1,14 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import torch
 import torch.nn as nn
 from torch.utils.data import TensorDataset, DataLoader
 import numpy as np
 
+from src.tracing import traced
+
 class RiskPredictor(nn.Module):
     def __init__(self, in_dim: int, hidden: int = 64):
         super().__init__()
@@ -11,12 +17,21 @@ class RiskPredictor(nn.Module):
             nn.Linear(hidden, hidden//2), nn.ReLU(),
             nn.Linear(hidden//2, 1), nn.Sigmoid()
         )
-    
+        # Chuẩn hóa đầu vào (mặc định: giữ nguyên), lưu cùng trọng số trong state_dict
+        self.register_buffer('x_mean', torch.zeros(in_dim))
+        self.register_buffer('x_std', torch.ones(in_dim))
+
+    def set_normalization(self, mean, std):
+        self.x_mean.copy_(torch.as_tensor(mean, dtype=torch.float32))
+        self.x_std.copy_(torch.as_tensor(std, dtype=torch.float32).clamp_min(1e-6))
+
     def forward(self, x):
-        return self.net(x)
+        return self.net((x - self.x_mean) / self.x_std)
 
+@traced('model.train')
 def train_risk_model(X, y, in_dim, epochs=50):
     model = RiskPredictor(in_dim)
+    model.set_normalization(X.mean(axis=0), X.std(axis=0))
     ds = TensorDataset(torch.from_numpy(X), torch.from_numpy(y))
     loader = DataLoader(ds, batch_size=32, shuffle=True)
     opt = torch.optim.Adam(model.parameters(), lr=0.01)
@@ -30,6 +45,167 @@ def train_risk_model(X, y, in_dim, epochs=50):
             opt.zero_grad(); loss.backward(); opt.step()
     return model
 
+@traced('model.train_fast')
+def train_risk_model_fast(X, y, in_dim, epochs=50, batch_size=4096, lr=0.01, val_fraction=0.1,
+                          patience=5, min_delta=1e-4, num_threads=None, seed=None, report=None):
+    """
+    Bản train cho dữ liệu lớn (hàng triệu dòng): trộn bằng randperm và cắt tensor
+    trực tiếp thay cho DataLoader, batch lớn, dừng sớm theo loss trên tập validation
+    (giữ lại trọng số tốt nhất).
+    report: dict (tùy chọn) nhận 'samples_per_sec', 'epoch_times', 'epochs_run',
+    'best_epoch', 'best_val_loss'.
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    gen = torch.Generator()
+    if seed is not None:
+        gen.manual_seed(seed)
+        torch.manual_seed(seed)
+
+    Xt = torch.as_tensor(np.ascontiguousarray(X, dtype=np.float32))
+    yt = torch.as_tensor(np.ascontiguousarray(y, dtype=np.float32)).reshape(-1, 1)
+    perm = torch.randperm(len(Xt), generator=gen)
+    n_val = int(len(Xt) * val_fraction) if len(Xt) > 1 else 0
+    X_val, y_val = Xt[perm[:n_val]], yt[perm[:n_val]]
+    X_tr, y_tr = Xt[perm[n_val:]], yt[perm[n_val:]]
+
+    model = RiskPredictor(in_dim)
+    model.set_normalization(X_tr.mean(dim=0), X_tr.std(dim=0))
+    opt = torch.optim.Adam(model.parameters(), lr=lr)
+    loss_fn = nn.BCELoss()
+
+    best_loss, best_state, best_epoch, bad_epochs = float('inf'), None, 0, 0
+    epoch_times = []
+    for epoch in range(epochs):
+        t0 = time.perf_counter()
+        model.train()
+        order = torch.randperm(len(X_tr), generator=gen)
+        for i in range(0, len(X_tr), batch_size):
+            idx = order[i:i + batch_size]
+            loss = loss_fn(model(X_tr[idx]), y_tr[idx])
+            opt.zero_grad(); loss.backward(); opt.step()
+
+        # Dừng sớm: không có tập validation thì dùng loss batch cuối
+        if n_val:
+            model.eval()
+            with torch.inference_mode():
+                val_loss = loss_fn(model(X_val), y_val).item()
+        else:
+            val_loss = loss.item()
+        epoch_times.append(time.perf_counter() - t0)
+
+        if val_loss < best_loss - min_delta:
+            best_loss, best_epoch, bad_epochs = val_loss, epoch, 0
+            best_state = copy.deepcopy(model.state_dict())
+        else:
+            bad_epochs += 1
+            if bad_epochs >= patience:
+                break
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    model.eval()
+    if report is not None:
+        total = sum(epoch_times)
+        report.update({
+            'epochs_run': len(epoch_times),
+            'best_epoch': best_epoch,
+            'best_val_loss': best_loss,
+            'epoch_times': epoch_times,
+            'mean_epoch_time': total / len(epoch_times) if epoch_times else 0.0,
+            'samples_per_sec': len(X_tr) * len(epoch_times) / total if total > 0 else 0.0,
+        })
+    return model
+
+@traced('model.train_stream')
+def train_risk_model_stream(source, in_dim, epochs=5, batch_size=4096, lr=0.01, val_source=None, patience=3,
+                            min_delta=1e-4, num_threads=None, seed=None, report=None):
+    """
+    Train từ data_source.HistorySource theo từng khối: mỗi khối được xáo và
+    cắt thành batch rồi đưa ngay vào optimizer, không bao giờ gom toàn bộ lịch
+    sử vào bộ nhớ (bộ nhớ đỉnh ~ một khối). Chuẩn hóa đầu vào lấy từ một lượt
+    đọc trước (source.moments()).
+    Dừng sớm theo loss trên val_source (cũng đọc theo khối), không có thì theo
+    loss train trung bình của epoch.
+    report: dict (tùy chọn) nhận 'rows', 'epochs_run', 'best_epoch',
+    'best_val_loss', 'epoch_times', 'samples_per_sec'.
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    gen = torch.Generator()
+    if seed is not None:
+        gen.manual_seed(seed)
+        torch.manual_seed(seed)
+
+    n_rows, mean, std = source.moments()
+    model = RiskPredictor(in_dim)
+    model.set_normalization(mean, std)
+    opt = torch.optim.Adam(model.parameters(), lr=lr)
+    loss_fn = nn.BCELoss()
+
+    best_loss, best_state, best_epoch, bad_epochs = float('inf'), None, 0, 0
+    epoch_times = []
+    for epoch in range(epochs):
+        t0 = time.perf_counter()
+        model.train()
+        train_loss, seen = 0.0, 0
+        chunk_seed = int(torch.randint(0, 2**31 - 1, (1,), generator=gen))
+        for X, y in source.chunks(shuffle_seed=chunk_seed):
+            Xt, yt = torch.from_numpy(X), torch.from_numpy(y)
+            order = torch.randperm(len(Xt), generator=gen)
+            for i in range(0, len(Xt), batch_size):
+                idx = order[i:i + batch_size]
+                loss = loss_fn(model(Xt[idx]), yt[idx])
+                opt.zero_grad(); loss.backward(); opt.step()
+                train_loss += loss.item() * len(idx)
+                seen += len(idx)
+
+        if val_source is not None:
+            model.eval()
+            val_loss, n_val = 0.0, 0
+            with torch.inference_mode():
+                for X, y in val_source.chunks():
+                    val_loss += loss_fn(model(torch.from_numpy(X)), torch.from_numpy(y)).item() * len(X)
+                    n_val += len(X)
+            val_loss /= max(n_val, 1)
+        else:
+            val_loss = train_loss / max(seen, 1)
+        epoch_times.append(time.perf_counter() - t0)
+
+        if val_loss < best_loss - min_delta:
+            best_loss, best_epoch, bad_epochs = val_loss, epoch, 0
+            best_state = copy.deepcopy(model.state_dict())
+        else:
+            bad_epochs += 1
+            if bad_epochs >= patience:
+                break
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    model.eval()
+    if report is not None:
+        total = sum(epoch_times)
+        report.update({
+            'rows': n_rows,
+            'epochs_run': len(epoch_times),
+            'best_epoch': best_epoch,
+            'best_val_loss': best_loss,
+            'epoch_times': epoch_times,
+            'samples_per_sec': n_rows * len(epoch_times) / total if total > 0 else 0.0,
+        })
+    return model
+
+def train_in_background(X, y, in_dim, trainer=train_risk_model_fast, **kwargs):
+    """
+    Train trong thread nền để giao diện không bị chặn. Trả về Future:
+    future.done() để kiểm tra, future.result() lấy mô hình.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='risk-train')
+    future = executor.submit(trainer, X, y, in_dim, **kwargs)
+    executor.shutdown(wait=False)
+    return future
+
+@traced('model.infer')
 def infer_risk(model, X):
     model.eval()
     with torch.no_grad():
@@ -0,0 +1,141 @@
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from src.optimizer import SectionCatalog, SolverProfile, schedule_multi_term
+from src.plan_cache import plan_key
+from src.prereq_index import PrereqIndex
+
+# Trạng thái dùng chung trong mỗi process con (nạp 1 lần qua initializer)
+_WORKER = {}
+
+def _init_worker(catalog, prereqs, target_terms, risk_weight, profile):
+    _WORKER['catalog'] = catalog
+    _WORKER['profile'] = profile
+    _WORKER['prereqs'] = prereqs
+    _WORKER['target_terms'] = target_terms
+    _WORKER['risk_weight'] = risk_weight
+
+def _solve_student(student):
+    """
+    Giải cho 1 sinh viên trên catalog dùng chung. Chỉ trả về id các lớp được
+    chọn để giảm chi phí pickle giữa các process.
+    student['deadline_at'] (tùy chọn, time.time()): hết hạn khi còn chờ trong
+    hàng đợi => bỏ qua; còn lại => giới hạn thời gian giải theo phần còn lại.
+    """
+    profile = _WORKER['profile']
+    deadline_at = student.get('deadline_at')
+    if deadline_at is not None:
+        remaining = deadline_at - time.time()
+        if remaining <= 0:
+            return student['student_id'], [], 'DEADLINE_EXCEEDED'
+        if profile.max_time is None or profile.max_time > remaining:
+            profile = copy.copy(profile)
+            profile.max_time = remaining
+    chosen, status = schedule_multi_term(
+        _WORKER['catalog'], _WORKER['prereqs'], _WORKER['target_terms'],
+        student['credit_bounds'], student.get('risk_dict'),
+        risk_weight=_WORKER['risk_weight'], completed=student.get('completed'), profile=profile,
+    )
+    return student['student_id'], [s.id for s in chosen], status
+
+def schedule_batch(students, sections, prereqs, target_terms, risk_weight=5.0, max_workers=None,
+                   max_pending=None, profile=None, cache=None, model_version=None, stats=None):
+    """
+    Xếp lịch cho nhiều sinh viên trên CÙNG một catalog lớp học phần.
+
+    students: iterable các dict {'student_id', 'credit_bounds', 'risk_dict', 'completed'}.
+    sections: list Section hoặc SectionCatalog - index theo môn, theo (kỳ, thứ)
+    và clique trùng giờ chỉ dựng một lần rồi gửi cho mỗi worker (PrereqIndex cũng vậy).
+    max_workers: số process (0 => giải tuần tự trong process hiện tại).
+    max_pending: số bài đang chờ tối đa, giới hạn bộ nhớ khi danh sách rất dài.
+    profile: SolverProfile cho từng bài; mặc định 1 luồng CP-SAT mỗi process để
+    không tranh CPU giữa các worker.
+    cache: PlanCache (tùy chọn) - sinh viên có cùng đầu vào (sau khi lượng tử hóa
+    rủi ro) lấy kết quả từ cache, không gửi cho worker; model_version là phiên
+    bản mô hình rủi ro, đổi thì cache cũ bị bỏ.
+    Sinh viên trùng plan_key với một bài đang giải (kể cả khi không có cache)
+    không được gửi lại mà nhận chung kết quả của bài đó.
+    stats: dict (tùy chọn) nhận 'solves', 'cache_hits', 'coalesced'.
+
+    Là generator: trả về (student_id, chosen_sections, status) ngay khi từng
+    bài giải xong (không theo thứ tự đầu vào).
+    """
+    catalog = sections if isinstance(sections, SectionCatalog) else SectionCatalog(sections)
+    if profile is None:
+        profile = SolverProfile(num_workers=1)
+    prereqs = PrereqIndex.of(prereqs)
+    init_args = (catalog, prereqs, list(target_terms), risk_weight, profile)
+    counts = stats if stats is not None else {}
+    counts.update({'solves': 0, 'cache_hits': 0, 'coalesced': 0})
+
+    catalog_fp = catalog.table.fingerprint()
+    if cache is not None:
+        cache.bind(catalog_fp, model_version)
+
+    def key_of(student):
+        return plan_key(catalog_fp, prereqs, target_terms, student['credit_bounds'], student.get('risk_dict'),
+                        risk_weight, student.get('completed'), model_version, course_ids=catalog.code_of)
+
+    def finish(key, result):
+        sid, ids, status = result
+        if cache is not None:
+            cache.put(key, ids, status)
+        return sid, [catalog.section_by_id(i) for i in ids], status
+
+    def lookup(key, student):
+        hit = cache.get(key) if cache is not None else None
+        if hit is None:
+            return None
+        counts['cache_hits'] += 1
+        ids, status = hit
+        return student['student_id'], [catalog.section_by_id(i) for i in ids], status
+
+    if max_workers == 0:
+        _init_worker(*init_args)
+        for student in students:
+            key = key_of(student)
+            cached = lookup(key, student)
+            if cached is None:
+                counts['solves'] += 1
+                cached = finish(key, _solve_student(student))
+            yield cached
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or max_workers * 4
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=init_args) as pool:
+        # future -> (key, id các sinh viên chờ kết quả); key -> future đang giải
+        pending, inflight = {}, {}
+
+        def drain(done):
+            for fut in done:
+                key, waiters = pending.pop(fut)
+                del inflight[key]
+                _, chosen, status = finish(key, fut.result())
+                for sid in waiters:
+                    yield sid, list(chosen), status
+
+        for student in students:
+            key = key_of(student)
+            fut = inflight.get(key)
+            if fut is not None:
+                counts['coalesced'] += 1
+                pending[fut][1].append(student['student_id'])
+                continue
+            cached = lookup(key, student)
+            if cached is not None:
+                yield cached
+                continue
+            fut = pool.submit(_solve_student, student)
+            counts['solves'] += 1
+            pending[fut] = (key, [student['student_id']])
+            inflight[key] = fut
+            if len(pending) < max_pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from drain(done)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from drain(done)
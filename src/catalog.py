@@ -0,0 +1,158 @@
+import numpy as np
+
+from src.optimizer import SectionCatalog
+from src.section_table import SectionTable
+
+class CatalogIndex(SectionCatalog):
+    """
+    SectionCatalog dựng một lần và dùng chung (vd. qua st.cache_resource):
+    thêm tra cứu môn -> lớp, môn -> thông tin môn (tên, tín chỉ, ...) và mặt
+    nạ bit các tiết trong tuần của từng lớp, để kiểm tra trùng giờ / giờ rảnh
+    chỉ còn là phép AND số nguyên.
+
+    Bit của tiết p ngày d: d * width + (p - first_slot). Mặt nạ của lớp lưu
+    dạng mảng (số lớp, n_words) uint64; mặt nạ truy vấn (slot_mask, busy) là
+    int Python. Hai lớp trùng giờ khi cùng kỳ và AND mặt nạ khác 0.
+
+    conflict_mode="bitmask": clique trùng giờ lấy từ mặt nạ (các lớp cùng
+    chứa một tiết, bỏ clique con) - cùng tập ràng buộc với "clique".
+    courses: dict {mã môn: dict thông tin} hoặc DataFrame có cột 'id'.
+    """
+    def __init__(self, sections, courses=None, conflict_mode="bitmask"):
+        table = sections if isinstance(sections, SectionTable) else SectionTable.from_sections(sections)
+        self._init_masks(table)
+        super().__init__(table, conflict_mode)
+        if courses is None:
+            courses = {}
+        elif hasattr(courses, 'to_dict'):
+            courses = courses.set_index('id').to_dict('index')
+        self.courses = dict(courses)
+
+    @classmethod
+    def from_records(cls, records, meta_fields=('name',), term=1):
+        """Dựng từ list dict lớp học (id, course_id, day, start, credits, [term, end, name...])."""
+        records = list(records)
+        ends = [r.get('end', r['start'] + r['credits'] - 1) for r in records]
+        table = SectionTable.from_columns([r['id'] for r in records], [r['course_id'] for r in records],
+                                          np.array([r.get('term', term) for r in records], dtype=np.int64),
+                                          [r['day'] for r in records],
+                                          np.array([r['start'] for r in records], dtype=np.int64),
+                                          np.array(ends, dtype=np.int64),
+                                          np.array([r['credits'] for r in records], dtype=np.int64))
+        courses = {}
+        for r in records:
+            meta = courses.setdefault(r['course_id'], {'credits': r['credits']})
+            meta.update({f: r[f] for f in meta_fields if f in r})
+        return cls(table, courses)
+
+    def _init_masks(self, table):
+        self.first_slot = int(table.start.min()) if len(table) else 0
+        self.width = int(table.end.max()) - self.first_slot + 1 if len(table) else 1
+        self.n_bits = len(table.days) * self.width
+        n_words = max(1, -(-self.n_bits // 64))
+        masks = np.zeros((len(table), n_words), dtype=np.uint64)
+        base = table.day_code.astype(np.int64) * self.width - self.first_slot
+        for p in range(self.first_slot, self.first_slot + self.width):
+            # Lớp chứa tiết p => bật bit (thứ, p)
+            hit = np.flatnonzero((table.start <= p) & (p <= table.end))
+            bits = base[hit] + p
+            np.bitwise_or.at(masks, (hit, bits // 64), np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64)))
+        self.masks = masks
+
+    # --- Tra cứu ---
+
+    def rows_of(self, course_id):
+        """Các dòng (lớp) của một môn, rỗng nếu không có."""
+        code = self.code_of.get(course_id)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        order, offsets = self.table.by_course()
+        return order[offsets[code]:offsets[code + 1]]
+
+    def rows_of_courses(self, course_ids):
+        codes = self.table.course_codes_of(course_ids)
+        return np.flatnonzero(np.isin(self.table.course_codes, codes))
+
+    def sections_of(self, course_id):
+        return self.table.sections(self.rows_of(course_id).tolist())
+
+    def meta(self, course_id, field=None, default=None):
+        """Thông tin môn (dict), hoặc một trường của nó."""
+        info = self.courses.get(course_id, {})
+        return info if field is None else info.get(field, default)
+
+    # --- Mặt nạ tiết ---
+
+    def slot_mask(self, day, start, end=None):
+        """Mặt nạ (int) các tiết start..end của một ngày; tiết ngoài catalog bị bỏ qua."""
+        end = start if end is None else end
+        d = self.table.days.index(day)
+        lo, hi = max(start, self.first_slot), min(end, self.first_slot + self.width - 1)
+        if lo > hi:
+            return 0
+        return ((1 << (hi - lo + 1)) - 1) << (d * self.width + lo - self.first_slot)
+
+    def mask_of(self, rows):
+        """OR mặt nạ của các dòng => int (vd. lịch đã chọn)."""
+        words = np.bitwise_or.reduce(self.masks[np.asarray(rows, dtype=np.int64)], axis=0)
+        return sum(int(w) << (64 * k) for k, w in enumerate(words.tolist()))
+
+    def _words(self, mask):
+        return np.array([(mask >> (64 * k)) & 0xFFFFFFFFFFFFFFFF for k in range(self.masks.shape[1])],
+                        dtype=np.uint64)
+
+    def overlaps(self, mask, rows=None):
+        """Bool theo dòng: lớp có tiết nào nằm trong mặt nạ (bỏ qua kỳ)."""
+        masks = self.masks if rows is None else self.masks[np.asarray(rows, dtype=np.int64)]
+        return (masks & self._words(mask)).any(axis=1)
+
+    def available(self, busy, rows=None):
+        """Bool theo dòng: lớp không đụng tiết bận nào."""
+        return ~self.overlaps(busy, rows)
+
+    def conflicts_with(self, row, rows=None):
+        """Bool theo dòng: lớp cùng kỳ trùng giờ với lớp `row` (kể cả chính nó)."""
+        rows = np.arange(len(self.table)) if rows is None else np.asarray(rows, dtype=np.int64)
+        same_term = self.table.term[rows] == self.table.term[row]
+        return same_term & (self.masks[rows] & self.masks[row]).any(axis=1)
+
+    def has_conflict(self, rows):
+        """Tập lớp có hai lớp cùng kỳ trùng giờ không."""
+        rows = np.asarray(rows, dtype=np.int64)
+        for t in np.unique(self.table.term[rows]).tolist():
+            seen = np.zeros(self.masks.shape[1], dtype=np.uint64)
+            for m in self.masks[rows[self.table.term[rows] == t]]:
+                if (seen & m).any():
+                    return True
+                seen |= m
+        return False
+
+    # --- Ràng buộc trùng giờ cho optimizer ---
+
+    def _conflict_groups(self):
+        if self.conflict_mode != "bitmask":
+            return super()._conflict_groups()
+        # Mỗi (kỳ, tiết trong tuần): các lớp chứa tiết đó là một clique. Clique
+        # của tiết p là con của clique tiết kề bên => không cực đại, bỏ (đồ thị
+        # khoảng: mọi clique cực đại đều là clique của một tiết)
+        table = self.table
+        groups = []
+        for t in np.unique(table.term).tolist():
+            in_term = np.flatnonzero(table.term == t)
+            for d in range(len(table.days)):
+                run = []
+                for b in range(d * self.width, (d + 1) * self.width):
+                    word, bit = divmod(b, 64)
+                    members = in_term[((self.masks[in_term, word] >> np.uint64(bit)) & np.uint64(1)) == 1]
+                    # Các tiết liên tiếp cùng tập lớp => một clique
+                    if not run or not np.array_equal(run[-1], members):
+                        run.append(members)
+                for k, members in enumerate(run):
+                    if len(members) < 2:
+                        continue
+                    before = run[k - 1] if k else members[:0]
+                    nxt = run[k + 1] if k + 1 < len(run) else members[:0]
+                    if np.isin(members, before).all() or np.isin(members, nxt).all():
+                        continue
+                    groups.append(members.astype(np.int64))
+        return groups
@@ -0,0 +1,180 @@
+import hashlib
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from src.scoring import FEATURES
+
+TARGET = 'passed'
+CHUNK_ROWS = 65536
+
+def _extract(frame, features=FEATURES, target=TARGET):
+    # DataFrame / mảng có cấu trúc => (X float32 (n, d), y float32 (n, 1)), chỉ một lần sao chép mỗi cột
+    n = len(frame)
+    X = np.empty((n, len(features)), dtype=np.float32)
+    for j, name in enumerate(features):
+        X[:, j] = frame[name]
+    y = np.asarray(frame[target], dtype=np.float32).reshape(-1, 1)
+    return X, y
+
+class HistorySource(ABC):
+    """
+    Nguồn lịch sử học tập đọc theo khối: chunks() sinh lần lượt các cặp
+    (X float32 (n, len(features)), y float32 (n, 1)), mỗi lần chỉ một khối
+    (tối đa chunk_rows dòng) nằm trong bộ nhớ => đọc lại được nhiều lần (mỗi epoch một lượt).
+
+    shuffle_seed: xáo thứ tự khối (mảng / file đặc trưng mmap) hoặc thứ tự
+    file trong thư mục; bên trong một file CSV / Parquet vẫn đọc tuần tự.
+    """
+    def __init__(self, features=FEATURES, target=TARGET, chunk_rows=CHUNK_ROWS):
+        self.features = list(features)
+        self.target = target
+        self.chunk_rows = chunk_rows
+
+    @abstractmethod
+    def chunks(self, shuffle_seed=None):
+        ...
+
+    @abstractmethod
+    def fingerprint(self):
+        """Hash nhận diện dữ liệu (không đọc toàn bộ) - dùng thay data_hash cho model_store."""
+
+    def moments(self):
+        """(số dòng, trung bình, độ lệch chuẩn) theo cột của X - một lượt đọc, cộng dồn float64."""
+        n, total, total_sq = 0, np.zeros(len(self.features)), np.zeros(len(self.features))
+        for X, _ in self.chunks():
+            X = X.astype(np.float64)
+            n += len(X)
+            total += X.sum(axis=0)
+            total_sq += np.square(X).sum(axis=0)
+        if not n:
+            return 0, total, np.ones(len(self.features))
+        mean = total / n
+        # Độ lệch chuẩn hiệu chỉnh (n - 1) giống torch.std
+        var = np.maximum(total_sq - n * np.square(mean), 0.0) / max(n - 1, 1)
+        return n, mean, np.sqrt(var)
+
+    def _files_fingerprint(self, paths):
+        h = hashlib.sha256()
+        h.update(','.join(self.features + [self.target]).encode())
+        for p in paths:
+            st = os.stat(p)
+            h.update(f"{os.path.abspath(p)}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()
+
+class ArraySource(HistorySource):
+    """
+    Trường hợp đặc biệt: X, y đã có sẵn (mảng trong bộ nhớ hoặc np.load(..., mmap_mode='r')
+    của file đặc trưng) - chỉ cắt lát, không sao chép cả mảng.
+    """
+    def __init__(self, X, y, features=FEATURES, target=TARGET, chunk_rows=CHUNK_ROWS):
+        super().__init__(features, target, chunk_rows)
+        self.X = X
+        # np.asarray bỏ lớp np.memmap (mất tên file) => chỉ chuyển khi chưa là ndarray
+        y = y if isinstance(y, np.ndarray) else np.asarray(y)
+        self.y = y.reshape(-1, 1)
+
+    @classmethod
+    def from_frame(cls, df, features=FEATURES, target=TARGET, chunk_rows=CHUNK_ROWS):
+        X, y = _extract(df, features, target)
+        return cls(X, y, features, target, chunk_rows)
+
+    @classmethod
+    def from_features(cls, prefix, features=FEATURES, target=TARGET, chunk_rows=CHUNK_ROWS):
+        """Mở file đặc trưng do write_features ghi (prefix + '.X.npy' / '.y.npy') bằng memory-map."""
+        return cls(np.load(f"{prefix}.X.npy", mmap_mode='r'), np.load(f"{prefix}.y.npy", mmap_mode='r'),
+                   features, target, chunk_rows)
+
+    def __len__(self):
+        return len(self.X)
+
+    @property
+    def in_memory(self):
+        return not isinstance(self.X, np.memmap)
+
+    def chunks(self, shuffle_seed=None):
+        starts = np.arange(0, len(self.X), self.chunk_rows)
+        if shuffle_seed is not None:
+            starts = np.random.default_rng(shuffle_seed).permutation(starts)
+        for a in starts.tolist():
+            b = a + self.chunk_rows
+            # Luôn sao chép khối: lát cắt của mmap chỉ đọc, torch.from_numpy cần mảng ghi được
+            yield np.array(self.X[a:b], dtype=np.float32), np.array(self.y[a:b], dtype=np.float32)
+
+    def fingerprint(self):
+        if self.in_memory:
+            from src.model_store import data_hash
+            return data_hash(self.X, self.y, self.features)
+        return self._files_fingerprint([self.X.filename, self.y.filename])
+
+class FileSource(HistorySource):
+    """
+    Một file hoặc thư mục các khối (vd. history/ của data_generator.write_synthetic_data):
+    .csv đọc bằng pandas theo chunksize, .npy (mảng có cấu trúc) mở bằng
+    memory-map, .parquet đọc theo row group / batch (cần pyarrow).
+    Đặc trưng được trích ngay trên từng khối.
+    """
+    def __init__(self, path, features=FEATURES, target=TARGET, chunk_rows=CHUNK_ROWS):
+        super().__init__(features, target, chunk_rows)
+        self.path = path
+        if os.path.isdir(path):
+            self.paths = [os.path.join(path, f) for f in sorted(os.listdir(path)) if not f.startswith('.')]
+        else:
+            self.paths = [path]
+
+    def _read(self, path):
+        columns = self.features + [self.target]
+        if path.endswith('.npy'):
+            records = np.load(path, mmap_mode='r')
+            for a in range(0, len(records), self.chunk_rows):
+                yield records[a:a + self.chunk_rows]
+        elif path.endswith('.parquet'):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Đọc Parquet theo khối cần pyarrow (pip install pyarrow)") from e
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunk_rows, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, usecols=columns, chunksize=self.chunk_rows)
+
+    def chunks(self, shuffle_seed=None):
+        paths = list(self.paths)
+        if shuffle_seed is not None:
+            paths = [paths[i] for i in np.random.default_rng(shuffle_seed).permutation(len(paths))]
+        for path in paths:
+            for frame in self._read(path):
+                if len(frame):
+                    yield _extract(frame, self.features, self.target)
+
+    def fingerprint(self):
+        return self._files_fingerprint(self.paths)
+
+def open_history(path, features=FEATURES, target=TARGET, chunk_rows=CHUNK_ROWS):
+    """Nguồn phù hợp với đường dẫn: prefix file đặc trưng (.X.npy / .y.npy) hoặc file / thư mục bảng."""
+    if os.path.exists(f"{path}.X.npy"):
+        return ArraySource.from_features(path, features, target, chunk_rows)
+    return FileSource(path, features, target, chunk_rows)
+
+def write_features(source, prefix):
+    """
+    Trích đặc trưng một lần ra prefix.X.npy / prefix.y.npy (ghi qua memmap
+    theo từng khối) để các epoch sau đọc mmap thay vì parse lại CSV / Parquet.
+    Trả về ArraySource trên các file vừa ghi.
+    """
+    n = sum(len(X) for X, _ in source.chunks())
+    os.makedirs(os.path.dirname(prefix) or '.', exist_ok=True)
+    X_out = np.lib.format.open_memmap(f"{prefix}.X.npy", mode='w+', dtype=np.float32,
+                                      shape=(n, len(source.features)))
+    y_out = np.lib.format.open_memmap(f"{prefix}.y.npy", mode='w+', dtype=np.float32, shape=(n, 1))
+    a = 0
+    for X, y in source.chunks():
+        X_out[a:a + len(X)] = X
+        y_out[a:a + len(y)] = y
+        a += len(X)
+    X_out.flush()
+    y_out.flush()
+    del X_out, y_out
+    return ArraySource.from_features(prefix, source.features, source.target, source.chunk_rows)
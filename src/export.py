@@ -0,0 +1,82 @@
+import argparse
+import os
+
+import numpy as np
+import torch
+
+from src.model_store import load_model, DEFAULT_PATH
+from src.scoring import RiskScorer, load_scorer, FEATURES
+
+def export_torchscript(model, path):
+    scripted = torch.jit.script(model.eval())
+    scripted.save(path)
+    return path
+
+def export_onnx(model, path, opset=17):
+    # Trục batch động để chấm lô có kích thước bất kỳ
+    torch.onnx.export(
+        model.eval(), torch.zeros(2, model.net[0].in_features), path,
+        input_names=['x'], output_names=['pass_prob'],
+        dynamic_axes={'x': {0: 'batch'}, 'pass_prob': {0: 'batch'}},
+        opset_version=opset, dynamo=False,
+    )
+    return path
+
+def export_numpy(model, path, features=FEATURES):
+    """Ghi trọng số các lớp Linear (dạng (in, out)) + chuẩn hóa ra .npz cho NumpyRiskPredictor."""
+    linears = [m for m in model.net if isinstance(m, torch.nn.Linear)]
+    arrays = {'n_layers': np.array(len(linears)), 'features': np.array(list(features)),
+              'x_mean': model.x_mean.detach().numpy(), 'x_std': model.x_std.detach().numpy()}
+    for i, lin in enumerate(linears):
+        arrays[f'w{i}'] = lin.weight.detach().numpy().T
+        arrays[f'b{i}'] = lin.bias.detach().numpy()
+    np.savez(path, **arrays)
+    return path
+
+def check_parity(model, scorer, X=None, atol=1e-5):
+    """
+    So kết quả backend đã export với forward eager của RiskPredictor.
+    Trả về sai lệch tuyệt đối lớn nhất; raise AssertionError nếu vượt atol.
+    """
+    if X is None:
+        rng = np.random.default_rng(0)
+        X = np.column_stack([rng.uniform(0, 4, 4096), rng.uniform(0, 1, 4096),
+                             rng.integers(1, 6, 4096)]).astype(np.float32)
+    expected = RiskScorer(model).pass_prob(X)
+    diff = float(np.abs(scorer.pass_prob(X) - expected).max())
+    if diff > atol:
+        raise AssertionError(f"Lệch so với eager: {diff:.2e} > {atol:.0e}")
+    return diff
+
+EXPORTERS = {
+    'torchscript': (export_torchscript, '.ts'),
+    'onnx': (export_onnx, '.onnx'),
+    'numpy': (export_numpy, '.npz'),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export RiskPredictor sang TorchScript / ONNX / NumPy")
+    parser.add_argument('--model', default=DEFAULT_PATH, help="Artifact của model_store")
+    parser.add_argument('--out-dir', default='models')
+    parser.add_argument('--formats', nargs='+', default=list(EXPORTERS), choices=list(EXPORTERS))
+    args = parser.parse_args()
+
+    model, meta = load_model(args.model)
+    os.makedirs(args.out_dir, exist_ok=True)
+    for fmt in args.formats:
+        export_fn, ext = EXPORTERS[fmt]
+        path = os.path.join(args.out_dir, f"risk_predictor_{meta['version']}{ext}")
+        try:
+            export_fn(model, path)
+        except ImportError as e:
+            print(f"  {fmt:<12} bỏ qua: {e}")
+            continue
+        try:
+            diff = check_parity(model, load_scorer(path, backend=fmt))
+        except ImportError as e:
+            print(f"  {fmt:<12} -> {path} (không kiểm tra được: {e})")
+            continue
+        print(f"  {fmt:<12} -> {path} | lệch tối đa so với eager: {diff:.2e}")
+
+if __name__ == "__main__":
+    main()
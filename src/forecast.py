@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from src.tracing import span
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+class Forecast:
+    """
+    Phân phối số kỳ còn lại tới khi tốt nghiệp của một sinh viên.
+    terms: (n_sims,) số kỳ của từng lần mô phỏng; max_terms + 1 = chưa tốt
+    nghiệp trong tầm mô phỏng.
+    """
+    def __init__(self, terms, max_terms, pass_prob, retake_pass_prob):
+        self.terms = terms
+        self.max_terms = max_terms
+        self.pass_prob = pass_prob
+        self.retake_pass_prob = retake_pass_prob
+
+    @property
+    def graduated(self):
+        """Tỉ lệ lần mô phỏng tốt nghiệp trong tầm max_terms kỳ."""
+        return float(np.mean(self.terms <= self.max_terms))
+
+    def percentiles(self, qs=PERCENTILES):
+        # Lần chưa tốt nghiệp tính là max_terms + 1 => phân vị cao bị chặn, không vô cùng
+        return {q: int(v) for q, v in zip(qs, np.percentile(self.terms, qs, method='higher'))}
+
+    def distribution(self):
+        """
+        Series {số kỳ: xác suất tốt nghiệp đúng ở kỳ đó}, tổng bằng 1: kỳ 0 =
+        đã đủ tín chỉ, max_terms + 1 = chưa tốt nghiệp trong tầm mô phỏng.
+        """
+        counts = np.bincount(self.terms.astype(np.int64), minlength=self.max_terms + 2)
+        return pd.Series(counts / len(self.terms), index=np.arange(len(counts)))
+
+    def prob_within(self, n_terms):
+        """Xác suất tốt nghiệp trong vòng n_terms kỳ tới."""
+        return float(np.mean(self.terms <= n_terms))
+
+def _simulate(new_credits, owed_credits, per_term, course_credits, p_new, p_retake, n_sims, max_terms, rng):
+    """
+    Mô phỏng n_sims chuỗi kỳ cho mỗi sinh viên (mảng (n_students,), đếm theo
+    tín chỉ). Mỗi kỳ học tối đa per_term tín: học lại tín chỉ nợ trước, còn chỗ
+    mới học tín chỉ mới; phần học trong kỳ chia thành các môn course_credits tín
+    (môn cuối có thể ít hơn), mỗi môn qua với xác suất p_retake / p_new, trượt
+    thì số tín của môn thành nợ. Xác suất qua = 1 => đúng ceil(tổng tín / per_term) kỳ.
+    Trả về (n_students, n_sims) số kỳ tới khi hết tín phải học (max_terms + 1 = chưa xong).
+    """
+    n = len(new_credits)
+    cc = int(course_credits)
+    # Trải phẳng (sinh viên x lần mô phỏng); chỉ giữ lại các chuỗi chưa xong để
+    # các kỳ sau càng rẻ dần
+    left = np.repeat(new_credits.astype(np.int32), n_sims)
+    owed = np.repeat(owed_credits.astype(np.int32), n_sims)
+    done_at = np.full(n * n_sims, max_terms + 1, dtype=np.int16)
+    finished = (left + owed) == 0
+    done_at[finished] = 0
+    live = np.flatnonzero(~finished)
+    student = live // n_sims
+    left, owed = left[live], owed[live]
+    cap = per_term.astype(np.int32)[student]
+    pn, pr = p_new.astype(np.float32)[student], p_retake.astype(np.float32)[student]
+
+    for t in range(1, max_terms + 1):
+        if not len(live):
+            break
+        retake = np.minimum(owed, cap)
+        fresh = np.minimum(left, cap - retake)
+        n_retake = -(-retake // cc)
+        n_taken = n_retake + -(-fresh // cc)
+        passed_retake = np.zeros(len(live), dtype=np.int32)
+        passed_new = np.zeros(len(live), dtype=np.int32)
+        # Mỗi môn một phép thử Bernoulli: ô j < n_retake là môn học lại, còn lại tới n_taken là môn mới
+        for j in range(int(n_taken.max())):
+            u = rng.random(len(live), dtype=np.float32)
+            is_retake = j < n_retake
+            size = np.where(is_retake, np.minimum(cc, retake - j * cc),
+                            np.minimum(cc, fresh - (j - n_retake) * cc))
+            size = np.where(j < n_taken, size, 0)
+            passed_retake += np.where(is_retake & (u < pr), size, 0)
+            passed_new += np.where(~is_retake & (u < pn), size, 0)
+        owed = owed - passed_retake + (fresh - passed_new)
+        left = left - fresh
+
+        finished = (left + owed) == 0
+        done_at[live[finished]] = t
+        keep = ~finished
+        live, left, owed, cap, pn, pr = live[keep], left[keep], owed[keep], cap[keep], pn[keep], pr[keep]
+    return done_at.reshape(n, n_sims)
+
+def _pass_probs(scorer, gpas, difficulty, retake_difficulty, course_credits):
+    gpas = np.asarray(gpas, dtype=np.float32).reshape(-1)
+    n = len(gpas)
+    X = np.empty((2 * n, 3), dtype=np.float32)
+    X[:n, 0] = X[n:, 0] = gpas
+    X[:n, 1] = difficulty
+    X[n:, 1] = retake_difficulty
+    X[:, 2] = course_credits
+    # Một lần forward cho cả môn mới lẫn môn học lại của mọi sinh viên
+    p = scorer.pass_prob(X).astype(np.float64)
+    return p[:n], p[n:]
+
+def forecast_graduation(scorer, gpa, earned_credits, required_credits, failed_credits=0, limit_credits=20,
+                        difficulty=0.6, retake_difficulty=None, course_credits=3, n_sims=20000, max_terms=30,
+                        seed=None):
+    """
+    Dự báo số kỳ còn lại tới khi tốt nghiệp bằng Monte Carlo, xác suất qua
+    môn lấy từ RiskPredictor (qua RiskScorer) theo GPA, độ khó và số tín chỉ.
+    failed_credits: tín chỉ môn trượt phải học lại (học lại trước môn mới).
+    retake_difficulty: độ khó môn học lại (mặc định bằng difficulty).
+    """
+    result = forecast_cohort(scorer, [gpa], [earned_credits], required_credits, [failed_credits], limit_credits,
+                             difficulty, retake_difficulty, course_credits, n_sims, max_terms, seed,
+                             keep_samples=True)
+    return result[0]
+
+def forecast_cohort(scorer, gpas, earned_credits, required_credits, failed_credits=0, limit_credits=20,
+                    difficulty=0.6, retake_difficulty=None, course_credits=3, n_sims=20000, max_terms=30,
+                    seed=None, chunk_size=256, keep_samples=False):
+    """
+    Như forecast_graduation cho cả khóa: các tham số nhận giá trị vô hướng hoặc
+    mảng (một giá trị / sinh viên). Mô phỏng theo từng nhóm chunk_size sinh
+    viên để giới hạn bộ nhớ (chunk_size x n_sims phần tử mỗi mảng).
+    Mỗi kỳ đăng ký tối đa limit_credits tín, chia thành các môn course_credits
+    tín (môn cuối có thể ít hơn).
+    Trả về DataFrame các phân vị + xác suất tốt nghiệp trong tầm mô phỏng, hoặc
+    list Forecast nếu keep_samples.
+    """
+    gpas = np.asarray(gpas, dtype=np.float64).reshape(-1)
+    n = len(gpas)
+
+    def per_student(value):
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+
+    earned, required = per_student(earned_credits), per_student(required_credits)
+    failed, limit = per_student(failed_credits), per_student(limit_credits)
+    if retake_difficulty is None:
+        retake_difficulty = difficulty
+    with span('forecast.score', students=n):
+        p_new, p_retake = _pass_probs(scorer, gpas, per_student(difficulty), per_student(retake_difficulty),
+                                      course_credits)
+    new_credits = np.ceil(np.maximum(required - earned, 0))
+    owed_credits = np.ceil(failed)
+    per_term = np.maximum(np.floor(limit), 1)
+    rng = np.random.default_rng(seed)
+
+    rows, samples = [], []
+    with span('forecast.simulate', students=n, sims=n_sims):
+        for a in range(0, n, chunk_size):
+            b = min(a + chunk_size, n)
+            terms = _simulate(new_credits[a:b], owed_credits[a:b], per_term[a:b], course_credits, p_new[a:b],
+                              p_retake[a:b], n_sims, max_terms, rng)
+            pct = np.percentile(terms, PERCENTILES, axis=1, method='higher')
+            for i in range(b - a):
+                if keep_samples:
+                    samples.append(Forecast(terms[i], max_terms, float(p_new[a + i]), float(p_retake[a + i])))
+                    continue
+                row = {f"p{q}": int(pct[k, i]) for k, q in enumerate(PERCENTILES)}
+                row['mean'] = float(terms[i].mean())
+                row['graduated'] = float(np.mean(terms[i] <= max_terms))
+                row['pass_prob'] = float(p_new[a + i])
+                rows.append(row)
+    return samples if keep_samples else pd.DataFrame(rows)
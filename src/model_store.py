@@ -0,0 +1,106 @@
+import hashlib
+import os
+import time
+
+import numpy as np
+import torch
+
+from src.ai_model import RiskPredictor, train_risk_model_fast, train_risk_model_stream
+from src.data_source import ArraySource, HistorySource
+from src.scoring import FEATURES
+from src.tracing import traced
+
+FORMAT_VERSION = 1
+DEFAULT_PATH = os.path.join('models', 'risk_predictor.pt')
+
+def data_hash(X, y, features=FEATURES):
+    """Băm nội dung dữ liệu huấn luyện + tên cột => đổi dữ liệu thì phải train lại."""
+    h = hashlib.sha256()
+    h.update(','.join(features).encode())
+    for arr in (X, y):
+        arr = np.ascontiguousarray(arr)
+        h.update(str(arr.dtype).encode())
+        h.update(str(arr.shape).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+def save_model(model, path, features, train_hash, train_time=None):
+    """
+    Lưu trọng số + schema đầu vào + chuẩn hóa (nằm trong state_dict) + hash dữ liệu.
+    Ghi ra file tạm rồi os.replace để không bao giờ để lại artifact dở dang.
+    """
+    artifact = {
+        'format_version': FORMAT_VERSION,
+        'version': train_hash[:12],
+        'in_dim': model.net[0].in_features,
+        'hidden': model.net[0].out_features,
+        'features': list(features),
+        'data_hash': train_hash,
+        'train_time': train_time,
+        'state_dict': model.state_dict(),
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp"
+    torch.save(artifact, tmp)
+    os.replace(tmp, path)
+    return artifact['version']
+
+def load_model(path):
+    """
+    Nạp artifact (memory-map, chỉ cho phép tensor/kiểu cơ bản).
+    Trả về (model, meta) - meta là artifact không kèm state_dict.
+    """
+    artifact = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    if artifact.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Artifact {path} có format_version không hỗ trợ: {artifact.get('format_version')}")
+    model = RiskPredictor(artifact['in_dim'], hidden=artifact['hidden'])
+    model.load_state_dict(artifact.pop('state_dict'))
+    model.eval()
+    return model, artifact
+
+@traced('model.load_or_train')
+def load_or_train(X, y=None, path=DEFAULT_PATH, features=FEATURES, report=None, trainer=None, **train_kwargs):
+    """
+    Dùng lại mô hình đã lưu nếu schema và hash dữ liệu khớp, ngược lại train
+    bằng trainer và lưu mới. Mặc định: mảng trong bộ nhớ dùng
+    train_risk_model_fast (batch lớn, dừng sớm), trainer=train_risk_model là
+    bản DataLoader cũ.
+    X: mảng đặc trưng (kèm y), hoặc data_source.HistorySource (y=None) - khi
+    đó hash lấy từ source.fingerprint() và mặc định train theo khối bằng
+    train_risk_model_stream; ArraySource trong bộ nhớ được xử lý như mảng.
+    report: dict (tùy chọn) nhận 'source' ('artifact' | 'trained'), 'load_time',
+    'train_time', 'version', 'trainer' (tên hàm train, chỉ khi train).
+    """
+    source = None
+    if isinstance(X, HistorySource):
+        if isinstance(X, ArraySource) and X.in_memory:
+            X, y = X.X, X.y
+        else:
+            source = X
+    if trainer is None:
+        trainer = train_risk_model_fast if source is None else train_risk_model_stream
+    train_hash = data_hash(X, y, features) if source is None else source.fingerprint()
+    if os.path.exists(path):
+        t0 = time.perf_counter()
+        try:
+            model, meta = load_model(path)
+        except (OSError, RuntimeError, ValueError, KeyError):
+            model, meta = None, None
+        load_time = time.perf_counter() - t0
+        if meta and meta['data_hash'] == train_hash and meta['features'] == list(features):
+            if report is not None:
+                report.update({'source': 'artifact', 'load_time': load_time,
+                               'train_time': meta['train_time'], 'version': meta['version']})
+            return model
+
+    t0 = time.perf_counter()
+    if source is None:
+        model = trainer(X, y, in_dim=len(features), **train_kwargs)
+    else:
+        model = trainer(source, in_dim=len(features), **train_kwargs)
+    train_time = time.perf_counter() - t0
+    version = save_model(model, path, features, train_hash, train_time)
+    if report is not None:
+        report.update({'source': 'trained', 'load_time': None, 'train_time': train_time, 'version': version,
+                       'trainer': trainer.__name__})
+    return model
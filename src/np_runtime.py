@@ -0,0 +1,56 @@
+import numpy as np
+
+class NumpyRiskPredictor:
+    """
+    Runtime chỉ-suy-luận cho MLP 3 -> 64 -> 32 -> 1 của RiskPredictor, thuần NumPy
+    (không import torch): chuẩn hóa đầu vào rồi 3 phép nhân ma trận.
+    Trọng số lấy từ file .npz do src.export.export_numpy ghi ra.
+    """
+    def __init__(self, weights, biases, x_mean, x_std, features=None):
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.x_mean = np.asarray(x_mean, dtype=np.float32)
+        self.x_std = np.asarray(x_std, dtype=np.float32)
+        self.features = list(features) if features is not None else None
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            n = int(f['n_layers'])
+            return cls([f[f'w{i}'] for i in range(n)], [f[f'b{i}'] for i in range(n)],
+                       f['x_mean'], f['x_std'], f['features'].tolist())
+
+    def predict(self, X):
+        """X: (n, in_dim) => xác suất qua môn (n,)."""
+        h = (np.asarray(X, dtype=np.float32) - self.x_mean) / self.x_std
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            h = h @ w + b  # w lưu sẵn dạng (in, out)
+            if i < last:
+                np.maximum(h, 0.0, out=h)
+        return (1.0 / (1.0 + np.exp(-h))).reshape(-1)
+
+class HeuristicRiskPredictor:
+    """
+    Ước lượng không cần mô hình, cùng công thức sinh nhãn của data_generator:
+    P(qua) = GPA / 4 * 0.7 + (1 - độ khó) * 0.3. Dùng tạm khi mô hình còn đang train.
+    """
+    version = 'heuristic'
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        return np.clip(X[:, 0] / 4.0 * 0.7 + (1.0 - X[:, 1]) * 0.3, 0.0, 1.0)
+
+class OnnxRiskPredictor:
+    """Bọc onnxruntime.InferenceSession theo cùng giao diện predict()."""
+    def __init__(self, path):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("Backend 'onnx' cần cài onnxruntime (pip install onnxruntime)") from e
+        self.session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.session.run(None, {self.input_name: X})[0].reshape(-1)
@@ -1,98 +1,514 @@
+import heapq
+import time
+
+import numpy as np
 from ortools.sat.python import cp_model
 
-class Section:
-    def __init__(self, id, course_id, term, day, start, end, credits):
-        self.id = id
-        self.course_id = course_id
-        self.term = term
-        self.day = day
-        self.start = start
-        self.end = end
-        self.credits = credits
+from src.prereq_index import PrereqIndex
+from src.presolve import DEFAULT_STAGES, PresolveContext, drop_dominated, run_presolve
+from src.section_table import Section, SectionTable, _csr
+from src.tracing import span
 
-    def __repr__(self):
-        return f"Section({self.id}, {self.day} {self.start}-{self.end})"
+def _sweep(starts, ends):
+    """
+    Quét các lớp theo giờ bắt đầu, trả về các clique cực đại (các lớp cùng
+    chứa một thời điểm) dưới dạng list chỉ số. Hai lớp trùng giờ khi max(start) <= min(end).
+    """
+    cliques = []
+    active = []  # heap (end, i) các lớp đang "mở" tại thời điểm quét
+    grew = False
+    for i in sorted(range(len(starts)), key=starts.__getitem__):
+        if active and active[0][0] < starts[i]:
+            # Sắp loại bớt lớp => tập đang mở là một clique cực đại
+            if grew and len(active) > 1:
+                cliques.append([j for _, j in active])
+            grew = False
+            while active and active[0][0] < starts[i]:
+                heapq.heappop(active)
+        heapq.heappush(active, (ends[i], i))
+        grew = True
+    if grew and len(active) > 1:
+        cliques.append([j for _, j in active])
+    return cliques
 
-def schedule_multi_term(sections, prereqs, target_terms, credit_bounds, risk_dict=None, risk_weight=5.0):
+def _pairwise(starts, ends):
+    # Cách cũ: so từng cặp trong mỗi (kỳ, thứ) - giữ lại để đối chiếu
+    pairs = []
+    for i in range(len(starts)):
+        for j in range(i + 1, len(starts)):
+            if max(starts[i], starts[j]) <= min(ends[i], ends[j]):
+                pairs.append((i, j))
+    return pairs
+
+def _group_term_day(sections):
+    term_day_sections = {}
+    for s in sections:
+        term_day_sections.setdefault((s.term, s.day), []).append(s)
+    return term_day_sections
+
+def build_conflict_cliques(sections):
     """
-    Hàm xếp lịch học tối ưu sử dụng Google OR-Tools (CP-SAT).
-    Đã sửa lỗi kiểu dữ liệu int() vs FloatAffine.
+    Gom lớp theo (kỳ, thứ) rồi quét từng nhóm => danh sách clique trùng giờ.
+    Mỗi clique tương ứng một ràng buộc AddAtMostOne thay cho O(n²) cặp.
+    """
+    cliques = []
+    for secs in _group_term_day(sections).values():
+        for idx in _sweep([s.start for s in secs], [s.end for s in secs]):
+            cliques.append([secs[i] for i in idx])
+    return cliques
+
+class SolverProfile:
+    """
+    Cấu hình CP-SAT cho một lần giải.
+    max_time: giới hạn thời gian (giây), num_workers: số luồng tìm kiếm,
+    relative_gap: dừng khi |bound - objective| / |objective| <= gap, seed: hạt giống cố định.
+    on_solution: callback(selected_sections, objective, bound) được gọi mỗi khi
+    solver tìm được lời giải tốt hơn (chế độ "anytime").
+    """
+    def __init__(self, max_time=None, num_workers=None, relative_gap=None, seed=None, on_solution=None):
+        self.max_time = max_time
+        self.num_workers = num_workers
+        self.relative_gap = relative_gap
+        self.seed = seed
+        self.on_solution = on_solution
+
+    def configure(self, solver):
+        if self.max_time is not None:
+            solver.parameters.max_time_in_seconds = float(self.max_time)
+        if self.num_workers is not None:
+            solver.parameters.num_search_workers = int(self.num_workers)
+        if self.relative_gap is not None:
+            solver.parameters.relative_gap_limit = float(self.relative_gap)
+        if self.seed is not None:
+            solver.parameters.random_seed = int(self.seed)
+        return solver
+
+class _PlanCallback(cp_model.CpSolverSolutionCallback):
+    # Gửi từng lời giải cải thiện ra ngoài ngay khi tìm được
+    def __init__(self, table, rows, x, on_solution):
+        super().__init__()
+        self._table = table
+        self._rows = rows
+        self._x = x
+        self._on_solution = on_solution
+
+    def on_solution_callback(self):
+        selected = self._table.sections(r for r, v in zip(self._rows.tolist(), self._x) if self.Value(v))
+        self._on_solution(selected, self.ObjectiveValue(), self.BestObjectiveBound())
+
+class SectionCatalog:
     """
+    Các cấu trúc dùng chung cho cả catalog, dựng MỘT lần rồi tái sử dụng cho
+    nhiều sinh viên: bảng cột SectionTable (nhóm theo môn, theo (kỳ, thứ)) và
+    ràng buộc trùng giờ (mảng chỉ số dòng).
+    """
+    def __init__(self, sections, conflict_mode="clique"):
+        t0 = time.perf_counter()
+        self.table = sections if isinstance(sections, SectionTable) else SectionTable.from_sections(sections)
+        self.conflict_mode = conflict_mode
+        table = self.table
+        self.code_of = {c: k for k, c in enumerate(table.course_ids.tolist())}
+        self._row_of = None
+
+        t_conflict = time.perf_counter()
+        self.conflicts = self._conflict_groups()
+        self.conflict_time = time.perf_counter() - t_conflict
+        self.build_time = time.perf_counter() - t0
+
+    def _conflict_groups(self):
+        # Mỗi nhóm là mảng chỉ số dòng: clique (AddAtMostOne) hoặc cặp trùng giờ
+        if self.conflict_mode == "clique":
+            sweep = _sweep
+        elif self.conflict_mode == "pairwise":
+            sweep = _pairwise
+        else:
+            raise ValueError(f"conflict_mode không hợp lệ: {self.conflict_mode!r}")
+        table = self.table
+        order, offsets, _ = table.by_term_day()
+        starts, ends, rows = table.start[order].tolist(), table.end[order].tolist(), order.tolist()
+        groups = []
+        for g in range(len(offsets) - 1):
+            a, b = int(offsets[g]), int(offsets[g + 1])
+            for idx in sweep(starts[a:b], ends[a:b]):
+                groups.append(np.array([rows[a + i] for i in idx], dtype=np.int64))
+        return groups
+
+    def __len__(self):
+        return len(self.table)
+
+    def section_by_id(self, section_id):
+        if self._row_of is None:
+            self._row_of = {sid: i for i, sid in enumerate(self.table.ids.tolist())}
+        return self.table.section(self._row_of[section_id])
+
+class _PlanModel:
+    # Model CP-SAT đã dựng + các handle cần để sửa / giải lại.
+    # rows: các dòng của catalog có biến, x[i] là biến của rows[i]
+    def __init__(self, model, rows, x, credit_cts, n_conflicts, n_prereqs=0, n_pruned=0):
+        self.model = model
+        self.rows = rows
+        self.x = x
+        self.var_index = np.array([v.Index() for v in x], dtype=np.int64)
+        self.credit_cts = credit_cts
+        self.n_conflicts = n_conflicts
+        self.n_prereqs = n_prereqs
+        self.n_pruned = n_pruned
+
+def _open_terms(table, completed=(), courses=None):
+    """
+    Các kỳ catalog có mở lớp của môn chưa qua (courses: chỉ xét các môn này) -
+    đây là các kỳ có ràng buộc tín chỉ, tính trên cả catalog chứ không theo
+    các dòng còn lại sau presolve.
+    """
+    keep = np.ones(len(table), dtype=bool)
+    if completed:
+        keep &= ~np.isin(table.course_codes, table.course_codes_of(completed))
+    if courses is not None:
+        keep &= np.isin(table.course_codes, table.course_codes_of(courses))
+    return set(np.unique(table.term[keep]).tolist())
+
+def _build_model(catalog, rows, target_terms, credit_bounds, completed=(), prereqs=None, open_terms=None):
+    # rows: các dòng của catalog còn lại sau presolve (presolve chỉ để thu
+    # nhỏ model - tắt presolve vẫn phải cho cùng kết quả)
+    # open_terms: các kỳ có ràng buộc tín chỉ (mặc định _open_terms(catalog, completed))
+    table = catalog.table
     model = cp_model.CpModel()
+    index = PrereqIndex.of(prereqs)
+    rows = np.asarray(rows, dtype=np.int64)
+    if completed:
+        rows = rows[~np.isin(table.course_codes[rows], table.course_codes_of(completed))]
+    # Lớp mở ngoài các kỳ cần xếp không có biến (không phụ thuộc presolve drop_off_horizon)
+    rows = rows[np.isin(table.term[rows], list(target_terms))]
+    pos = np.full(len(table), -1, dtype=np.int64)
+    pos[rows] = np.arange(len(rows))
+    codes, terms, credits = table.course_codes[rows], table.term[rows], table.credits[rows]
 
     # 1. Biến quyết định: Có chọn lớp s hay không? (0 hoặc 1)
-    x = {}
-    for s in sections:
-        x[s.id] = model.NewBoolVar(f'x_{s.id}')
+    ids = table.ids
+    x = [model.NewBoolVar(f'x_{ids[r]}') for r in rows.tolist()]
 
     # 2. Ràng buộc: Mỗi môn học chỉ được chọn tối đa 1 lớp
-    course_to_sections = {}
-    for s in sections:
-        if s.course_id not in course_to_sections:
-            course_to_sections[s.course_id] = []
-        course_to_sections[s.course_id].append(s)
+    order, offsets = _csr(codes, table.n_courses)
+    for code in np.flatnonzero(np.diff(offsets)).tolist():
+        xs = [x[i] for i in order[offsets[code]:offsets[code + 1]].tolist()]
+        chosen_var = model.NewBoolVar(f'chosen_{table.course_ids[code]}')
+        model.Add(cp_model.LinearExpr.Sum(xs) == chosen_var)
 
-    for c_id, secs in course_to_sections.items():
-        chosen_var = model.NewBoolVar(f'chosen_{c_id}')
-        model.Add(sum(x[s.id] for s in secs) == chosen_var)
+    # 2b. Ràng buộc: Học môn c ở kỳ t => mỗi môn tiên quyết chưa qua của c
+    # phải được chọn ở một kỳ trước t (mỗi môn chọn tối đa 1 lớp nên gộp theo kỳ)
+    n_prereqs = 0
+    if index:
+        for code in np.flatnonzero(np.diff(offsets)).tolist():
+            missing = [p for p in index.prereqs_of(table.course_ids[code]) if p not in completed]
+            if not missing:
+                continue
+            pc = order[offsets[code]:offsets[code + 1]]
+            for t in np.unique(terms[pc]).tolist():
+                xs = [x[i] for i in pc[terms[pc] == t].tolist()]
+                for p in missing:
+                    pk = catalog.code_of.get(p)
+                    pp = order[offsets[pk]:offsets[pk + 1]] if pk is not None else pc[:0]
+                    before = [x[i] for i in pp[terms[pp] < t].tolist()]
+                    # Không còn lớp nào của môn tiên quyết ở kỳ trước => sum([]) = 0, cấm học c ở kỳ t
+                    model.Add(cp_model.LinearExpr.Sum(xs) <= sum(before))
+                    n_prereqs += 1
 
-    # 3. Ràng buộc: Không trùng giờ học
-    term_day_sections = {}
-    for s in sections:
-        key = (s.term, s.day)
-        if key not in term_day_sections:
-            term_day_sections[key] = []
-        term_day_sections[key].append(s)
-
-    for key, secs in term_day_sections.items():
-        for i in range(len(secs)):
-            for j in range(i + 1, len(secs)):
-                s1 = secs[i]
-                s2 = secs[j]
-                if max(s1.start, s2.start) <= min(s1.end, s2.end):
-                    model.Add(x[s1.id] + x[s2.id] <= 1)
+    # 3. Ràng buộc: Không trùng giờ học (clique / cặp đã tính sẵn trong catalog)
+    n_conflicts = 0
+    for group in catalog.conflicts:
+        members = pos[group]
+        members = members[members >= 0].tolist()
+        if len(members) < 2:
+            continue
+        if catalog.conflict_mode == "pairwise":
+            model.Add(x[members[0]] + x[members[1]] <= 1)
+        else:
+            model.AddAtMostOne(x[i] for i in members)
+        n_conflicts += 1
 
     # 4. Ràng buộc: Số tín chỉ (Min - Max)
+    # Mỗi kỳ một ràng buộc tuyến tính (kỳ không giới hạn: [0, tổng tín chỉ]) để
+    # IncrementalPlanner có thể sửa cận tại chỗ. Kỳ catalog không mở lớp nào (của
+    # môn chưa qua) thì bỏ qua; kỳ có lớp nhưng presolve đã loại hết vẫn giữ ràng
+    # buộc (tổng = 0) => cận dưới > 0 thì vô nghiệm, như khi tắt presolve
+    if open_terms is None:
+        open_terms = _open_terms(table, completed)
+    credit_cts = {}
     for t in target_terms:
-        s_in_term = [s for s in sections if s.term == t]
-        if not s_in_term:
+        if t not in open_terms:
             continue
-        
-        total_credits = sum(x[s.id] * s.credits for s in s_in_term)
-        
-        if t in credit_bounds:
-            min_c, max_c = credit_bounds[t]
-            model.Add(total_credits >= min_c)
-            model.Add(total_credits <= max_c)
+        in_term = np.flatnonzero(terms == t)
 
-    # 5. Hàm mục tiêu (Objective Function) - ĐÃ SỬA LỖI
-    # Tính tổng tín chỉ muốn đạt được
-    objective_credits = sum(x[s.id] * s.credits for s in sections)
-    
-    # Tính điểm phạt rủi ro
-    risk_penalty = 0
+        term_credits = credits[in_term].tolist()
+        total_credits = cp_model.LinearExpr.WeightedSum([x[i] for i in in_term.tolist()], term_credits)
+        min_c, max_c = credit_bounds.get(t, (0, sum(term_credits)))
+        credit_cts[t] = model.AddLinearConstraint(total_credits, min_c, max_c)
+
+    return _PlanModel(model, rows, x, credit_cts, n_conflicts, n_prereqs, len(table) - len(rows))
+
+def _coefficients(table, rows, risk_dict, risk_weight):
+    # Tính theo cột: mỗi lớp một hệ số nguyên, không duyệt từng đối tượng Section
+    credits = table.credits[rows].astype(np.int64)
+
+    # Rủi ro theo môn (vd: 0.8), nhân 100 -> thành số nguyên (80)
+    risk = np.zeros(table.n_courses)
     if risk_dict:
-        for s in sections:
-            # Lấy rủi ro (vd: 0.8), nhân 100 -> thành số nguyên (80)
-            r = risk_dict.get(s.course_id, 0.0)
-            r_int = int(r * 100) 
-            # Cộng dồn vào biểu thức: biến x * số nguyên r_int
-            risk_penalty += x[s.id] * r_int
+        risk = np.array([risk_dict.get(c, 0.0) for c in table.course_ids.tolist()], dtype=np.float64)
+    r_int = (risk * 100).astype(np.int64)[table.course_codes[rows]]
 
     # CHUẨN BỊ TRỌNG SỐ (Ép kiểu ra số nguyên ở ngoài)
-    w_int = int(risk_weight) 
+    w_int = int(risk_weight)
+
+    # Công thức: (Tín chỉ * 10) - (Rủi ro * Trọng số), hệ số đều là số nguyên
+    return credits * 10 - r_int * w_int
 
-    # THIẾT LẬP HÀM MỤC TIÊU
-    # Tuyệt đối không dùng int() bao trùm cả biểu thức chứa biến x
-    # Công thức: (Tín chỉ * 10) - (Rủi ro * Trọng số)
-    model.Maximize((objective_credits * 10) - (risk_penalty * w_int))
+def plan_objective(table, rows, risk_dict, risk_weight):
+    """Giá trị hàm mục tiêu của một tập lớp (chỉ số dòng) - cùng công thức với model CP-SAT."""
+    return int(_coefficients(table, np.asarray(rows, dtype=np.int64), risk_dict, risk_weight).sum())
 
+def _set_objective(pm, table, risk_dict, risk_weight):
+    # 5. Hàm mục tiêu (Objective Function) - ĐÃ SỬA LỖI
+    # THIẾT LẬP HÀM MỤC TIÊU (Maximize gọi lại sẽ thay thế hàm mục tiêu cũ)
+    coeffs = _coefficients(table, pm.rows, risk_dict, risk_weight)
+    pm.model.Maximize(cp_model.LinearExpr.WeightedSum(pm.x, coeffs.tolist()))
+
+def _solve(pm, table, profile=None, stats=None):
     # 6. Giải
     solver = cp_model.CpSolver()
-    status = solver.Solve(model)
+    callback = None
+    if profile is not None:
+        profile.configure(solver)
+        if profile.on_solution is not None:
+            callback = _PlanCallback(table, pm.rows, pm.x, profile.on_solution)
+    with span('plan.solve') as sp:
+        status = solver.Solve(pm.model, callback)
+        proto = pm.model.Proto()
+        # Thống kê phản hồi CP-SAT
+        sp.set(status=solver.StatusName(status), branches=solver.NumBranches(), conflicts=solver.NumConflicts(),
+               wall_time=solver.WallTime(), num_variables=len(proto.variables),
+               num_constraints=len(proto.constraints))
+    found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
 
-    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        selected_sections = [s for s in sections if solver.Value(x[s.id]) == 1]
-        return selected_sections, "Optimal"
+    if stats is not None:
+        objective = solver.ObjectiveValue() if found else None
+        bound = solver.BestObjectiveBound() if found else None
+        gap = abs(bound - objective) / max(1.0, abs(objective)) if found else None
+        # FEASIBLE/UNKNOWN chỉ xảy ra khi bị dừng bởi giới hạn; FEASIBLE mà đã đạt gap thì không tính là hết giờ
+        gap_reached = found and profile is not None and profile.relative_gap is not None and gap <= profile.relative_gap
+        stats.update({
+            'conflict_constraints': pm.n_conflicts,
+            'prereq_constraints': pm.n_prereqs,
+            'pruned_sections': pm.n_pruned,
+            'solve_time': solver.WallTime(),
+            'num_variables': len(proto.variables),
+            'num_constraints': len(proto.constraints),
+            'branches': solver.NumBranches(),
+            'conflicts': solver.NumConflicts(),
+            'status': solver.StatusName(status),
+            'objective': objective,
+            'best_bound': bound,
+            'gap': gap,
+            'timed_out': status in (cp_model.FEASIBLE, cp_model.UNKNOWN) and not gap_reached,
+        })
+
+    if found:
+        solution = np.asarray(solver.ResponseProto().solution, dtype=np.int64)
+        chosen_rows = pm.rows[solution[pm.var_index] == 1]
+        return table.sections(chosen_rows.tolist()), solver.StatusName(status), chosen_rows
     else:
-        return [], "Infeasible"
\ No newline at end of file
+        return [], solver.StatusName(status), pm.rows[:0]
+
+def _as_catalog(sections, conflict_mode="clique"):
+    return sections if isinstance(sections, SectionCatalog) else SectionCatalog(sections, conflict_mode)
+
+def schedule_multi_term(sections, prereqs, target_terms, credit_bounds, risk_dict=None, risk_weight=5.0,
+                        conflict_mode="clique", stats=None, completed=None, profile=None, presolve=None):
+    """
+    Hàm xếp lịch học tối ưu sử dụng Google OR-Tools (CP-SAT).
+    Đã sửa lỗi kiểu dữ liệu int() vs FloatAffine.
+
+    sections: list Section, SectionTable (bảng cột, vd. SectionTable.from_dataframe)
+    hoặc SectionCatalog đã dựng sẵn (dùng chung khi xếp lịch hàng loạt, khi đó
+    conflict_mode lấy theo catalog).
+    conflict_mode: "clique" (quét, mỗi clique một AddAtMostOne) hoặc
+    "pairwise" (cách cũ, mỗi cặp trùng giờ một ràng buộc).
+    stats: dict (tùy chọn) nhận số ràng buộc trùng giờ, kích thước model và
+    thời gian dựng model / giải.
+    prereqs: dict {môn: [môn tiên quyết]} hoặc PrereqIndex dựng sẵn. Môn học ở
+    kỳ t cần mọi môn tiên quyết đã qua (completed) hoặc được chọn ở kỳ trước t.
+    completed: tập mã môn sinh viên đã qua - không xếp lại.
+    profile: SolverProfile (giới hạn thời gian, số luồng, gap, seed, callback).
+    presolve: danh sách bước presolve chạy trước khi dựng model (None =
+    presolve.DEFAULT_STAGES, [] = tắt); báo cáo từng bước nằm trong stats['presolve'].
+
+    Trả về (các lớp được chọn, trạng thái CP-SAT: "OPTIMAL" | "FEASIBLE" |
+    "INFEASIBLE" | "UNKNOWN" (hết giờ mà chưa có lời giải) | "MODEL_INVALID").
+    """
+    t_build = time.perf_counter()
+    with span('plan.catalog') as sp:
+        catalog = _as_catalog(sections, conflict_mode)
+        sp.set(sections=len(catalog), cached=catalog is sections)
+    conflict_time = 0.0 if catalog is sections else catalog.conflict_time
+
+    completed = set(completed or ())
+    prereqs = PrereqIndex.of(prereqs)
+    presolve_report = [] if stats is not None else None
+    t_presolve = time.perf_counter()
+    with span('plan.presolve') as sp:
+        kept = run_presolve(np.arange(len(catalog)), PresolveContext(catalog, target_terms, completed, prereqs),
+                            presolve, presolve_report)
+        sp.set(kept=len(kept), removed=len(catalog) - len(kept))
+    presolve_time = time.perf_counter() - t_presolve
+
+    with span('plan.build') as sp:
+        pm = _build_model(catalog, kept, target_terms, credit_bounds, completed, prereqs)
+        _set_objective(pm, catalog.table, risk_dict, risk_weight)
+        sp.set(variables=len(pm.x), conflict_constraints=pm.n_conflicts, prereq_constraints=pm.n_prereqs)
+    build_time = time.perf_counter() - t_build
+
+    if stats is not None:
+        stats.update({
+            'presolve': presolve_report,
+            'presolve_time': presolve_time,
+            'conflict_mode': catalog.conflict_mode,
+            'conflict_time': conflict_time,
+            'build_time': build_time,
+        })
+    chosen, status, _ = _solve(pm, catalog.table, profile, stats)
+    return chosen, status
+
+PLANNER_STAGES = [stage for stage in DEFAULT_STAGES if stage is not drop_dominated]
+
+class IncrementalPlanner:
+    """
+    Bộ xếp lịch giữ model CP-SAT qua nhiều lần giải (vd. một phiên Streamlit).
+    Model được dựng một lần trên toàn catalog; mỗi lần sinh viên chỉnh đầu vào
+    chỉ sửa cận tín chỉ, miền biến của các môn bị bỏ / thêm và hàm mục tiêu,
+    rồi gợi ý (AddHint) lời giải trước cho solver.
+    presolve mặc định là PLANNER_STAGES: không có drop_dominated vì tiết bận
+    (set_busy) có thể chặn lớp trội trong khi lớp bị trội vẫn rảnh.
+    """
+    def __init__(self, sections, prereqs, target_terms, credit_bounds, risk_dict=None, risk_weight=5.0,
+                 completed=None, profile=None, presolve=None):
+        self.catalog = _as_catalog(sections)
+        self.prereqs = PrereqIndex.of(prereqs)
+        self.target_terms = list(target_terms)
+        self.profile = profile
+        t0 = time.perf_counter()
+        completed = set(completed or ())
+        self.completed = completed
+        # Các bước còn lại vẫn đúng khi đổi môn muốn học / tiết bận => presolve một lần là đủ
+        if presolve is None:
+            presolve = PLANNER_STAGES
+        kept = run_presolve(np.arange(len(self.catalog)),
+                            PresolveContext(self.catalog, self.target_terms, completed, self.prereqs), presolve)
+        self._pm = _build_model(self.catalog, kept, self.target_terms, credit_bounds, completed, self.prereqs)
+        self.build_time = time.perf_counter() - t0
+        proto = self._pm.model.Proto()
+        self._applied = {t: tuple(proto.constraints[ct.Index()].linear.domain)
+                         for t, ct in self._pm.credit_cts.items()}
+        self._default_bounds = dict(self._applied)
+        self.credit_bounds = dict(credit_bounds)
+        self.wanted = None
+        self.busy = 0
+        self._allowed = np.ones(len(self._pm.rows), dtype=bool)
+        self.risk_dict = risk_dict
+        self.risk_weight = risk_weight
+        self._objective_dirty = True
+        self._last = None
+
+    def _domain(self, proto_field, lo, hi):
+        proto_field[0] = lo
+        proto_field[1] = hi
+
+    def set_credit_bounds(self, credit_bounds):
+        self.credit_bounds.update(credit_bounds)
+
+    def _apply_bounds(self):
+        # Chỉ ghi lại miền của ràng buộc tín chỉ nào thực sự đổi. Kỳ catalog không
+        # mở lớp nào của các môn muốn học thì bỏ cận dưới, giống schedule_multi_term
+        # trên catalog chỉ gồm các môn đó (xét trên catalog, không theo dòng còn lại)
+        proto = self._pm.model.Proto()
+        open_terms = _open_terms(self.catalog.table, self.completed, self.wanted)
+        for t, ct in self._pm.credit_cts.items():
+            min_c, max_c = self.credit_bounds.get(t, self._default_bounds[t])
+            if t not in open_terms:
+                min_c, max_c = 0, max(int(max_c), 0)
+            bounds = (int(min_c), int(max_c))
+            if bounds != self._applied[t]:
+                self._domain(proto.constraints[ct.Index()].linear.domain, *bounds)
+                self._applied[t] = bounds
+
+    def _refresh_allowed(self):
+        table = self.catalog.table
+        allowed = np.ones(len(self._pm.rows), dtype=bool)
+        if self.wanted is not None:
+            allowed &= np.isin(table.course_codes[self._pm.rows], table.course_codes_of(self.wanted))
+        if self.busy:
+            allowed &= self.catalog.available(self.busy, self._pm.rows)
+        proto = self._pm.model.Proto()
+        for i in np.flatnonzero(allowed != self._allowed).tolist():
+            self._domain(proto.variables[int(self._pm.var_index[i])].domain, 0, 1 if allowed[i] else 0)
+        self._allowed = allowed
+
+    def set_wanted(self, course_ids):
+        """Chỉ cho phép chọn lớp của các môn trong course_ids (None = mọi môn)."""
+        wanted = None if course_ids is None else set(course_ids)
+        if wanted == self.wanted:
+            return
+        self.wanted = wanted
+        self._refresh_allowed()
+
+    def set_busy(self, busy):
+        """
+        Không chọn lớp đụng tiết bận: busy là mặt nạ tiết (int) của
+        catalog.CatalogIndex (slot_mask), 0 / None = rảnh mọi tiết.
+        """
+        busy = busy or 0
+        if busy == self.busy:
+            return
+        self.busy = busy
+        self._refresh_allowed()
+
+    def set_risks(self, risk_dict, risk_weight=None):
+        if risk_weight is None:
+            risk_weight = self.risk_weight
+        if risk_dict != self.risk_dict or risk_weight != self.risk_weight:
+            self.risk_dict = risk_dict
+            self.risk_weight = risk_weight
+            self._objective_dirty = True
+
+    def update(self, wanted=None, credit_bounds=None, risk_dict=None, risk_weight=None, busy=None):
+        if wanted is not None:
+            self.set_wanted(wanted)
+        if busy is not None:
+            self.set_busy(busy)
+        if credit_bounds is not None:
+            self.set_credit_bounds(credit_bounds)
+        if risk_dict is not None or risk_weight is not None:
+            self.set_risks(self.risk_dict if risk_dict is None else risk_dict, risk_weight)
+
+    def solve(self, stats=None):
+        t0 = time.perf_counter()
+        pm = self._pm
+        hinted = self._last is not None
+        with span('plan.update', hinted=hinted):
+            self._apply_bounds()
+            if self._objective_dirty:
+                _set_objective(pm, self.catalog.table, self.risk_dict, self.risk_weight)
+                self._objective_dirty = False
+            # Gợi ý lời giải trước (bỏ qua lớp vừa bị loại khỏi danh sách muốn học)
+            pm.model.ClearHints()
+            if hinted:
+                hint = np.isin(pm.rows, self._last)
+                for i in np.flatnonzero(self._allowed).tolist():
+                    pm.model.AddHint(pm.x[i], bool(hint[i]))
+        prep_time = time.perf_counter() - t0
+
+        chosen, status, chosen_rows = _solve(pm, self.catalog.table, self.profile, stats)
+        if chosen:
+            self._last = chosen_rows
+        if stats is not None:
+            stats.update({'build_time': prep_time, 'initial_build_time': self.build_time,
+                          'hinted': hinted})
+        return chosen, status
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.optimizer import SectionCatalog, schedule_multi_term
+from src.prereq_index import PrereqIndex
+
+DEFAULT_CACHE_PATH = os.path.join('cache', 'plans.sqlite')
+
+# Chỉ lưu kết quả đã được chứng minh: FEASIBLE / UNKNOWN phụ thuộc giới hạn thời gian
+CACHEABLE = ('OPTIMAL', 'INFEASIBLE')
+
+def _risk_key(risk):
+    # Cùng cách làm tròn với _set_objective (rủi ro * 100, cắt phần lẻ): hai bộ
+    # rủi ro cùng khóa cho ra đúng một model CP-SAT
+    return int(risk * 100)
+
+def _course_ids(values):
+    # Mã môn cho khóa: bỏ None / NaN / chuỗi rỗng (vd. dòng trống thêm vào st.data_editor)
+    return sorted({str(v).strip() for v in values
+                   if v is not None and v == v and str(v).strip()})
+
+def plan_key(catalog_fp, prereqs, target_terms, credit_bounds, risk_dict=None, risk_weight=5.0,
+             completed=None, model_version=None, wanted=None, course_ids=None, busy=None):
+    """
+    Khóa nội dung của một bài xếp lịch: sha256 của JSON chuẩn hóa (sắp xếp khóa)
+    gồm hash catalog, môn tiên quyết, kỳ, cận tín chỉ, rủi ro đã lượng tử hóa,
+    trọng số, môn đã qua, môn muốn học và phiên bản mô hình rủi ro.
+    course_ids: chỉ giữ rủi ro của các môn này (các môn có trong catalog) để
+    rủi ro của môn không liên quan không làm lệch khóa.
+    busy: mặt nạ tiết bận (CatalogIndex.slot_mask) - chỉ vào khóa khi khác 0.
+    Mã môn rỗng / NaN trong completed và wanted bị bỏ qua.
+    """
+    risks = risk_dict or {}
+    if course_ids is not None:
+        risks = {c: risks[c] for c in course_ids if c in risks}
+    index = PrereqIndex.of(prereqs)
+    payload = {
+        'catalog': catalog_fp,
+        'prereqs': sorted((c, sorted(ps)) for c, ps in index.direct.items()),
+        'terms': sorted(set(int(t) for t in target_terms)),
+        'bounds': sorted((int(t), int(lo), int(hi)) for t, (lo, hi) in credit_bounds.items()),
+        'risks': sorted((c, _risk_key(r)) for c, r in risks.items() if _risk_key(r)),
+        'risk_weight': int(risk_weight),
+        'completed': _course_ids(completed or ()),
+        'wanted': None if wanted is None else _course_ids(wanted),
+        'model': model_version,
+    }
+    if busy:
+        payload['busy'] = int(busy)
+    return hashlib.sha256(json.dumps(payload, separators=(',', ':'), default=str).encode()).hexdigest()
+
+def _plain(value):
+    # id kiểu NumPy (np.int64, np.str_) => kiểu Python để ghi JSON
+    return value.item()
+
+class PlanCache:
+    """
+    Cache kết quả xếp lịch theo khóa nội dung (plan_key): LRU trong bộ nhớ
+    (tối đa `capacity` mục) đứng trước kho SQLite trên đĩa (path=None => chỉ
+    bộ nhớ). Giá trị là (id các lớp được chọn, trạng thái).
+
+    bind(catalog_fp, model_version): khi catalog hoặc artifact mô hình đổi, xóa
+    các mục cũ ở cả hai tầng (khóa đã chứa hai giá trị này nên mục cũ không bao
+    giờ trúng, bind chỉ để giải phóng chỗ).
+    counters: hits (memory_hits + disk_hits), misses, stores, evictions, invalidations.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, capacity=1024):
+        self.path = path
+        self.capacity = capacity
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.catalog_fp = None
+        self.model_version = None
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0,
+                         'evictions': 0, 'invalidations': 0}
+        self._db = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            # Streamlit gọi từ nhiều luồng; mọi truy cập đều qua self._lock
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS plans (key TEXT PRIMARY KEY, catalog TEXT, model TEXT, "
+                "section_ids TEXT, status TEXT, created REAL)")
+            self._db.commit()
+
+    @property
+    def hits(self):
+        return self.counters['memory_hits'] + self.counters['disk_hits']
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters)
+            out['hits'] = out['memory_hits'] + out['disk_hits']
+            lookups = out['hits'] + out['misses']
+            out['hit_rate'] = out['hits'] / lookups if lookups else 0.0
+            out['memory_size'] = len(self._memory)
+            if self._db is not None:
+                out['disk_size'] = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            return out
+
+    def bind(self, catalog_fp, model_version=None):
+        """Gắn cache với catalog / phiên bản mô hình hiện tại; đổi => xóa mục cũ."""
+        with self._lock:
+            if (catalog_fp, model_version) == (self.catalog_fp, self.model_version):
+                return
+            self.catalog_fp, self.model_version = catalog_fp, model_version
+            self.counters['invalidations'] += len(self._memory)
+            self._memory.clear()
+            if self._db is not None:
+                cur = self._db.execute("DELETE FROM plans WHERE catalog IS NOT ? OR model IS NOT ?",
+                                       (catalog_fp, model_version))
+                self.counters['invalidations'] += cur.rowcount
+                self._db.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def get(self, key):
+        """(section_ids, status) hoặc None."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return value
+            if self._db is not None:
+                row = self._db.execute("SELECT section_ids, status FROM plans WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = (json.loads(row[0]), row[1])
+                    self._remember(key, value)
+                    self.counters['disk_hits'] += 1
+                    return value
+            self.counters['misses'] += 1
+            return None
+
+    def put(self, key, section_ids, status):
+        if status not in CACHEABLE:
+            return False
+        value = (list(section_ids), status)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                ids = json.dumps(value[0], default=_plain)
+                self._db.execute("INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?, ?)",
+                                 (key, self.catalog_fp, self.model_version, ids, status, time.time()))
+                self._db.commit()
+            self.counters['stores'] += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM plans")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+def cached_schedule(cache, sections, prereqs, target_terms, credit_bounds, risk_dict=None, risk_weight=5.0,
+                    completed=None, profile=None, model_version=None, stats=None):
+    """
+    schedule_multi_term có cache: trúng => dựng lại các Section từ id, không
+    dựng model / gọi solver. sections nên là SectionCatalog dựng sẵn để không
+    phải tính lại hash catalog mỗi lần. stats['cache'] = 'hit' | 'miss'.
+    """
+    catalog = sections if isinstance(sections, SectionCatalog) else SectionCatalog(sections)
+    catalog_fp = catalog.table.fingerprint()
+    cache.bind(catalog_fp, model_version)
+    key = plan_key(catalog_fp, prereqs, target_terms, credit_bounds, risk_dict, risk_weight, completed,
+                   model_version, course_ids=catalog.code_of)
+    hit = cache.get(key)
+    if hit is not None:
+        if stats is not None:
+            stats['cache'] = 'hit'
+        ids, status = hit
+        return [catalog.section_by_id(i) for i in ids], status
+
+    chosen, status = schedule_multi_term(catalog, prereqs, target_terms, credit_bounds, risk_dict, risk_weight,
+                                         stats=stats, completed=completed, profile=profile)
+    cache.put(key, [s.id for s in chosen], status)
+    if stats is not None:
+        stats['cache'] = 'miss'
+    return chosen, status
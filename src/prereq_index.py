@@ -0,0 +1,90 @@
+class PrereqIndex:
+    """
+    Index đồ thị môn tiên quyết (DAG), dựng MỘT lần rồi dùng lại:
+    thứ tự topo, bao đóng bắc cầu (mọi môn tiên quyết gián tiếp) và kỳ sớm
+    nhất có thể học mỗi môn - dùng để loại các lớp không thể chọn trước khi dựng model.
+    prereqs: dict {môn: [môn tiên quyết, ...]}.
+    """
+    def __init__(self, prereqs=None):
+        self.direct = {c: tuple(ps) for c, ps in (prereqs or {}).items() if ps}
+        self.courses = set(self.direct)
+        for ps in self.direct.values():
+            self.courses.update(ps)
+        self.order = self._topological_order()
+
+        # Bao đóng: duyệt theo thứ tự topo nên môn tiên quyết luôn có trước
+        self.closure = {}
+        for c in self.order:
+            acc = set()
+            for p in self.direct.get(c, ()):
+                acc.add(p)
+                acc |= self.closure[p]
+            self.closure[c] = frozenset(acc)
+
+    @classmethod
+    def of(cls, prereqs):
+        return prereqs if isinstance(prereqs, cls) else cls(prereqs)
+
+    def _topological_order(self):
+        # Kahn: môn không còn tiên quyết nào chưa xếp thì được xếp trước
+        indegree = {c: len(self.direct.get(c, ())) for c in self.courses}
+        dependents = {}
+        for c, ps in self.direct.items():
+            for p in ps:
+                dependents.setdefault(p, []).append(c)
+        ready = sorted(c for c, d in indegree.items() if d == 0)
+        order = []
+        while ready:
+            c = ready.pop()
+            order.append(c)
+            for d in dependents.get(c, ()):
+                indegree[d] -= 1
+                if indegree[d] == 0:
+                    ready.append(d)
+        if len(order) != len(self.courses):
+            cycle = sorted(c for c, d in indegree.items() if d > 0)
+            raise ValueError(f"Môn tiên quyết bị lặp vòng: {cycle}")
+        return order
+
+    def __bool__(self):
+        return bool(self.direct)
+
+    def prereqs_of(self, course):
+        return self.direct.get(course, ())
+
+    def all_prereqs(self, course):
+        return self.closure.get(course, frozenset())
+
+    def missing(self, course, completed):
+        """Các môn tiên quyết (kể cả gián tiếp) sinh viên chưa học."""
+        return self.all_prereqs(course) - set(completed)
+
+    def earliest_terms(self, offered_terms, completed=()):
+        """
+        Kỳ sớm nhất có thể học mỗi môn, tính theo các kỳ môn đó thực sự mở lớp.
+        offered_terms: dict {môn: các kỳ có lớp}. Môn có môn tiên quyết không
+        thể hoàn thành (không mở lớp, chưa học) => None.
+        """
+        completed = set(completed)
+        earliest = {}
+
+        def resolve(c):
+            # Môn tiên quyết chưa học phải xong ở kỳ trước => lấy kỳ mở lớp đầu tiên sau đó
+            ready_after = None
+            for p in self.direct.get(c, ()):
+                if p in completed:
+                    continue
+                t_p = earliest.get(p)
+                if t_p is None:
+                    return None
+                ready_after = t_p if ready_after is None else max(ready_after, t_p)
+            terms = [t for t in offered_terms.get(c, ()) if ready_after is None or t > ready_after]
+            return min(terms) if terms else None
+
+        for c in self.order:
+            if c not in completed:
+                earliest[c] = resolve(c)
+        for c in offered_terms:
+            if c not in self.courses and c not in completed:
+                earliest[c] = min(offered_terms[c])
+        return earliest
@@ -0,0 +1,134 @@
+import time
+
+import numpy as np
+
+from src.prereq_index import PrereqIndex
+
+class PresolveContext:
+    """Dữ liệu các bước presolve cần: catalog (bảng cột + clique trùng giờ dùng chung), kỳ cần xếp, môn đã qua, tiên quyết."""
+    def __init__(self, catalog, target_terms, completed=(), prereqs=None):
+        self.catalog = catalog
+        self.table = catalog.table
+        self.target_terms = sorted(set(target_terms))
+        self.completed = set(completed)
+        self.prereqs = PrereqIndex.of(prereqs)
+
+# Mỗi bước nhận và trả về mảng chỉ số dòng (của catalog.table) còn giữ lại
+
+def drop_completed(rows, ctx):
+    """Lớp của môn đã qua."""
+    if not ctx.completed:
+        return rows
+    return rows[~np.isin(ctx.table.course_codes[rows], ctx.table.course_codes_of(ctx.completed))]
+
+def drop_off_horizon(rows, ctx):
+    """Lớp mở ở kỳ ngoài target_terms."""
+    return rows[np.isin(ctx.table.term[rows], ctx.target_terms)]
+
+def drop_unreachable(rows, ctx):
+    """Lớp mở trước kỳ sớm nhất học được môn đó (chưa kịp học xong môn tiên quyết)."""
+    if not ctx.prereqs or not len(rows):
+        return rows
+    table = ctx.table
+    codes, terms = table.course_codes[rows], table.term[rows]
+    offered = {}
+    for code, t in np.unique(np.column_stack([codes, terms]), axis=0).tolist():
+        offered.setdefault(table.course_ids[code], []).append(t)
+    earliest = ctx.prereqs.earliest_terms(offered, ctx.completed)
+    # Môn không thể học (None) => kỳ sớm nhất = vô cùng
+    by_code = np.array([earliest.get(c) if earliest.get(c) is not None else np.inf
+                        for c in table.course_ids.tolist()])
+    return rows[terms >= by_code[codes]]
+
+def dedupe_identical(rows, ctx):
+    """Gộp các lớp giống hệt nhau (cùng môn, kỳ, thứ, giờ, tín chỉ) - giữ lớp đầu tiên."""
+    if not len(rows):
+        return rows
+    t = ctx.table
+    keys = np.column_stack([t.course_codes[rows], t.term[rows], t.day_code[rows],
+                            t.start[rows], t.end[rows], t.credits[rows]])
+    _, first = np.unique(keys, axis=0, return_index=True)
+    return rows[np.sort(first)]
+
+def drop_dominated(rows, ctx):
+    """
+    Bỏ lớp bị trội: cùng môn, kỳ và tín chỉ với lớp khác nhưng trùng giờ với
+    nhiều lựa chọn hơn. Mọi lời giải dùng lớp bị trội đều đổi được sang lớp
+    trội mà không đổi hàm mục tiêu.
+    """
+    if not len(rows):
+        return rows
+    t = ctx.table
+    codes = t.course_codes
+    _, group, counts = np.unique(np.column_stack([codes[rows], t.term[rows], t.credits[rows]]), axis=0,
+                                 return_inverse=True, return_counts=True)
+    group = group.reshape(-1)
+    candidates = rows[counts[group] > 1]
+    if not len(candidates):
+        return rows
+
+    # So tập clique (đã tính sẵn trong catalog) thay vì tập lớp trùng giờ: clique của
+    # k nằm trong clique của r => lớp trùng giờ với k cũng trùng với r. Mỗi lớp chỉ
+    # thuộc vài clique nên bộ nhớ tuyến tính, không bùng nổ khi clique lớn.
+    alive = np.zeros(len(t), dtype=bool)
+    alive[rows] = True
+    is_candidate = np.zeros(len(t), dtype=bool)
+    is_candidate[candidates] = True
+    cliques_of = {r: set() for r in candidates.tolist()}
+    for ci, clique in enumerate(ctx.catalog.conflicts):
+        members = clique[alive[clique]]
+        # Clique chỉ còn một môn thì không gây xung đột với lớp nào khác môn
+        if len(members) < 2 or not is_candidate[members].any() or (codes[members] == codes[members[0]]).all():
+            continue
+        for a in members[is_candidate[members]].tolist():
+            cliques_of[a].add(ci)
+
+    dropped = set()
+    group_of = dict(zip(rows.tolist(), group.tolist()))
+    by_group = {}
+    for r in candidates.tolist():
+        by_group.setdefault(group_of[r], []).append(r)
+    for members in by_group.values():
+        # Ít clique trước => lớp trội luôn được xét (và giữ) trước
+        kept = []
+        for r in sorted(members, key=lambda r: len(cliques_of[r])):
+            if any(cliques_of[k] <= cliques_of[r] for k in kept):
+                dropped.add(r)
+            else:
+                kept.append(r)
+    if not dropped:
+        return rows
+    return rows[~np.isin(rows, list(dropped))]
+
+DEFAULT_STAGES = [drop_completed, drop_off_horizon, drop_unreachable, dedupe_identical, drop_dominated]
+
+def _count_constraints(rows, ctx):
+    # Ước lượng số ràng buộc model: 1 / môn + 1 / clique trùng giờ còn >= 2 lớp
+    alive = np.zeros(len(ctx.table), dtype=bool)
+    alive[rows] = True
+    n_conflicts = sum(1 for clique in ctx.catalog.conflicts if np.count_nonzero(alive[clique]) >= 2)
+    return len(np.unique(ctx.table.course_codes[rows])) + n_conflicts
+
+def run_presolve(rows, ctx, stages=None, report=None):
+    """
+    Chạy lần lượt các bước presolve (hàm (rows, ctx) -> rows) trước khi dựng model.
+    report: list (tùy chọn) nhận mỗi bước một dict: tên, số biến / ràng buộc đã bỏ, thời gian.
+    """
+    stages = DEFAULT_STAGES if stages is None else stages
+    rows = np.asarray(rows, dtype=np.int64)
+    n_constraints = _count_constraints(rows, ctx) if report is not None else 0
+    for stage in stages:
+        t0 = time.perf_counter()
+        before = len(rows)
+        rows = stage(rows, ctx)
+        elapsed = time.perf_counter() - t0
+        if report is not None:
+            after_constraints = _count_constraints(rows, ctx)
+            report.append({
+                'stage': getattr(stage, '__name__', repr(stage)),
+                'variables_removed': before - len(rows),
+                'constraints_removed': n_constraints - after_constraints,
+                'time': elapsed,
+            })
+            n_constraints = after_constraints
+    return rows
@@ -0,0 +1,224 @@
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from src.optimizer import (SolverProfile, _as_catalog, _build_model, _open_terms, _set_objective, _solve,
+                           plan_objective, schedule_multi_term)
+from src.prereq_index import PrereqIndex
+from src.presolve import PresolveContext, run_presolve
+from src.tracing import span
+
+FOUND = ('OPTIMAL', 'FEASIBLE')
+
+class _Budget:
+    # Chia thời gian còn lại đều cho các lần giải còn lại (None = không giới hạn)
+    def __init__(self, seconds):
+        self.deadline = None if seconds is None else time.perf_counter() + seconds
+
+    def remaining(self):
+        return None if self.deadline is None else max(0.0, self.deadline - time.perf_counter())
+
+    def share(self, parts, until=None):
+        end = self.deadline if until is None else until
+        if end is None:
+            return None
+        return max(0.0, end - time.perf_counter()) / max(1, parts)
+
+def _sub_model(catalog, prereqs, terms, credit_bounds, completed, excluded=(), required=(), presolve=None,
+               open_terms=None):
+    """
+    Model CP-SAT chỉ cho các kỳ `terms`: môn trong completed coi như đã qua
+    (đã được chốt ở kỳ trước), môn trong excluded không được chọn (đã chốt ở
+    kỳ sau), môn trong required bắt buộc chọn (là tiên quyết của môn đã chốt ở kỳ sau).
+    open_terms: các kỳ có ràng buộc tín chỉ, tính từ completed ban đầu (như
+    model nguyên khối) chứ không từ các môn đã chốt.
+    """
+    table = catalog.table
+    kept = run_presolve(np.arange(len(catalog)), PresolveContext(catalog, terms, completed, prereqs), presolve)
+    if excluded:
+        kept = kept[~np.isin(table.course_codes[kept], table.course_codes_of(excluded))]
+    pm = _build_model(catalog, kept, terms, credit_bounds, completed, prereqs, open_terms)
+    codes = table.course_codes[pm.rows]
+    for code in table.course_codes_of(required).tolist():
+        # Không còn lớp nào => sum([]) == 1, model vô nghiệm
+        pm.model.Add(cp_model.LinearExpr.Sum([pm.x[i] for i in np.flatnonzero(codes == code).tolist()]) == 1)
+    return pm
+
+def _profile(max_time, num_workers, seed):
+    return SolverProfile(max_time=max_time, num_workers=num_workers, seed=seed)
+
+def _rolling(catalog, prereqs, terms, credit_bounds, risk_dict, risk_weight, completed, window, budget,
+             until, num_workers, seed, presolve, report):
+    # Giải cửa sổ `window` kỳ, chốt kỳ đầu, trượt cửa sổ; cửa sổ cuối chốt hết
+    table = catalog.table
+    fixed = np.empty(0, dtype=np.int64)
+    done = set(completed)
+    open_terms = _open_terms(table, completed)
+    start = 0
+    while start < len(terms):
+        win = terms[start:start + window]
+        last = start + window >= len(terms)
+        pm = _sub_model(catalog, prereqs, win, credit_bounds, done, presolve=presolve, open_terms=open_terms)
+        _set_objective(pm, table, risk_dict, risk_weight)
+        stats = {}
+        windows_left = len(terms) - start - window + 1 if not last else 1
+        with span('plan.rolling.window', first=int(win[0]), last=int(win[-1])):
+            _, status, rows = _solve(pm, table, _profile(budget.share(windows_left, until), num_workers, seed),
+                                     stats)
+        report.append({'terms': [int(t) for t in win], 'status': status, 'solve_time': stats['solve_time'],
+                       'num_variables': stats['num_variables'], 'objective': stats['objective']})
+        if status not in FOUND:
+            return None, status
+        keep = rows if last else rows[table.term[rows] == win[0]]
+        fixed = np.concatenate([fixed, keep])
+        done.update(table.course_ids[table.course_codes[keep]].tolist())
+        if last:
+            break
+        start += 1
+    return fixed, 'OPTIMAL' if len(terms) <= window and report[-1]['status'] == 'OPTIMAL' else 'FEASIBLE'
+
+def _lns(catalog, prereqs, terms, credit_bounds, risk_dict, risk_weight, completed, plan, rounds, size, budget,
+         num_workers, seed, rng, presolve, report):
+    # Mỗi vòng thả tự do `size` kỳ liên tiếp, chốt phần còn lại, giải lại với gợi ý là lời giải hiện tại
+    table = catalog.table
+    index = PrereqIndex.of(prereqs)
+    open_terms = _open_terms(table, completed)
+    best = plan_objective(table, plan, risk_dict, risk_weight)
+    size = min(size, len(terms))
+    for r in range(rounds):
+        if budget.remaining() == 0.0:
+            break
+        a = int(rng.integers(0, len(terms) - size + 1))
+        free = terms[a:a + size]
+        plan_terms = table.term[plan]
+        inside = np.isin(plan_terms, free)
+        course_of = table.course_ids[table.course_codes[plan]]
+        before = set(course_of[plan_terms < free[0]].tolist())
+        after = set(course_of[plan_terms > free[-1]].tolist())
+        chosen_inside = set(course_of[inside].tolist())
+        required = {p for c in after for p in index.prereqs_of(c) if p in chosen_inside}
+
+        pm = _sub_model(catalog, prereqs, free, credit_bounds, set(completed) | before, after, required, presolve,
+                        open_terms)
+        _set_objective(pm, table, risk_dict, risk_weight)
+        hint = np.isin(pm.rows, plan[inside])
+        for i, v in enumerate(hint.tolist()):
+            pm.model.AddHint(pm.x[i], v)
+        stats = {}
+        with span('plan.rolling.lns', first=int(free[0]), last=int(free[-1])):
+            round_seed = None if seed is None else seed + r
+            _, status, rows = _solve(pm, table, _profile(budget.share(rounds - r), num_workers, round_seed),
+                                     stats)
+        candidate = np.concatenate([plan[~inside], rows]) if status in FOUND else plan
+        value = plan_objective(table, candidate, risk_dict, risk_weight)
+        improved = value > best
+        report.append({'terms': [int(t) for t in free], 'status': status, 'solve_time': stats['solve_time'],
+                       'objective': value, 'improved': improved})
+        if improved:
+            plan, best = candidate, value
+    return plan
+
+def schedule_rolling(sections, prereqs, target_terms, credit_bounds, risk_dict=None, risk_weight=5.0, window=3,
+                     completed=None, time_budget=None, lns_rounds=0, lns_size=2, lns_share=0.3, num_workers=None,
+                     seed=0, stats=None, presolve=None):
+    """
+    Xếp lịch nhiều kỳ (vd. 8-10 kỳ của cả chương trình) theo cửa sổ trượt thay
+    vì một model CP-SAT chứa mọi kỳ: giải `window` kỳ liên tiếp, chốt kỳ đầu
+    (môn đã chốt coi như đã qua ở các cửa sổ sau) rồi trượt sang kỳ kế tiếp.
+    Cùng ràng buộc và hàm mục tiêu với schedule_multi_term nên lời giải luôn
+    hợp lệ với model đầy đủ, nhưng không đảm bảo tối ưu toàn cục.
+
+    lns_rounds: số vòng tinh chỉnh LNS sau khi trượt xong - mỗi vòng thả tự
+    do lns_size kỳ liên tiếp chọn ngẫu nhiên (theo seed), giữ nguyên các kỳ
+    khác, chỉ nhận lời giải tốt hơn.
+    time_budget: tổng thời gian giải (giây, None = không giới hạn); LNS dùng
+    phần lns_share, cửa sổ trượt dùng phần còn lại, chia đều cho từng lần giải.
+    stats: dict (tùy chọn) nhận 'windows', 'lns' (báo cáo từng lần giải),
+    'objective', 'rolling_objective', 'rolling_time', 'lns_time', 'wall_time'.
+
+    Trả về (các lớp được chọn, trạng thái): "OPTIMAL" chỉ khi một cửa sổ phủ
+    hết các kỳ (tức là giải nguyên khối); cửa sổ nào không có lời giải =>
+    ([], trạng thái của cửa sổ đó) - có thể do các kỳ đã chốt trước đó chứ
+    không hẳn bài toán gốc vô nghiệm.
+    """
+    t0 = time.perf_counter()
+    catalog = _as_catalog(sections)
+    table = catalog.table
+    prereqs = PrereqIndex.of(prereqs)
+    completed = set(completed or ())
+    terms = sorted(set(target_terms))
+    window = max(1, int(window))
+    budget = _Budget(time_budget)
+    rolling_until = None
+    if time_budget is not None and lns_rounds:
+        rolling_until = budget.deadline - time_budget * lns_share
+
+    windows, rounds = [], []
+    plan, status = _rolling(catalog, prereqs, terms, credit_bounds, risk_dict, risk_weight, completed, window,
+                            budget, rolling_until, num_workers, seed, presolve, windows)
+    rolling_time = time.perf_counter() - t0
+    rolling_objective = None if plan is None else plan_objective(table, plan, risk_dict, risk_weight)
+
+    t_lns = time.perf_counter()
+    if plan is not None and lns_rounds and len(terms) > 1:
+        plan = _lns(catalog, prereqs, terms, credit_bounds, risk_dict, risk_weight, completed, plan, lns_rounds,
+                    lns_size, budget, num_workers, seed, np.random.default_rng(seed), presolve, rounds)
+    lns_time = time.perf_counter() - t_lns
+
+    objective = None if plan is None else plan_objective(table, plan, risk_dict, risk_weight)
+    if status == 'OPTIMAL' and objective != rolling_objective:
+        status = 'FEASIBLE'
+    if stats is not None:
+        stats.update({
+            'windows': windows,
+            'lns': rounds,
+            'status': status,
+            'objective': objective,
+            'rolling_objective': rolling_objective,
+            'rolling_time': rolling_time,
+            'lns_time': lns_time,
+            'wall_time': time.perf_counter() - t0,
+        })
+    if plan is None:
+        return [], status
+    plan = plan[np.lexsort((table.start[plan], table.day_code[plan], table.term[plan]))]
+    return table.sections(plan.tolist()), status
+
+def compare_with_monolithic(sections, prereqs, target_terms, credit_bounds, risk_dict=None, risk_weight=5.0,
+                            completed=None, time_budget=60.0, num_workers=None, seed=0, **rolling_kwargs):
+    """
+    So sánh schedule_rolling với schedule_multi_term (nguyên khối) trên cùng
+    bài toán, mỗi cách được time_budget giây.
+    gap = (mục tiêu nguyên khối - mục tiêu cửa sổ trượt) / |mục tiêu nguyên
+    khối| - chỉ có khi lời giải nguyên khối là OPTIMAL (khi chỉ FEASIBLE,
+    gap âm là bình thường); bound_gap so với cận trên của nguyên khối (luôn là
+    chặn trên của khoảng cách tới tối ưu khi solver có cận).
+    """
+    catalog = _as_catalog(sections)
+    mono = {}
+    t0 = time.perf_counter()
+    schedule_multi_term(catalog, prereqs, target_terms, credit_bounds, risk_dict, risk_weight, stats=mono,
+                        completed=completed, profile=_profile(time_budget, num_workers, seed))
+    mono_time = time.perf_counter() - t0
+    rolling = {}
+    schedule_rolling(catalog, prereqs, target_terms, credit_bounds, risk_dict, risk_weight, completed=completed,
+                     time_budget=time_budget, num_workers=num_workers, seed=seed, stats=rolling, **rolling_kwargs)
+
+    def relative(reference, value):
+        if reference is None or value is None:
+            return None
+        return (reference - value) / max(1.0, abs(reference))
+
+    return {
+        'monolithic_status': mono['status'],
+        'monolithic_objective': mono['objective'],
+        'monolithic_bound': mono['best_bound'],
+        'monolithic_time': mono_time,
+        'rolling_status': rolling['status'],
+        'rolling_objective': rolling['objective'],
+        'rolling_time': rolling['wall_time'],
+        'gap': relative(mono['objective'], rolling['objective']) if mono['status'] == 'OPTIMAL' else None,
+        'bound_gap': relative(mono['best_bound'], rolling['objective']),
+        'speedup': mono_time / rolling['wall_time'] if rolling['wall_time'] else None,
+    }
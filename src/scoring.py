@@ -0,0 +1,102 @@
+import numpy as np
+
+from src.tracing import span
+
+FEATURES = ['student_gpa_avg', 'course_difficulty', 'course_credits']
+BACKENDS = ('torch', 'torchscript', 'onnx', 'numpy')
+
+class RiskScorer:
+    """
+    Chấm rủi ro theo lô cho nhiều cặp (sinh viên, môn) cùng lúc.
+    Một lần forward trong torch.inference_mode() cho mỗi chunk thay vì gọi
+    infer_risk cho từng môn; chunk_size giới hạn bộ nhớ khi N_sv x N_môn lớn.
+
+    model: RiskPredictor / module TorchScript, hoặc runtime có predict(X)
+    (NumpyRiskPredictor, OnnxRiskPredictor) - khi đó không cần import torch.
+    """
+    def __init__(self, model, chunk_size=65536, features=FEATURES):
+        self.model = model
+        self.chunk_size = chunk_size
+        self.features = list(features)
+        self._torch = not hasattr(model, 'predict')
+        if self._torch:
+            model.eval()
+
+    def _forward(self, X, out):
+        if not self._torch:
+            for i in range(0, len(X), self.chunk_size):
+                chunk = X[i:i + self.chunk_size]
+                out[i:i + len(chunk)] = self.model.predict(chunk)
+            return
+        import torch
+        with torch.inference_mode():
+            for i in range(0, len(X), self.chunk_size):
+                chunk = torch.from_numpy(X[i:i + self.chunk_size])
+                out[i:i + len(chunk)] = self.model(chunk).reshape(-1).numpy()
+
+    def pass_prob(self, X):
+        """X: mảng (n, in_dim) hoặc DataFrame có các cột features => xác suất qua môn (n,)."""
+        if hasattr(X, 'columns'):
+            X = X[self.features].to_numpy(dtype=np.float32)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=np.float32)
+        with span('risk.score', rows=len(X)):
+            self._forward(X, out)
+        return out
+
+    def fail_prob(self, X):
+        return 1.0 - self.pass_prob(X)
+
+    def risk_matrix(self, gpas, difficulty, credits):
+        """
+        Rủi ro trượt cho MỌI cặp (sinh viên, môn): ma trận (N_sv, N_môn).
+        gpas: (N_sv,), difficulty / credits: (N_môn,).
+        Đầu vào dựng theo từng chunk vào một buffer (chunk_size, 3) dùng lại =>
+        bộ nhớ ngoài kết quả không tăng theo N_sv x N_môn.
+        """
+        gpas = np.asarray(gpas, dtype=np.float32).reshape(-1)
+        difficulty = np.asarray(difficulty, dtype=np.float32).reshape(-1)
+        credits = np.asarray(credits, dtype=np.float32).reshape(-1)
+        n_s, n_c = len(gpas), len(difficulty)
+        out = np.empty(n_s * n_c, dtype=np.float32)
+        X = np.empty((min(self.chunk_size, len(out)), 3), dtype=np.float32)
+        with span('risk.score', rows=len(out)):
+            for a in range(0, len(out), self.chunk_size):
+                b = min(a + self.chunk_size, len(out))
+                # Cặp thứ k (theo hàng) = (sinh viên k // N_môn, môn k % N_môn)
+                k = np.arange(a, b)
+                student, course = k // n_c, k % n_c
+                chunk = X[:b - a]
+                chunk[:, 0] = gpas[student]
+                chunk[:, 1] = difficulty[course]
+                chunk[:, 2] = credits[course]
+                self._forward(chunk, out[a:b])
+        np.subtract(1.0, out, out=out)
+        return out.reshape(n_s, n_c)
+
+    def risk_dict(self, gpa, courses_df, id_col='id', difficulty_col='difficulty', credits_col='credits'):
+        """Dict {mã môn: rủi ro trượt} cho 1 sinh viên - đầu vào risk_dict của schedule_multi_term."""
+        risks = self.risk_matrix([gpa], courses_df[difficulty_col].to_numpy(), courses_df[credits_col].to_numpy())[0]
+        return dict(zip(courses_df[id_col].tolist(), risks.tolist()))
+
+def load_scorer(path, backend='numpy', **kwargs):
+    """
+    Nạp mô hình đã export theo backend rồi bọc thành RiskScorer.
+    'numpy' (.npz) và 'onnx' (.onnx) không import torch; 'torchscript' (.ts)
+    và 'torch' (artifact của model_store) cần torch.
+    """
+    if backend == 'numpy':
+        from src.np_runtime import NumpyRiskPredictor
+        model = NumpyRiskPredictor.load(path)
+    elif backend == 'onnx':
+        from src.np_runtime import OnnxRiskPredictor
+        model = OnnxRiskPredictor(path)
+    elif backend == 'torchscript':
+        import torch
+        model = torch.jit.load(path, map_location='cpu')
+    elif backend == 'torch':
+        from src.model_store import load_model
+        model, _ = load_model(path)
+    else:
+        raise ValueError(f"backend không hợp lệ: {backend!r} (chọn một trong {BACKENDS})")
+    return RiskScorer(model, **kwargs)
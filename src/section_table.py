@@ -0,0 +1,132 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+class Section:
+    __slots__ = ('id', 'course_id', 'term', 'day', 'start', 'end', 'credits')
+
+    def __init__(self, id, course_id, term, day, start, end, credits):
+        self.id = id
+        self.course_id = course_id
+        self.term = term
+        self.day = day
+        self.start = start
+        self.end = end
+        self.credits = credits
+
+    def __repr__(self):
+        return f"Section({self.id}, {self.day} {self.start}-{self.end})"
+
+def _csr(keys, n_keys):
+    """Nhóm các dòng theo khóa nguyên [0, n_keys): (order, offsets) - dòng của khóa k là order[offsets[k]:offsets[k+1]]."""
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+    return order, offsets
+
+class SectionTable:
+    """
+    Bảng lớp học phần dạng cột NumPy: term, day_code, start, end, credits và mã
+    môn đã intern thành số (course_codes -> course_ids). Nhóm theo môn và theo
+    (kỳ, thứ) được tính sẵn dạng offsets, không cần tạo đối tượng Section cho
+    từng dòng; Section chỉ được tạo cho các lớp được chọn.
+    """
+    def __init__(self, ids, course_codes, course_ids, term, day_code, days, start, end, credits):
+        self.ids = ids
+        self.course_codes = np.asarray(course_codes)
+        self.course_ids = np.asarray(course_ids, dtype=object)
+        self.term = np.asarray(term)
+        self.day_code = np.asarray(day_code)
+        self.days = list(days)
+        self.start = np.asarray(start)
+        self.end = np.asarray(end)
+        self.credits = np.asarray(credits)
+        self._by_course = None
+        self._by_term_day = None
+        self._fingerprint = None
+
+    @classmethod
+    def from_columns(cls, ids, course_id, term, day, start, end, credits):
+        course_codes, course_ids = pd.factorize(np.asarray(course_id, dtype=object))
+        day = np.asarray(day, dtype=object)
+        days = DAYS + sorted(set(day.tolist()) - set(DAYS))
+        day_code = pd.Index(days).get_indexer(day).astype(np.int8)
+        return cls(np.asarray(ids, dtype=object), course_codes.astype(np.int32), course_ids,
+                   term, day_code, days, start, end, credits)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Cột số (term, start, end, credits) dùng lại bộ nhớ của DataFrame, không sao chép."""
+        return cls.from_columns(df['id'].to_numpy(), df['course_id'].to_numpy(), df['term'].to_numpy(),
+                                df['day'].to_numpy(), df['start'].to_numpy(), df['end'].to_numpy(),
+                                df['credits'].to_numpy())
+
+    @classmethod
+    def from_sections(cls, sections):
+        sections = list(sections)
+        return cls.from_columns([s.id for s in sections], [s.course_id for s in sections],
+                                np.array([s.term for s in sections], dtype=np.int64),
+                                [s.day for s in sections],
+                                np.array([s.start for s in sections], dtype=np.int64),
+                                np.array([s.end for s in sections], dtype=np.int64),
+                                np.array([s.credits for s in sections], dtype=np.int64))
+
+    def __len__(self):
+        return len(self.term)
+
+    @property
+    def n_courses(self):
+        return len(self.course_ids)
+
+    def course_of(self, row):
+        return self.course_ids[self.course_codes[row]]
+
+    def section(self, row):
+        return Section(self.ids[row], self.course_ids[self.course_codes[row]], int(self.term[row]),
+                       self.days[self.day_code[row]], int(self.start[row]), int(self.end[row]),
+                       int(self.credits[row]))
+
+    def sections(self, rows):
+        return [self.section(i) for i in rows]
+
+    def course_codes_of(self, course_ids):
+        """Mã số của các môn (bỏ qua môn không có trong bảng)."""
+        idx = pd.Index(self.course_ids).get_indexer(list(course_ids))
+        return idx[idx >= 0]
+
+    def by_course(self):
+        """(order, offsets): các dòng của môn mã k."""
+        if self._by_course is None:
+            self._by_course = _csr(self.course_codes, self.n_courses)
+        return self._by_course
+
+    def by_term_day(self):
+        """(order, offsets, keys): mỗi nhóm (kỳ, thứ) là order[offsets[g]:offsets[g+1]]."""
+        if self._by_term_day is None:
+            key = self.term.astype(np.int64) * len(self.days) + self.day_code
+            keys, codes = np.unique(key, return_inverse=True)
+            order, offsets = _csr(codes.reshape(-1), len(keys))
+            self._by_term_day = (order, offsets, keys)
+        return self._by_term_day
+
+    def fingerprint(self):
+        """Hash nội dung bảng (đổi bất kỳ lớp nào => đổi hash), tính một lần - dùng làm khóa cache."""
+        if self._fingerprint is None:
+            h = hashlib.sha256()
+            for labels in (self.ids, self.course_ids, self.days):
+                h.update('\x1f'.join(map(str, list(labels))).encode())
+                h.update(b'\x1e')
+            for col in (self.course_codes, self.term, self.day_code, self.start, self.end, self.credits):
+                h.update(np.ascontiguousarray(col, dtype=np.int64).tobytes())
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    def to_dataframe(self):
+        return pd.DataFrame({
+            'id': self.ids, 'course_id': self.course_ids[self.course_codes], 'term': self.term,
+            'day': np.asarray(self.days, dtype=object)[self.day_code], 'start': self.start,
+            'end': self.end, 'credits': self.credits,
+        })
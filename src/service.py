@@ -0,0 +1,358 @@
+"""
+Dịch vụ HTTP/JSON (asyncio, chỉ dùng thư viện chuẩn) quanh chấm rủi ro và
+schedule_multi_term, chạy hoàn toàn cục bộ:
+
+    python -m src.service --port 8080 --workers 4 --max-queue 64
+
+    POST /plan    {"gpa": 2.8, "completed": [...], "min_credits": 4, "max_credits": 30, "deadline": 5}
+    POST /risk    {"gpa": 2.8}
+    GET  /health
+    GET  /metrics (Prometheus text)
+
+Bài giải chạy trong process pool có giới hạn; các request giống hệt nhau đang
+chờ được gộp vào một lần giải kết thúc không sớm hơn hạn của chúng; hàng đợi
+đầy => 503 + Retry-After; quá hạn => 504; trường sai kiểu => 400 (code "invalid_field").
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.batch import _init_worker, _solve_student
+from src.optimizer import SectionCatalog, SolverProfile
+from src.plan_cache import plan_key
+from src.prereq_index import PrereqIndex
+
+class ServiceError(Exception):
+    # code: mã lỗi máy đọc được trong body ({"error": ..., "code": ...}), mặc định theo status
+    def __init__(self, status, message, headers=None, code=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+        self.code = code or ERROR_CODES.get(status, 'error')
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable',
+           504: 'Gateway Timeout'}
+ERROR_CODES = {400: 'bad_request', 404: 'not_found', 405: 'method_not_allowed', 413: 'payload_too_large',
+               500: 'internal_error', 503: 'queue_full', 504: 'deadline_exceeded'}
+MAX_BODY = 1 << 20
+
+class PlanningService:
+    """
+    catalog: SectionCatalog dùng chung (gửi một lần cho mỗi worker qua initializer).
+    courses_df: bảng môn (id, difficulty, credits) để chấm rủi ro; scorer: RiskScorer.
+    max_workers: số process giải; max_queue: số bài giải (không tính request
+    được gộp) đang chờ + đang chạy tối đa, vượt => từ chối ngay (503).
+    deadline: hạn mặc định (giây) của mỗi request, request có thể tự đặt ngắn hơn.
+    cache: PlanCache (tùy chọn) dùng chung với batch / Streamlit.
+    """
+    def __init__(self, catalog, prereqs, courses_df, scorer, target_terms=(1, 2, 3), default_bounds=(4, 30),
+                 risk_weight=10.0, max_workers=None, max_queue=None, deadline=10.0, profile=None,
+                 cache=None, model_version=None):
+        self.catalog = catalog if isinstance(catalog, SectionCatalog) else SectionCatalog(catalog)
+        self.prereqs = PrereqIndex.of(prereqs)
+        self.courses_df = courses_df
+        self.scorer = scorer
+        self.target_terms = list(target_terms)
+        self.default_bounds = default_bounds
+        self.risk_weight = risk_weight
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue or self.max_workers * 4
+        self.deadline = deadline
+        self.profile = profile or SolverProfile(num_workers=1)
+        self.cache = cache
+        self.model_version = model_version
+        self._catalog_fp = self.catalog.table.fingerprint()
+        if cache is not None:
+            cache.bind(self._catalog_fp, model_version)
+        # key -> (future, deadline_at) của lần giải mới nhất; _pending đếm cả lần giải bị thay
+        self._inflight = {}
+        self._pending = 0
+        self._pool = None
+        self._threads = None
+        self.counters = {'requests': 0, 'solves': 0, 'coalesced': 0, 'cache_hits': 0, 'rejected': 0,
+                         'deadline_exceeded': 0, 'errors': 0}
+        self._latency = {}
+
+    def start(self):
+        self._pool = ProcessPoolExecutor(
+            self.max_workers, initializer=_init_worker,
+            initargs=(self.catalog, self.prereqs, self.target_terms, self.risk_weight, self.profile))
+        self._threads = ThreadPoolExecutor(max_workers=2, thread_name_prefix='risk')
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._threads.shutdown(wait=False)
+            self._pool = self._threads = None
+
+    @property
+    def queue_depth(self):
+        return self._pending
+
+    # ---- xử lý nghiệp vụ ----
+
+    async def risk(self, body):
+        gpa = _number(body, 'gpa')
+        loop = asyncio.get_running_loop()
+        # Chấm rủi ro (torch / numpy) chạy ở luồng riêng để không chặn event loop
+        return await loop.run_in_executor(self._threads, self.scorer.risk_dict, gpa, self.courses_df)
+
+    async def plan(self, body):
+        t0 = time.perf_counter()
+        deadline = _number(body, 'deadline', self.deadline)
+        if deadline <= 0:
+            raise ServiceError(400, "Trường 'deadline' phải là số dương", code='invalid_field')
+        deadline = min(deadline, self.deadline)
+        deadline_at = time.time() + deadline
+        lo = int(_number(body, 'min_credits', self.default_bounds[0]))
+        hi = int(_number(body, 'max_credits', self.default_bounds[1]))
+        completed = _string_list(body, 'completed')
+        risks = await self.risk(body)
+        credit_bounds = {t: (lo, hi) for t in self.target_terms}
+        key = plan_key(self._catalog_fp, self.prereqs, self.target_terms, credit_bounds, risks, self.risk_weight,
+                       completed, self.model_version, course_ids=self.catalog.code_of)
+
+        source = 'solve'
+        hit = self.cache.get(key) if self.cache is not None else None
+        if hit is not None:
+            self.counters['cache_hits'] += 1
+            ids, status = hit
+            source = 'cache'
+        else:
+            future, solve_until = self._inflight.get(key, (None, None))
+            # Chỉ gộp vào lần giải chạy được tới hạn của request này (so thời điểm
+            # hết hạn, không so độ dài hạn), không thì request hạn dài hơn nhận kết
+            # quả bị cắt hoặc 504 trước hạn của chính nó
+            if future is not None and solve_until >= deadline_at:
+                self.counters['coalesced'] += 1
+                source = 'coalesced'
+            else:
+                future = self._submit(key, {'student_id': body.get('student_id'), 'credit_bounds': credit_bounds,
+                                            'risk_dict': risks, 'completed': completed,
+                                            'deadline_at': deadline_at}, deadline_at)
+            try:
+                # shield: request này hết hạn không hủy bài giải mà request khác đang chờ
+                _, ids, status = await asyncio.wait_for(asyncio.shield(future), deadline_at - time.time())
+            except asyncio.TimeoutError:
+                self.counters['deadline_exceeded'] += 1
+                raise ServiceError(504, f"Quá hạn {deadline:g}s")
+            if status == 'DEADLINE_EXCEEDED':
+                self.counters['deadline_exceeded'] += 1
+                raise ServiceError(504, f"Quá hạn {deadline:g}s khi còn trong hàng đợi")
+
+        sections = [self.catalog.section_by_id(i) for i in ids]
+        return {
+            'student_id': body.get('student_id'),
+            'status': status,
+            'source': source,
+            'total_credits': sum(s.credits for s in sections),
+            'sections': [{'id': s.id, 'course_id': s.course_id, 'term': s.term, 'day': s.day, 'start': s.start,
+                          'end': s.end, 'credits': s.credits, 'risk': risks.get(s.course_id)} for s in sections],
+            'elapsed': time.perf_counter() - t0,
+        }
+
+    def _submit(self, key, student, deadline_at):
+        # Backpressure theo độ sâu hàng đợi: từ chối sớm thay vì để request chờ rồi quá hạn
+        if self._pending >= self.max_queue:
+            self.counters['rejected'] += 1
+            raise ServiceError(503, "Hàng đợi đầy, thử lại sau", {'Retry-After': '1'})
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, _solve_student, student)
+        self._inflight[key] = (future, deadline_at)
+        self._pending += 1
+        self.counters['solves'] += 1
+
+        def done(fut):
+            self._pending -= 1
+            if self._inflight.get(key, (None,))[0] is fut:
+                del self._inflight[key]
+            if self.cache is not None and not fut.cancelled() and fut.exception() is None:
+                _, ids, status = fut.result()
+                self.cache.put(key, ids, status)
+        future.add_done_callback(done)
+        return future
+
+    def metrics(self):
+        lines = []
+        for name, value in self.counters.items():
+            lines.append(f"# TYPE service_{name}_total counter")
+            lines.append(f"service_{name}_total {value}")
+        lines.append("# TYPE service_queue_depth gauge")
+        lines.append(f"service_queue_depth {self.queue_depth}")
+        lines.append("# TYPE service_request_seconds summary")
+        for route, (count, total) in sorted(self._latency.items()):
+            lines.append(f'service_request_seconds_count{{route="{route}"}} {count}')
+            lines.append(f'service_request_seconds_sum{{route="{route}"}} {total:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    # ---- HTTP ----
+
+    async def dispatch(self, method, path, body):
+        """Trả về (status, content_type, payload, headers)."""
+        route = path.split('?', 1)[0]
+        if route == '/health':
+            return 200, 'application/json', {'ok': True, 'queue_depth': self.queue_depth}, {}
+        if route == '/metrics':
+            return 200, 'text/plain; version=0.0.4', self.metrics(), {}
+        handlers = {'/plan': self.plan, '/risk': self.risk}
+        if route not in handlers:
+            raise ServiceError(404, f"Không có đường dẫn {route}")
+        if method != 'POST':
+            raise ServiceError(405, "Chỉ hỗ trợ POST")
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError as e:
+            raise ServiceError(400, f"JSON không hợp lệ: {e}", code='invalid_json')
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "Body phải là JSON object", code='invalid_json')
+        return 200, 'application/json', await handlers[route](payload), {}
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 tối giản, giữ kết nối (keep-alive) cho tới khi client đóng
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0) or 0)
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                t0 = time.perf_counter()
+                self.counters['requests'] += 1
+                extra = {}
+                try:
+                    if length > MAX_BODY:
+                        raise ServiceError(413, "Body quá lớn")
+                    body = await reader.readexactly(length) if length else b''
+                    status, ctype, payload, extra = await self.dispatch(method, path, body)
+                except ServiceError as e:
+                    payload = {'error': str(e), 'code': e.code}
+                    status, ctype, extra = e.status, 'application/json', e.headers
+                    if status == 413:
+                        keep_alive = False
+                except Exception as e:
+                    self.counters['errors'] += 1
+                    payload = {'error': f"{type(e).__name__}: {e}", 'code': ERROR_CODES[500]}
+                    status, ctype = 500, 'application/json'
+                route = path.split('?', 1)[0]
+                count, total = self._latency.get(route, (0, 0.0))
+                self._latency[route] = (count + 1, total + time.perf_counter() - t0)
+
+                data = payload.encode() if isinstance(payload, str) else json.dumps(payload, default=_plain).encode()
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {ctype}",
+                        f"Content-Length: {len(data)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8080, ready=None):
+        """Chạy tới khi bị hủy. ready: asyncio.Event (tùy chọn) được set khi đã lắng nghe."""
+        self.start()
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        try:
+            async with server:
+                if ready is not None:
+                    ready.set()
+                await server.serve_forever()
+        finally:
+            self.close()
+
+def _number(body, name, default=None):
+    # default: giá trị khi request không gửi trường này (None => bắt buộc)
+    if default is not None and body.get(name) is None:
+        return float(default)
+    try:
+        value = float(body[name])
+    except (KeyError, TypeError, ValueError):
+        raise ServiceError(400, f"Thiếu hoặc sai trường số '{name}'", code='invalid_field')
+    if not math.isfinite(value):
+        raise ServiceError(400, f"Thiếu hoặc sai trường số '{name}'", code='invalid_field')
+    return value
+
+def _string_list(body, name):
+    # Trường tùy chọn kiểu list chuỗi; chuỗi đơn không được tách thành từng ký tự
+    value = body.get(name)
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ServiceError(400, f"Trường '{name}' phải là danh sách chuỗi", code='invalid_field')
+    return value
+
+def _plain(value):
+    # Số kiểu NumPy trong kết quả => kiểu Python
+    return value.item()
+
+def build_service(args):
+    from data.data_generator import generate_dummy_data, generate_synthetic_data
+    from src.data_source import ArraySource
+    from src.model_store import load_or_train, DEFAULT_PATH
+    from src.plan_cache import PlanCache
+    from src.scoring import RiskScorer
+    from src.section_table import SectionTable
+
+    courses_df, prereq_df, history_df, sections_df = generate_dummy_data(seed=42)
+    report = {}
+    model = load_or_train(ArraySource.from_frame(history_df), path=DEFAULT_PATH, report=report)
+    if args.synthetic:
+        courses_df, prereq_df, _, sections_df, _ = generate_synthetic_data(
+            n_courses=max(args.synthetic // 10, 1), n_sections=args.synthetic, n_history=0, n_students=0, seed=0)
+
+    prereqs = {}
+    for course, prereq in zip(prereq_df['course'], prereq_df['prereq']):
+        prereqs.setdefault(course, []).append(prereq)
+    return PlanningService(
+        SectionCatalog(SectionTable.from_dataframe(sections_df)), prereqs, courses_df, RiskScorer(model),
+        target_terms=args.terms, default_bounds=(args.min_credits, args.max_credits), risk_weight=args.risk_weight,
+        max_workers=args.workers, max_queue=args.max_queue, deadline=args.deadline,
+        profile=SolverProfile(max_time=args.max_time, num_workers=1),
+        cache=PlanCache(args.cache) if args.cache else None, model_version=report['version'],
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Dịch vụ HTTP/JSON xếp lịch học (chạy cục bộ)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=None, help="Số process giải CP-SAT")
+    parser.add_argument('--max-queue', type=int, default=None, help="Số bài giải chờ tối đa trước khi trả 503")
+    parser.add_argument('--deadline', type=float, default=10.0, help="Hạn mặc định / tối đa của mỗi request (giây)")
+    parser.add_argument('--max-time', type=float, default=None, help="Giới hạn thời gian giải mỗi bài (giây)")
+    parser.add_argument('--terms', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--min-credits', type=int, default=4)
+    parser.add_argument('--max-credits', type=int, default=30)
+    parser.add_argument('--risk-weight', type=float, default=10.0)
+    parser.add_argument('--cache', help="File SQLite cache kết quả")
+    parser.add_argument('--synthetic', type=int, default=0, help="Dùng catalog giả lập N lớp thay cho dữ liệu mẫu")
+    args = parser.parse_args()
+
+    service = build_service(args)
+    print(f"Đang phục vụ tại http://{args.host}:{args.port} ({service.max_workers} worker, "
+          f"hàng đợi tối đa {service.max_queue}, {len(service.catalog)} lớp)")
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+class _NullSpan:
+    # Span khi tắt tracing: một đối tượng dùng chung, mọi thao tác đều không làm gì
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+# Thuộc tính span là số đếm / thời gian, cộng dồn được thành counter Prometheus.
+# Thuộc tính số khác (số kỳ first / last, kích thước model...) chỉ nằm trong span.
+COUNTER_ATTRS = frozenset({'branches', 'conflicts', 'wall_time', 'rows', 'students', 'kept', 'removed'})
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.start = None
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._t0
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self):
+        return {'span': self.name, 'parent': self.parent, 'start': self.start,
+                'duration': self.duration, **self.attrs}
+
+class Tracer:
+    """
+    Thu thập span (tên, thời gian, thuộc tính) của pipeline lập kế hoạch.
+    log: stream (tùy chọn) nhận mỗi span một dòng JSON ngay khi kết thúc.
+    Giữ tổng hợp theo tên span (số lần, tổng / lớn nhất thời gian) và các số đếm
+    cộng dồn từ thuộc tính trong counter_attrs (mặc định COUNTER_ATTRS, vd.
+    branches, conflicts của CP-SAT) để xuất dạng Prometheus.
+    """
+    def __init__(self, log=None, keep_spans=True, counter_attrs=COUNTER_ATTRS):
+        self.log = log
+        self.keep_spans = keep_spans
+        self.counter_attrs = frozenset(counter_attrs)
+        self.spans = []
+        self.timings = {}
+        self.counters = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def _finish(self, span):
+        with self._lock:
+            count, total, worst = self.timings.get(span.name, (0, 0.0, 0.0))
+            self.timings[span.name] = (count + 1, total + span.duration, max(worst, span.duration))
+            for key, value in span.attrs.items():
+                if key in self.counter_attrs and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    k = (span.name, key)
+                    self.counters[k] = self.counters.get(k, 0) + value
+            if self.keep_spans:
+                self.spans.append(span)
+        if self.log is not None:
+            self.log.write(json.dumps(span.to_dict(), default=str) + '\n')
+            self.log.flush()
+
+    def prometheus(self, prefix='plan'):
+        """Dạng text exposition của Prometheus: thời gian theo stage + tổng các thuộc tính trong counter_attrs."""
+        def label(name):
+            return name.replace('\\', '\\\\').replace('"', '\\"')
+
+        with self._lock:
+            timings, counters = dict(self.timings), dict(self.counters)
+        lines = [f"# HELP {prefix}_stage_seconds Thời gian từng stage của pipeline",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        for name, (count, total, _) in sorted(timings.items()):
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{label(name)}"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{label(name)}"}} {total:.6f}')
+        lines.append(f"# TYPE {prefix}_stage_seconds_max gauge")
+        for name, (_, _, worst) in sorted(timings.items()):
+            lines.append(f'{prefix}_stage_seconds_max{{stage="{label(name)}"}} {worst:.6f}')
+        metrics = sorted({key for _, key in counters})
+        for key in metrics:
+            lines.append(f"# TYPE {prefix}_{key}_total counter")
+            for (name, k), value in sorted(counters.items()):
+                if k == key:
+                    lines.append(f'{prefix}_{key}_total{{stage="{label(name)}"}} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Dict {tên span: {'count', 'total', 'max'}} - tiện in ra hoặc ghi JSON."""
+        with self._lock:
+            return {name: {'count': c, 'total': t, 'max': m} for name, (c, t, m) in self.timings.items()}
+
+# Tracer đang bật (None = tắt): span() khi tắt chỉ tốn một phép so sánh
+_TRACER = None
+
+def enable(tracer=None):
+    global _TRACER
+    _TRACER = tracer or Tracer()
+    return _TRACER
+
+def disable():
+    global _TRACER
+    _TRACER = None
+
+def current():
+    return _TRACER
+
+def span(name, **attrs):
+    """with span('plan.solve', n=...) as s: ...; s.set(k=v). Không làm gì khi tracing tắt."""
+    tracer = _TRACER
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, **attrs)
+
+def traced(name):
+    """Decorator: mỗi lần gọi hàm là một span."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _TRACER
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+@contextmanager
+def tracing(log=None):
+    """Bật tracing trong phạm vi with (vd. cho một request), trả về Tracer."""
+    previous = _TRACER
+    tracer = enable(Tracer(log=log))
+    try:
+        yield tracer
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
+
+@contextmanager
+def profiled(path=None, sort='cumulative', limit=30, out=None):
+    """
+    cProfile cho đúng một request: with profiled('plan.prof'): ...
+    path: ghi file .prof (mở bằng snakeviz / pstats); out: stream nhận bảng
+    top `limit` hàm theo `sort`. Không truyền gì => in bảng ra stdout.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(path)
+        if out is not None or path is None:
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats(sort).print_stats(limit)
+            (out or sys.stdout).write(buf.getvalue())
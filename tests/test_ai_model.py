@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.ai_model import train_in_background, train_risk_model_fast
+from src.model_store import load_or_train
+from src.np_runtime import HeuristicRiskPredictor
+from src.scoring import RiskScorer
+
+def _history(n, seed=0):
+    # Cùng công thức nhãn với data_generator
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.uniform(1.5, 4.0, n), rng.uniform(0.3, 1.0, n), rng.integers(2, 6, n)])
+    p = X[:, 0] / 4.0 * 0.7 + (1 - X[:, 1]) * 0.3
+    y = (rng.random(n) < p).astype(np.float32).reshape(-1, 1)
+    return X.astype(np.float32), y
+
+def _log_loss(p, y):
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    y = y.reshape(-1)
+    return float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).mean())
+
+def test_fast_trainer_learns_and_stops_early():
+    X, y = _history(5000)
+    X_test, y_test = _history(5000, seed=1)
+    report = {}
+    model = train_risk_model_fast(X, y, 3, epochs=200, batch_size=256, seed=0, report=report)
+    assert report['epochs_run'] < 200
+    base = _log_loss(np.full(len(y_test), y.mean()), y_test)
+    assert _log_loss(RiskScorer(model).pass_prob(X_test), y_test) < base - 0.02
+
+def test_load_or_train_defaults_to_fast_trainer(tmp_path):
+    X, y = _history(500)
+    report = {}
+    load_or_train(X, y, path=str(tmp_path / 'risk.pt'), report=report, seed=0)
+    assert report['source'] == 'trained' and report['trainer'] == 'train_risk_model_fast'
+
+def test_train_in_background_returns_future():
+    X, y = _history(500)
+    future = train_in_background(X, y, 3, seed=0)
+    assert len(RiskScorer(future.result(timeout=60)).pass_prob(X)) == len(X)
+
+def test_heuristic_predictor_matches_generator_formula():
+    X = np.array([[4.0, 0.0, 3], [2.0, 1.0, 3], [0.0, 0.5, 3]], dtype=np.float32)
+    assert np.allclose(RiskScorer(HeuristicRiskPredictor()).pass_prob(X), [1.0, 0.35, 0.15])
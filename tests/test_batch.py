@@ -0,0 +1,39 @@
+import pytest
+
+from src.batch import schedule_batch
+from src.optimizer import Section
+from src.plan_cache import PlanCache
+
+SECTIONS = [Section('A1', 'A', 1, 'Mon', 1, 3, 3), Section('B1', 'B', 1, 'Tue', 1, 3, 3),
+            Section('C1', 'C', 1, 'Mon', 2, 4, 3)]
+
+def _students():
+    bounds = {1: (0, 9)}
+    risks = [{'A': 0.1, 'B': 0.2, 'C': 0.9}, {'A': 0.9, 'B': 0.2, 'C': 0.1}, {'A': 0.5, 'B': 0.5, 'C': 0.5}]
+    students = [{'student_id': sid, 'credit_bounds': bounds, 'risk_dict': r, 'completed': []}
+                for sid, r in zip('ABC', risks)]
+    # D giống hệt A
+    return students + [dict(students[0], student_id='D')]
+
+@pytest.mark.parametrize('with_cache', [False, True])
+def test_identical_students_share_one_solve(with_cache):
+    cache = PlanCache(None) if with_cache else None
+    stats = {}
+    results = {sid: (sorted(s.id for s in chosen), status)
+               for sid, chosen, status in schedule_batch(_students(), SECTIONS, {}, [1], max_workers=1,
+                                                         cache=cache, stats=stats)}
+    assert sorted(results) == ['A', 'B', 'C', 'D']
+    assert results['D'] == results['A']
+    assert (stats['solves'], stats['coalesced'], stats['cache_hits']) == (3, 1, 0)
+    if with_cache:
+        assert (cache.stats()['hits'], cache.stats()['misses']) == (0, 3)
+        # Lần chạy lại: mọi sinh viên lấy từ cache
+        list(schedule_batch(_students(), SECTIONS, {}, [1], max_workers=1, cache=cache, stats=stats))
+        assert (stats['solves'], stats['cache_hits']) == (0, 4)
+
+def test_sequential_mode_matches_pool():
+    sequential = {sid: sorted(s.id for s in chosen)
+                  for sid, chosen, _ in schedule_batch(_students(), SECTIONS, {}, [1], max_workers=0)}
+    pooled = {sid: sorted(s.id for s in chosen)
+              for sid, chosen, _ in schedule_batch(_students(), SECTIONS, {}, [1], max_workers=2)}
+    assert sequential == pooled
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.catalog import CatalogIndex
+from src.optimizer import Section, SectionCatalog, schedule_multi_term
+
+DAYS = ['Mon', 'Tue', 'Wed']
+
+def _random_sections(rng, n, n_courses=8, terms=(1, 2)):
+    sections = []
+    for k in range(n):
+        start, credits = int(rng.integers(1, 10)), int(rng.integers(1, 5))
+        sections.append(Section(f"S{k}", f"C{rng.integers(n_courses)}", int(rng.choice(terms)),
+                                DAYS[int(rng.integers(len(DAYS)))], start, start + credits - 1, credits))
+    return sections
+
+def _groups(catalog):
+    return {frozenset(g.tolist()) for g in catalog.conflicts}
+
+@pytest.mark.parametrize('seed', range(30))
+def test_bitmask_cliques_match_sweep(seed):
+    sections = _random_sections(np.random.default_rng(seed), 40)
+    index = CatalogIndex(sections)
+    assert _groups(index) == _groups(SectionCatalog(index.table, "clique"))
+
+@pytest.mark.parametrize('seed', range(10))
+def test_bitmask_schedule_matches_clique(seed):
+    sections = _random_sections(np.random.default_rng(seed), 25)
+    bounds = {1: (0, 12), 2: (0, 12)}
+    stats_mask, stats_clique = {}, {}
+    _, status = schedule_multi_term(CatalogIndex(sections), {}, [1, 2], bounds, stats=stats_mask)
+    _, expected = schedule_multi_term(sections, {}, [1, 2], bounds, conflict_mode="clique", stats=stats_clique)
+    assert (status, stats_mask['objective']) == (expected, stats_clique['objective'])
+
+def test_masks_and_conflict_queries():
+    index = CatalogIndex([Section('A_1', 'A', 1, 'Mon', 1, 3, 3), Section('B_1', 'B', 1, 'Mon', 3, 4, 2),
+                          Section('C_1', 'C', 1, 'Tue', 1, 2, 2), Section('D_1', 'D', 2, 'Mon', 1, 3, 3)])
+    busy = index.slot_mask('Mon', 4)
+    assert index.available(busy).tolist() == [True, False, True, True]
+    assert index.overlaps(index.slot_mask('Tue', 2, 9)).tolist() == [False, False, True, False]
+    # Tiết ngoài catalog bị bỏ qua
+    assert index.slot_mask('Tue', 20, 30) == 0
+    assert index.mask_of([0, 1]) == index.slot_mask('Mon', 1, 4)
+    # Trùng giờ chỉ tính trong cùng kỳ
+    assert index.conflicts_with(0).tolist() == [True, True, False, False]
+    assert index.has_conflict([0, 1]) and not index.has_conflict([0, 2, 3])
+    assert index.rows_of('B').tolist() == [1] and index.rows_of('X').size == 0
+
+def test_from_records_keeps_course_meta():
+    index = CatalogIndex.from_records([
+        {'id': 'A_1', 'course_id': 'A', 'name': 'Giải tích', 'day': 'Mon', 'start': 1, 'credits': 3},
+        {'id': 'A_2', 'course_id': 'A', 'name': 'Giải tích', 'day': 'Wed', 'start': 4, 'credits': 3},
+    ])
+    assert index.meta('A', 'name') == 'Giải tích' and index.meta('A', 'credits') == 3
+    assert [s.end for s in index.sections_of('A')] == [3, 6]
+    assert index.meta('X') == {}
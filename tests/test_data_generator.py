@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from data.data_generator import generate_synthetic_data, write_synthetic_data
+from src.prereq_index import PrereqIndex
+
+SIZES = dict(n_courses=30, n_sections=120, n_students=10, n_history=500, chunk_rows=50)
+
+def test_same_seed_same_data():
+    a = generate_synthetic_data(seed=7, **SIZES)
+    b = generate_synthetic_data(seed=7, **SIZES)
+    for x, y in zip(a, b):
+        pd.testing.assert_frame_equal(x, y)
+    c = generate_synthetic_data(seed=8, **SIZES)
+    assert not a[2].equals(c[2]) and not a[3].equals(c[3])
+
+def test_table_sizes_are_independent():
+    # Đổi kích thước một bảng không làm đổi bảng khác
+    a = generate_synthetic_data(seed=7, **SIZES)
+    b = generate_synthetic_data(seed=7, **dict(SIZES, n_history=800))
+    pd.testing.assert_frame_equal(a[3], b[3])
+    pd.testing.assert_frame_equal(a[2], b[2].iloc[:len(a[2])])
+
+def test_shapes_and_prereq_dag():
+    courses, prereqs, history_df, sections_df, students = generate_synthetic_data(seed=1, **SIZES)
+    assert (len(courses), len(history_df), len(sections_df), len(students)) == (30, 500, 120, 10)
+    assert sections_df['id'].is_unique
+    assert (sections_df['end'] - sections_df['start'] + 1 == sections_df['credits']).all()
+    graph = prereqs.groupby('course')['prereq'].apply(list).to_dict()
+    PrereqIndex(graph)  # ValueError nếu có vòng
+    assert set(prereqs['prereq']) <= set(courses['id'])
+
+def test_written_chunks_match_generated(tmp_path):
+    counts = write_synthetic_data(str(tmp_path), fmt='npy', seed=3, **SIZES)
+    assert {k: counts[k] for k in ('courses', 'students', 'sections', 'history')} == {
+        'courses': 30, 'students': 10, 'sections': 120, 'history': 500}
+    parts = sorted((tmp_path / 'history').iterdir())
+    assert len(parts) == 10
+    history = np.concatenate([np.load(p, mmap_mode='r') for p in parts])
+    expected = generate_synthetic_data(seed=3, **SIZES)[2]
+    np.testing.assert_array_equal(history['passed'], expected['passed'].to_numpy())
+    np.testing.assert_allclose(history['student_gpa_avg'], expected['student_gpa_avg'].to_numpy())
+    sections = np.concatenate([np.load(p) for p in sorted((tmp_path / 'sections').iterdir())])
+    assert sections['id'].tolist() == generate_synthetic_data(seed=3, **SIZES)[3]['id'].tolist()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_source import ArraySource, FileSource, HistorySource, open_history, write_features
+from src.model_store import data_hash
+from src.scoring import FEATURES
+
+def _history(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'student_gpa_avg': rng.uniform(1.5, 4.0, n),
+        'course_difficulty': rng.uniform(0.3, 0.95, n),
+        'course_credits': rng.integers(2, 6, n),
+        'passed': rng.integers(0, 2, n),
+    })
+
+def test_in_memory_fingerprint_is_data_hash():
+    source = ArraySource.from_frame(_history(100))
+    assert source.in_memory
+    assert source.fingerprint() == data_hash(source.X, source.y, FEATURES)
+
+def test_memmap_fingerprint_stable_across_reopen(tmp_path):
+    prefix = str(tmp_path / 'feat')
+    written = write_features(ArraySource.from_frame(_history(100), chunk_rows=32), prefix)
+    assert not written.in_memory
+    fp = written.fingerprint()
+    reopened = open_history(prefix)
+    assert isinstance(reopened, ArraySource) and reopened.fingerprint() == fp
+    # Ghi lại file khác nội dung => đổi hash
+    write_features(ArraySource.from_frame(_history(120, seed=1)), prefix)
+    assert ArraySource.from_features(prefix).fingerprint() != fp
+
+def test_write_features_round_trip(tmp_path):
+    source = ArraySource.from_frame(_history(100), chunk_rows=32)
+    written = write_features(source, str(tmp_path / 'sub' / 'feat'))
+    np.testing.assert_array_equal(np.asarray(written.X), source.X)
+    np.testing.assert_array_equal(np.asarray(written.y), source.y)
+
+def test_shuffled_chunks_cover_all_rows():
+    source = ArraySource.from_frame(_history(100), chunk_rows=16)
+    chunks = list(source.chunks(shuffle_seed=3))
+    assert all(len(X) <= 16 for X, _ in chunks)
+    X = np.concatenate([X for X, _ in chunks])
+    order = np.lexsort(X.T)
+    np.testing.assert_array_equal(X[order], source.X[np.lexsort(source.X.T)])
+    assert [len(X) for X, _ in source.chunks(shuffle_seed=3)] == [len(X) for X, _ in chunks]
+
+def test_moments_match_numpy():
+    source = ArraySource.from_frame(_history(100), chunk_rows=7)
+    n, mean, std = source.moments()
+    X = source.X.astype(np.float64)
+    assert n == 100
+    np.testing.assert_allclose(mean, X.mean(axis=0))
+    np.testing.assert_allclose(std, X.std(axis=0, ddof=1))
+
+def test_file_source_reads_csv_chunks(tmp_path):
+    df = _history(50)
+    df.assign(extra='x').to_csv(tmp_path / 'history.csv', index=False)
+    source = FileSource(str(tmp_path / 'history.csv'), chunk_rows=20)
+    assert [len(X) for X, _ in source.chunks()] == [20, 20, 10]
+    X = np.concatenate([X for X, _ in source.chunks()])
+    np.testing.assert_allclose(X, ArraySource.from_frame(df).X)
+    assert open_history(str(tmp_path / 'history.csv')).fingerprint() == source.fingerprint()
+
+def test_history_source_is_abstract():
+    with pytest.raises(TypeError):
+        HistorySource()
@@ -0,0 +1,23 @@
+import pytest
+import torch
+
+from src.ai_model import RiskPredictor
+from src.export import EXPORTERS, check_parity
+from src.scoring import load_scorer
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    model = RiskPredictor(3)
+    # Chuẩn hóa khác mặc định để kiểm tra cả x_mean / x_std được export
+    model.set_normalization(torch.tensor([2.5, 0.5, 3.0]), torch.tensor([0.8, 0.3, 1.4]))
+    return model.eval()
+
+@pytest.mark.parametrize('fmt', ['numpy', 'torchscript', 'onnx'])
+def test_exported_backend_matches_eager(model, fmt, tmp_path):
+    if fmt == 'onnx':
+        pytest.importorskip('onnx')
+        pytest.importorskip('onnxruntime')
+    export_fn, ext = EXPORTERS[fmt]
+    path = export_fn(model, str(tmp_path / f"risk_predictor{ext}"))
+    assert check_parity(model, load_scorer(path, backend=fmt)) <= 1e-5
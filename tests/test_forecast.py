@@ -0,0 +1,40 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.forecast import forecast_cohort, forecast_graduation
+
+class _ConstantScorer:
+    # Xác suất qua môn cố định, không cần mô hình
+    def __init__(self, p):
+        self.p = p
+
+    def pass_prob(self, X):
+        return np.full(len(X), self.p)
+
+@pytest.mark.parametrize('earned, required, failed, limit', [
+    (0, 140, 0, 20),    # 7 kỳ, 20 tín không chia hết cho môn 3 tín
+    (6, 150, 2, 20),    # bảng điểm mặc định của Tab 2: 144 + 2 tín => 8 kỳ
+    (0, 10, 0, 4),
+    (150, 150, 0, 20),  # đã đủ tín => 0 kỳ
+])
+def test_perfect_student_matches_deterministic_estimate(earned, required, failed, limit):
+    expected = math.ceil((max(required - earned, 0) + failed) / limit)
+    forecast = forecast_graduation(_ConstantScorer(1.0), 3.0, earned, required, failed_credits=failed,
+                                   limit_credits=limit, n_sims=200, seed=0)
+    assert (forecast.terms == expected).all()
+    assert forecast.prob_within(expected) == 1.0
+
+def test_failures_only_delay_graduation():
+    df = forecast_cohort(_ConstantScorer(0.7), [2.5, 3.0], [0, 30], 140, limit_credits=20, n_sims=2000, seed=0)
+    assert (df['p10'] >= [7, 6]).all()
+    assert (df['graduated'] > 0.99).all()
+
+@pytest.mark.parametrize('earned, p', [(150, 1.0), (100, 0.7)])
+def test_distribution_sums_to_one(earned, p):
+    forecast = forecast_graduation(_ConstantScorer(p), 3.0, earned, 150, n_sims=500, seed=0)
+    dist = forecast.distribution()
+    assert dist.sum() == pytest.approx(1.0)
+    if earned >= 150:
+        assert dist[0] == 1.0
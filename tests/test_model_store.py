@@ -0,0 +1,59 @@
+import numpy as np
+import torch
+
+from src.ai_model import RiskPredictor
+from src.model_store import load_model, load_or_train, save_model
+
+def _data(seed=0, n=200):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.uniform(1.5, 4, n), rng.uniform(0, 1, n), rng.integers(2, 6, n)]).astype(np.float32)
+    y = (rng.random((n, 1)) < 0.7).astype(np.float32)
+    return X, y
+
+def _trainer(calls):
+    # Trainer rẻ, đếm số lần được gọi
+    def train(X, y, in_dim):
+        calls.append(len(X))
+        torch.manual_seed(len(calls))
+        return RiskPredictor(in_dim)
+    return train
+
+def test_artifact_is_reused_on_hash_hit(tmp_path):
+    path = str(tmp_path / 'risk.pt')
+    X, y = _data()
+    calls, first, second = [], {}, {}
+    model = load_or_train(X, y, path=path, report=first, trainer=_trainer(calls))
+    reused = load_or_train(X.copy(), y.copy(), path=path, report=second, trainer=_trainer(calls))
+    assert calls == [len(X)]
+    assert (first['source'], second['source']) == ('trained', 'artifact')
+    assert first['version'] == second['version']
+    with torch.inference_mode():
+        assert torch.equal(model(torch.from_numpy(X)), reused(torch.from_numpy(X)))
+
+def test_changed_data_retrains(tmp_path):
+    path = str(tmp_path / 'risk.pt')
+    calls, first, second = [], {}, {}
+    load_or_train(*_data(0), path=path, report=first, trainer=_trainer(calls))
+    load_or_train(*_data(1), path=path, report=second, trainer=_trainer(calls))
+    assert len(calls) == 2 and second['source'] == 'trained'
+    assert first['version'] != second['version']
+    assert load_model(path)[1]['version'] == second['version']
+
+def test_unreadable_artifact_retrains(tmp_path):
+    path = tmp_path / 'risk.pt'
+    path.write_bytes(b'not a torch file')
+    calls, report = [], {}
+    load_or_train(*_data(), path=str(path), report=report, trainer=_trainer(calls))
+    assert calls and report['source'] == 'trained'
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'risk.pt')
+    model = RiskPredictor(3, hidden=16)
+    model.set_normalization([2.0, 0.5, 3.0], [0.5, 0.2, 1.0])
+    version = save_model(model, path, ['a', 'b', 'c'], 'f' * 64, train_time=1.5)
+    loaded, meta = load_model(path)
+    assert (version, meta['features'], meta['hidden'], meta['train_time']) == ('f' * 12, ['a', 'b', 'c'], 16, 1.5)
+    X = torch.rand(5, 3)
+    with torch.inference_mode():
+        assert torch.allclose(model(X), loaded(X))
+    assert not (tmp_path / 'risk.pt.tmp').exists()
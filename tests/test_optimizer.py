@@ -0,0 +1,113 @@
+import itertools
+
+import numpy as np
+import pytest
+from ortools.sat.python import cp_model
+
+from src.optimizer import (Section, SectionCatalog, SolverProfile, _sweep, build_conflict_cliques,
+                           schedule_multi_term)
+
+DAYS = ['Mon', 'Tue']
+
+def _overlap(starts, ends, i, j):
+    return max(starts[i], starts[j]) <= min(ends[i], ends[j])
+
+def _random_sections(rng, n, n_courses=8, terms=(1, 2)):
+    sections = []
+    for k in range(n):
+        start = int(rng.integers(1, 10))
+        credits = int(rng.integers(1, 4))
+        sections.append(Section(f"S{k}", f"C{rng.integers(n_courses)}", int(rng.choice(terms)),
+                                DAYS[int(rng.integers(len(DAYS)))], start, start + credits - 1, credits))
+    return sections
+
+@pytest.mark.parametrize('seed', range(30))
+def test_sweep_cliques_cover_exactly_the_overlapping_pairs(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 25))
+    starts = rng.integers(1, 12, n).tolist()
+    ends = [s + int(d) for s, d in zip(starts, rng.integers(0, 4, n))]
+    cliques = [set(c) for c in _sweep(starts, ends)]
+    covered = {pair for c in cliques for pair in itertools.combinations(sorted(c), 2)}
+    overlapping = {(i, j) for i, j in itertools.combinations(range(n), 2) if _overlap(starts, ends, i, j)}
+    # Mỗi clique chỉ gồm các lớp đôi một trùng giờ, mọi cặp trùng giờ nằm trong một clique
+    assert covered == overlapping
+    # Clique cực đại: không clique nào là con của clique khác
+    assert not any(a < b for a in cliques for b in cliques)
+
+def test_build_conflict_cliques_groups_by_term_and_day():
+    sections = [Section('A', 'A', 1, 'Mon', 1, 3, 3), Section('B', 'B', 1, 'Mon', 2, 4, 3),
+                Section('C', 'C', 1, 'Tue', 2, 4, 3), Section('D', 'D', 2, 'Mon', 1, 3, 3)]
+    assert [sorted(s.id for s in c) for c in build_conflict_cliques(sections)] == [['A', 'B']]
+
+@pytest.mark.parametrize('seed', range(15))
+def test_clique_and_pairwise_modes_agree(seed):
+    rng = np.random.default_rng(seed)
+    sections = _random_sections(rng, int(rng.integers(5, 30)))
+    risks = {f"C{i}": float(rng.random()) for i in range(8)}
+    bounds = {1: (0, 12), 2: (0, 12)}
+    results = {}
+    for mode in ('clique', 'pairwise'):
+        stats = {}
+        chosen, status = schedule_multi_term(sections, {}, [1, 2], bounds, risks, stats=stats, conflict_mode=mode)
+        catalog = SectionCatalog(chosen)
+        # Lời giải không có hai lớp cùng kỳ trùng giờ
+        assert not any(len(g) > 1 for g in catalog.conflicts)
+        results[mode] = (status, stats['objective'], stats['conflict_mode'])
+    assert results['clique'][:2] == results['pairwise'][:2]
+
+def test_clique_mode_needs_one_constraint_per_overlapping_set():
+    # 5 lớp cùng chứa tiết 3: một AddAtMostOne thay cho 10 cặp
+    sections = [Section(f"S{k}", f"C{k}", 1, 'Mon', 1 + k % 3, 3 + k % 3, 3) for k in range(5)]
+    counts = {}
+    for mode in ('clique', 'pairwise'):
+        stats = {}
+        schedule_multi_term(sections, {}, [1], {1: (0, 20)}, stats=stats, conflict_mode=mode, presolve=[])
+        counts[mode] = stats['conflict_constraints']
+    assert counts == {'clique': 1, 'pairwise': 10}
+
+def test_profile_sets_solver_parameters():
+    solver = SolverProfile(max_time=2.5, num_workers=3, relative_gap=0.01, seed=7).configure(cp_model.CpSolver())
+    params = solver.parameters
+    assert (params.max_time_in_seconds, params.num_search_workers, params.relative_gap_limit,
+            params.random_seed) == (2.5, 3, 0.01, 7)
+
+def test_stats_report_status_bound_and_gap():
+    rng = np.random.default_rng(0)
+    sections = _random_sections(rng, 20)
+    stats = {}
+    chosen, status = schedule_multi_term(sections, {}, [1, 2], {1: (0, 12), 2: (0, 12)}, stats=stats,
+                                         profile=SolverProfile(num_workers=1, seed=0))
+    assert status == stats['status'] == 'OPTIMAL'
+    assert stats['objective'] == stats['best_bound'] and stats['gap'] == 0
+    assert not stats['timed_out']
+    assert sum(s.credits * 10 for s in chosen) == stats['objective']
+
+def test_infeasible_status_is_reported():
+    sections = [Section('A1', 'A', 1, 'Mon', 1, 3, 3)]
+    stats = {}
+    assert schedule_multi_term(sections, {}, [1], {1: (6, 10)}, stats=stats) == ([], 'INFEASIBLE')
+    assert stats['objective'] is None and not stats['timed_out']
+
+def test_on_solution_streams_improving_plans():
+    rng = np.random.default_rng(1)
+    sections = _random_sections(rng, 25)
+    risks = {f"C{i}": float(rng.random()) for i in range(8)}
+    seen = []
+    profile = SolverProfile(num_workers=1, seed=0, on_solution=lambda chosen, obj, bound: seen.append((chosen, obj)))
+    stats = {}
+    chosen, _ = schedule_multi_term(sections, {}, [1, 2], {1: (0, 12), 2: (0, 12)}, risks, stats=stats,
+                                    profile=profile)
+    assert seen
+    objectives = [obj for _, obj in seen]
+    assert objectives == sorted(objectives) and objectives[-1] == stats['objective']
+    assert sorted(s.id for s in seen[-1][0]) == sorted(s.id for s in chosen)
+
+def test_fixed_seed_single_worker_is_deterministic():
+    rng = np.random.default_rng(2)
+    sections = _random_sections(rng, 30)
+    risks = {f"C{i}": float(rng.random()) for i in range(8)}
+    runs = [sorted(s.id for s in schedule_multi_term(sections, {}, [1, 2], {1: (0, 12), 2: (0, 12)}, risks,
+                                                    profile=SolverProfile(num_workers=1, seed=3))[0])
+            for _ in range(2)]
+    assert runs[0] == runs[1]
@@ -0,0 +1,18 @@
+import numpy as np
+
+from src.plan_cache import plan_key
+
+BOUNDS = {1: (0, 20)}
+
+def _key(**kwargs):
+    return plan_key('catalog', {}, [1], BOUNDS, {'A': 0.3, 'B': 0.6}, **kwargs)
+
+def test_blank_course_ids_do_not_change_key():
+    # Dòng trống của st.data_editor: None / NaN / chuỗi rỗng lẫn trong mã môn
+    clean = _key(wanted=['A', 'B'])
+    assert _key(wanted=np.array(['B', None, 'A', float('nan'), '', '  '], dtype=object)) == clean
+    assert _key(wanted=['A', 'B'], completed=[None, 'C', float('nan')]) == _key(wanted=['A', 'B'], completed=['C'])
+
+def test_wanted_order_and_duplicates_do_not_change_key():
+    assert _key(wanted=['B', 'A', 'A']) == _key(wanted=['A', 'B'])
+    assert _key(wanted=[]) != _key(wanted=None)
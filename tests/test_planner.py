@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from src.catalog import CatalogIndex
+from src.optimizer import IncrementalPlanner, Section, schedule_multi_term
+
+def test_busy_slot_does_not_hide_dominated_section():
+    # A_1 trội A_2 trên toàn catalog, nhưng Thứ 2 bận => chỉ còn A_2 + B_1 đạt 6 tín
+    sections = [Section('A_1', 'A', 1, 'Mon', 1, 3, 3), Section('A_2', 'A', 1, 'Tue', 1, 3, 3),
+                Section('B_1', 'B', 1, 'Wed', 1, 3, 3)]
+    index = CatalogIndex(sections)
+    planner = IncrementalPlanner(index, {}, [1], {1: (6, 20)})
+    planner.update(wanted=['A', 'B'], busy=index.slot_mask('Mon', 1, 6))
+    chosen, status = planner.solve()
+    assert status == 'OPTIMAL'
+    assert sorted(s.id for s in chosen) == ['A_2', 'B_1']
+
+def test_planner_matches_fresh_solve_after_updates():
+    sections = [Section('A_1', 'A', 1, 'Mon', 1, 3, 3), Section('A_2', 'A', 1, 'Tue', 1, 3, 3),
+                Section('B_1', 'B', 1, 'Mon', 2, 4, 3), Section('C_1', 'C', 1, 'Wed', 1, 2, 2)]
+    risks = {'A': 0.1, 'B': 0.2, 'C': 0.1}
+    planner = IncrementalPlanner(sections, {}, [1], {1: (0, 20)}, risks, risk_weight=1.0)
+    for wanted, bounds in ((['A', 'B', 'C'], (0, 20)), (['A', 'C'], (3, 5)), (['A', 'B', 'C'], (6, 8))):
+        planner.update(wanted=wanted, credit_bounds={1: bounds})
+        stats, fresh = {}, {}
+        _, status = planner.solve(stats)
+        subset = [s for s in sections if s.course_id in wanted]
+        _, fresh_status = schedule_multi_term(subset, {}, [1], {1: bounds}, risks, risk_weight=1.0, stats=fresh)
+        assert (status, stats['objective']) == (fresh_status, fresh['objective'])
+
+def _random_catalog(rng, n_sections=14, n_courses=6):
+    days = ['Mon', 'Tue']
+    sections = []
+    for k in range(n_sections):
+        start, credits = int(rng.integers(1, 8)), int(rng.integers(1, 4))
+        sections.append(Section(f"S{k}", f"C{rng.integers(n_courses)}", int(rng.integers(1, 3)),
+                                days[int(rng.integers(2))], start, start + credits - 1, credits))
+    return sections, [f"C{i}" for i in range(n_courses)]
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_updates_match_fresh_solves(seed):
+    rng = np.random.default_rng(seed)
+    sections, courses = _random_catalog(rng)
+    planner = IncrementalPlanner(sections, {}, [1, 2], {1: (0, 10), 2: (0, 10)})
+    model = planner._pm.model
+    for _ in range(4):
+        wanted = [c for c in courses if rng.random() < 0.7]
+        bounds = {t: (int(rng.integers(0, 5)), int(rng.integers(5, 12))) for t in (1, 2)}
+        risks = {c: float(rng.random()) for c in courses}
+        planner.update(wanted=wanted, credit_bounds=bounds, risk_dict=risks, risk_weight=2.0)
+        stats, fresh = {}, {}
+        _, status = planner.solve(stats)
+        subset = [s for s in sections if s.course_id in wanted]
+        _, fresh_status = schedule_multi_term(subset, {}, [1, 2], bounds, risks, risk_weight=2.0, stats=fresh)
+        assert (status, stats['objective']) == (fresh_status, fresh['objective'])
+    # Model dựng một lần, các lần sau chỉ sửa tại chỗ
+    assert planner._pm.model is model
+
+def test_resolve_is_hinted_and_skips_removed_courses():
+    sections = [Section('A_1', 'A', 1, 'Mon', 1, 3, 3), Section('B_1', 'B', 1, 'Tue', 1, 3, 3),
+                Section('C_1', 'C', 1, 'Wed', 1, 2, 2)]
+    planner = IncrementalPlanner(sections, {}, [1], {1: (0, 20)})
+    first = {}
+    chosen, _ = planner.solve(first)
+    assert sorted(s.id for s in chosen) == ['A_1', 'B_1', 'C_1'] and not first['hinted']
+    planner.update(wanted=['A', 'C'])
+    second = {}
+    chosen, _ = planner.solve(second)
+    assert second['hinted'] and sorted(s.id for s in chosen) == ['A_1', 'C_1']
+    # Gợi ý chỉ gồm biến của các lớp còn được chọn
+    hinted = set(planner._pm.model.Proto().solution_hint.vars)
+    assert hinted == {int(planner._pm.var_index[i]) for i in np.flatnonzero(planner._allowed)}
+    # Thêm lại môn đã bỏ => miền biến được mở lại
+    planner.update(wanted=['A', 'B', 'C'])
+    assert sorted(s.id for s in planner.solve()[0]) == ['A_1', 'B_1', 'C_1']
+
+def test_bounds_can_be_tightened_and_relaxed():
+    sections = [Section('A_1', 'A', 1, 'Mon', 1, 3, 3), Section('B_1', 'B', 1, 'Tue', 1, 3, 3)]
+    planner = IncrementalPlanner(sections, {}, [1], {1: (0, 20)})
+    planner.update(credit_bounds={1: (7, 20)})
+    assert planner.solve() == ([], 'INFEASIBLE')
+    planner.update(credit_bounds={1: (0, 3)})
+    chosen, status = planner.solve()
+    assert status == 'OPTIMAL' and sum(s.credits for s in chosen) == 3
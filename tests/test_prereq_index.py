@@ -0,0 +1,42 @@
+import pytest
+
+from src.optimizer import Section, schedule_multi_term
+from src.prereq_index import PrereqIndex
+
+PREREQS = {'C': ['A', 'B'], 'D': ['C'], 'E': ['A']}
+
+def test_topological_order_respects_edges():
+    index = PrereqIndex(PREREQS)
+    position = {c: i for i, c in enumerate(index.order)}
+    assert set(position) == {'A', 'B', 'C', 'D', 'E'}
+    for course, prereqs in PREREQS.items():
+        assert all(position[p] < position[course] for p in prereqs)
+
+def test_cycle_raises():
+    with pytest.raises(ValueError):
+        PrereqIndex({'A': ['B'], 'B': ['C'], 'C': ['A']})
+
+def test_transitive_closure_and_missing():
+    index = PrereqIndex(PREREQS)
+    assert index.all_prereqs('D') == {'A', 'B', 'C'}
+    assert index.all_prereqs('A') == frozenset()
+    assert index.missing('D', ['A', 'C']) == {'B'}
+    assert PrereqIndex.of(index) is index and not PrereqIndex({})
+
+def test_earliest_terms():
+    index = PrereqIndex(PREREQS)
+    offered = {'A': [1, 2], 'B': [2], 'C': [2, 3], 'D': [3, 4], 'E': [1], 'F': [2]}
+    assert index.earliest_terms(offered) == {'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': None, 'F': 2}
+    # Đã học thì không cần chờ; môn tiên quyết không mở lớp => None
+    assert index.earliest_terms(offered, completed=['A', 'B']) == {'C': 2, 'D': 3, 'E': 1, 'F': 2}
+    assert index.earliest_terms({'C': [1, 2]})['C'] is None
+
+def test_optimizer_orders_prereqs_across_terms():
+    sections = [Section('A_1', 'A', 1, 'Mon', 1, 3, 3), Section('A_2', 'A', 2, 'Mon', 1, 3, 3),
+                Section('B_1', 'B', 1, 'Tue', 1, 3, 3), Section('B_2', 'B', 2, 'Tue', 1, 3, 3)]
+    bounds = {1: (0, 20), 2: (0, 20)}
+    chosen, _ = schedule_multi_term(sections, {'B': ['A']}, [1, 2], bounds)
+    terms = {s.course_id: s.term for s in chosen}
+    assert terms['A'] < terms['B']
+    chosen, _ = schedule_multi_term(sections, {'B': ['A']}, [1, 2], bounds, completed=['A'])
+    assert 'A' not in {s.course_id for s in chosen} and 'B' in {s.course_id for s in chosen}
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.optimizer import Section, SectionCatalog, schedule_multi_term
+
+DAYS = ['Mon', 'Tue', 'Wed']
+
+def _random_instance(seed):
+    rng = np.random.default_rng(seed)
+    n_courses = int(rng.integers(3, 8))
+    courses = [f"C{i}" for i in range(n_courses)]
+    # Tiên quyết chỉ trỏ về môn có chỉ số nhỏ hơn => DAG
+    prereqs = {c: [courses[j] for j in range(i) if rng.random() < 0.3] for i, c in enumerate(courses)}
+    sections = []
+    for k in range(int(rng.integers(4, 16))):
+        credits = int(rng.integers(1, 5))
+        start = int(rng.integers(1, 8))
+        sections.append(Section(f"S{k}", courses[int(rng.integers(n_courses))], int(rng.integers(1, 5)),
+                                DAYS[int(rng.integers(len(DAYS)))], start, start + credits - 1, credits))
+    target_terms = sorted(rng.choice([1, 2, 3, 4], size=int(rng.integers(1, 4)), replace=False).tolist())
+    credit_bounds = {t: (int(rng.integers(0, 5)), int(rng.integers(5, 12))) for t in target_terms}
+    risks = {c: float(rng.random()) for c in courses}
+    completed = {c for c in courses if rng.random() < 0.2}
+    return sections, prereqs, target_terms, credit_bounds, risks, completed
+
+def _solve(instance, presolve):
+    sections, prereqs, target_terms, credit_bounds, risks, completed = instance
+    stats = {}
+    _, status = schedule_multi_term(SectionCatalog(sections), prereqs, target_terms, credit_bounds, risks,
+                                    risk_weight=1.0, stats=stats, completed=completed, presolve=presolve)
+    return status, stats['objective']
+
+@pytest.mark.parametrize('seed', range(200))
+def test_presolve_only_shrinks_model(seed):
+    # Presolve chỉ thu nhỏ model: trạng thái và giá trị mục tiêu phải như khi tắt presolve
+    instance = _random_instance(seed)
+    assert _solve(instance, None) == _solve(instance, [])
+
+def test_pruned_term_keeps_min_credits():
+    # B, C ở kỳ 1 đều không học được (thiếu A) => kỳ 1 không đạt tối thiểu 1 tín
+    sections = [Section('B1', 'B', 1, 'Mon', 1, 3, 3), Section('C1', 'C', 1, 'Tue', 1, 3, 3),
+                Section('A2', 'A', 2, 'Mon', 1, 3, 3), Section('B2', 'B', 2, 'Tue', 1, 3, 3),
+                Section('D2', 'D', 2, 'Wed', 1, 3, 3)]
+    prereqs = {'B': ['A'], 'C': ['B']}
+    bounds = {1: (1, 5), 2: (0, 10)}
+    for presolve in (None, []):
+        assert schedule_multi_term(sections, prereqs, [1, 2], bounds, presolve=presolve)[1] == 'INFEASIBLE'
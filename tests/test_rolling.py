@@ -0,0 +1,21 @@
+from src.optimizer import Section, schedule_multi_term
+from src.rolling import schedule_rolling
+
+SECTIONS = [Section('A1', 'A', 1, 'Mon', 1, 3, 3), Section('B1', 'B', 1, 'Tue', 1, 3, 3),
+            Section('A2', 'A', 2, 'Mon', 1, 3, 3), Section('C2', 'C', 2, 'Wed', 1, 3, 3),
+            Section('C3', 'C', 3, 'Mon', 1, 3, 3), Section('D3', 'D', 3, 'Tue', 1, 3, 3)]
+
+def test_lns_without_seed():
+    bounds = {t: (0, 6) for t in (1, 2, 3)}
+    stats = {}
+    plan, status = schedule_rolling(SECTIONS, {'C': ['A']}, [1, 2, 3], bounds, window=1, lns_rounds=2,
+                                    seed=None, stats=stats)
+    assert status in ('OPTIMAL', 'FEASIBLE')
+    assert len(stats['lns']) == 2
+
+def test_window_keeps_bounds_of_terms_chosen_earlier():
+    # Kỳ 1 cần A + B, kỳ 2 chỉ còn A (đã học) => kỳ 2 không đạt tối thiểu 3 tín như model nguyên khối
+    sections = SECTIONS[:3]
+    bounds = {1: (6, 10), 2: (3, 10)}
+    assert schedule_multi_term(sections, {}, [1, 2], bounds)[1] == 'INFEASIBLE'
+    assert schedule_rolling(sections, {}, [1, 2], bounds, window=1) == ([], 'INFEASIBLE')
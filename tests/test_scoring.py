@@ -0,0 +1,38 @@
+import numpy as np
+import torch
+
+from src.ai_model import RiskPredictor
+from src.scoring import RiskScorer
+
+class _RecordingPredictor:
+    # Runtime kiểu predict(X), ghi lại kích thước từng lô đầu vào
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, X):
+        self.batches.append(len(X))
+        return X[:, 0] / 4.0 * (1.0 - X[:, 1]) / X[:, 2]
+
+def _inputs():
+    rng = np.random.default_rng(0)
+    return rng.uniform(1, 4, 23), rng.uniform(0, 1, 11), rng.integers(1, 6, 11)
+
+def _full_input(gpas, difficulty, credits):
+    n_s, n_c = len(gpas), len(difficulty)
+    return np.column_stack([np.repeat(gpas, n_c), np.tile(difficulty, n_s), np.tile(credits, n_s)])
+
+def test_risk_matrix_builds_inputs_per_chunk():
+    gpas, difficulty, credits = _inputs()
+    predictor = _RecordingPredictor()
+    risks = RiskScorer(predictor, chunk_size=16).risk_matrix(gpas, difficulty, credits)
+    assert max(predictor.batches) == 16 and sum(predictor.batches) == len(gpas) * len(difficulty)
+    expected = 1.0 - predictor.predict(_full_input(gpas, difficulty, credits).astype(np.float32))
+    assert np.allclose(risks, expected.reshape(len(gpas), len(difficulty)))
+
+def test_risk_matrix_matches_fail_prob_for_torch_model():
+    torch.manual_seed(0)
+    scorer = RiskScorer(RiskPredictor(3), chunk_size=50)
+    gpas, difficulty, credits = _inputs()
+    expected = scorer.fail_prob(_full_input(gpas, difficulty, credits)).reshape(len(gpas), len(difficulty))
+    assert np.allclose(scorer.risk_matrix(gpas, difficulty, credits), expected, atol=1e-6)
+    assert scorer.risk_matrix([], difficulty, credits).shape == (0, len(difficulty))
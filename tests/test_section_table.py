@@ -0,0 +1,49 @@
+from src.section_table import Section, SectionTable
+
+SECTIONS = [Section('B_1', 'B', 2, 'Tue', 1, 3, 3), Section('A_1', 'A', 1, 'Mon', 4, 6, 3),
+            Section('A_2', 'A', 2, 'Sun', 1, 2, 2), Section('B_2', 'B', 1, 'Mon', 7, 9, 3),
+            Section('C_1', 'C', 1, 'Mon', 1, 1, 1)]
+
+def _key(s):
+    return (s.id, s.course_id, s.term, s.day, s.start, s.end, s.credits)
+
+def test_sections_round_trip():
+    table = SectionTable.from_sections(SECTIONS)
+    assert len(table) == 5 and table.n_courses == 3
+    assert [_key(s) for s in table.sections(range(len(table)))] == [_key(s) for s in SECTIONS]
+    assert table.course_of(2) == 'A'
+
+def test_from_dataframe_matches_from_sections():
+    table = SectionTable.from_sections(SECTIONS)
+    other = SectionTable.from_dataframe(table.to_dataframe())
+    assert other.fingerprint() == table.fingerprint()
+    assert [_key(s) for s in other.sections(range(len(other)))] == [_key(s) for s in SECTIONS]
+
+def test_by_course_groups_rows():
+    table = SectionTable.from_sections(SECTIONS)
+    order, offsets = table.by_course()
+    groups = {table.course_ids[k]: sorted(order[offsets[k]:offsets[k + 1]].tolist())
+              for k in range(table.n_courses)}
+    assert groups == {'A': [1, 2], 'B': [0, 3], 'C': [4]}
+    assert sorted(table.course_codes_of(['C', 'X', 'A']).tolist()) == sorted(
+        [table.course_codes[4], table.course_codes[1]])
+
+def test_by_term_day_groups_rows():
+    table = SectionTable.from_sections(SECTIONS)
+    order, offsets, keys = table.by_term_day()
+    groups = {}
+    for g in range(len(keys)):
+        for row in order[offsets[g]:offsets[g + 1]]:
+            groups.setdefault(g, set()).add((SECTIONS[row].term, SECTIONS[row].day))
+    # Mỗi nhóm chỉ gồm một cặp (kỳ, thứ), và các cặp khác nhau ở nhóm khác nhau
+    assert all(len(pairs) == 1 for pairs in groups.values())
+    assert len(groups) == len({(s.term, s.day) for s in SECTIONS}) == 3
+    assert offsets[-1] == len(SECTIONS)
+
+def test_fingerprint_stable_and_sensitive():
+    fp = SectionTable.from_sections(SECTIONS).fingerprint()
+    assert SectionTable.from_sections(list(SECTIONS)).fingerprint() == fp
+    changed = list(SECTIONS)
+    changed[0] = Section('B_1', 'B', 2, 'Tue', 1, 3, 4)
+    assert SectionTable.from_sections(changed).fingerprint() != fp
+    assert SectionTable.from_sections(SECTIONS[::-1]).fingerprint() != fp
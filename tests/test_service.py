@@ -0,0 +1,76 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import src.service
+from src.optimizer import Section
+from src.service import PlanningService, ServiceError
+
+SECTIONS = [Section('A1', 'A', 1, 'Mon', 1, 3, 3), Section('B1', 'B', 1, 'Tue', 1, 3, 3)]
+COURSES = pd.DataFrame({'id': ['A', 'B'], 'difficulty': [0.5, 0.5], 'credits': [3, 3]})
+SOLVE_SECONDS = 0.5
+
+class _Scorer:
+    def risk_dict(self, gpa, courses_df):
+        return {c: 0.1 for c in courses_df['id']}
+
+def _slow_solve(student):
+    # Giải giả: chạy SOLVE_SECONDS, bị cắt ở deadline_at như _solve_student thật
+    remaining = student['deadline_at'] - time.time()
+    time.sleep(max(0.0, min(SOLVE_SECONDS, remaining)))
+    return student['student_id'], ['A1'], 'OPTIMAL' if remaining >= SOLVE_SECONDS else 'FEASIBLE'
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(src.service, '_solve_student', _slow_solve)
+    svc = PlanningService(SECTIONS, {}, COURSES, _Scorer(), target_terms=[1], default_bounds=(0, 10), deadline=5.0)
+    svc._pool = ThreadPoolExecutor(max_workers=4)
+    svc._threads = ThreadPoolExecutor(max_workers=2)
+    yield svc
+    svc.close()
+
+async def _later(seconds, coro):
+    await asyncio.sleep(seconds)
+    return await coro
+
+def test_later_request_with_later_deadline_gets_own_solve(service):
+    # B đến sau 0.2s với hạn 0.3s (ngắn hơn 0.4s của A) nhưng thời điểm hết hạn muộn hơn A
+    async def run():
+        return await asyncio.gather(service.plan({'gpa': 3, 'deadline': 0.4}),
+                                    _later(0.2, service.plan({'gpa': 3, 'deadline': 0.3})))
+    a, b = asyncio.run(run())
+    assert (a['source'], b['source']) == ('solve', 'solve')
+    assert service.counters['solves'] == 2
+    assert b['elapsed'] >= 0.25
+
+def test_later_request_with_earlier_deadline_is_coalesced(service):
+    async def run():
+        return await asyncio.gather(service.plan({'gpa': 3, 'deadline': 2.0}),
+                                    _later(0.1, service.plan({'gpa': 3, 'deadline': 1.0})))
+    a, b = asyncio.run(run())
+    assert (a['source'], b['source']) == ('solve', 'coalesced')
+    assert a['status'] == b['status'] == 'OPTIMAL'
+    assert service.counters['solves'] == 1
+
+@pytest.mark.parametrize('body', [
+    {'completed': 5},
+    {'completed': 'A'},
+    {'completed': ['A', 1]},
+    {'deadline': 0},
+    {'deadline': -1},
+    {'deadline': 'soon'},
+    {'min_credits': 'x'},
+])
+def test_malformed_plan_body_is_rejected(service, body):
+    with pytest.raises(ServiceError) as err:
+        asyncio.run(service.dispatch('POST', '/plan', json.dumps({'gpa': 3, **body}).encode()))
+    assert (err.value.status, err.value.code) == (400, 'invalid_field')
+
+def test_completed_list_is_accepted(service):
+    status, _, payload, _ = asyncio.run(service.dispatch('POST', '/plan',
+                                                         json.dumps({'gpa': 3, 'completed': ['B']}).encode()))
+    assert status == 200 and payload['status'] == 'OPTIMAL'
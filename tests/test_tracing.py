@@ -0,0 +1,23 @@
+from src.tracing import Tracer
+
+def test_prometheus_exports_only_counts_and_durations():
+    tracer = Tracer()
+    for first in (1, 2):
+        with tracer.span('plan.rolling.window', first=first, last=first + 2):
+            pass
+    with tracer.span('plan.solve') as sp:
+        sp.set(status='OPTIMAL', branches=10, conflicts=3, wall_time=0.5, num_variables=40, hinted=True)
+    text = tracer.prometheus()
+    assert 'plan_branches_total{stage="plan.solve"} 10' in text
+    assert 'plan_wall_time_total{stage="plan.solve"} 0.5' in text
+    for name in ('plan_first_total', 'plan_last_total', 'plan_num_variables_total', 'plan_hinted_total'):
+        assert name not in text
+    assert 'plan_stage_seconds_count{stage="plan.rolling.window"} 2' in text
+    # Thuộc tính vẫn nằm trong span
+    assert tracer.spans[0].to_dict()['first'] == 1
+
+def test_counter_attrs_is_configurable():
+    tracer = Tracer(counter_attrs={'first'})
+    with tracer.span('plan.rolling.window', first=3):
+        pass
+    assert 'plan_first_total{stage="plan.rolling.window"} 3' in tracer.prometheus()